@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Board Change Gate Benchmark
+===========================
+Simulates a whiteboard session at 5 FPS and measures the BoardChangeGate:
+how many OCR results it skips, what hashing costs against the host
+post-processing it saves, and how quickly it wakes after the board changes.
+
+The board is rendered at camera resolution and shrunk to the gate preview
+size (the device's job in the reader), then gets sensor noise and exposure
+flicker. Every so often a word is written or a line erased, and
+now and then someone walks across the board. Post-processing per result is
+the host work whiteboard_reader_full does: consensus, matching against the
+previous reading, and a JSON history line.
+
+A second scenario is a long noisy stretch: someone moves about at the
+board while the light fades and sensor grain builds up, then the light
+comes back and they write a line. The gate must wake for the edit rather
+than wait for its wake_seconds fallback.
+
+Usage:
+    python3 benchmarks/bench_board_gate.py
+    python3 benchmarks/bench_board_gate.py --frames 3000 --edit-seconds 20
+    python3 benchmarks/bench_board_gate.py --stand-seconds 1800
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_ocr_consensus import WORDS, noisy  # noqa: E402
+from utils.board_gate import BoardChangeGate  # noqa: E402
+from utils.line_matching import match_lines  # noqa: E402
+from utils.ocr_consensus import ConfidenceAggregator  # noqa: E402
+
+FRAME_SIZE = (1152, 640)  # (width, height), the reader's camera resolution
+GATE_SIZE = (128, 72)  # Gate preview size, as in whiteboard_reader_full
+FPS = 5
+
+
+def render_board(lines) -> np.ndarray:
+    """Clean board at camera resolution, shrunk to the gate preview."""
+    w, h = FRAME_SIZE
+    frame = np.full((h, w), 205, np.uint8)
+    cv2.rectangle(frame, (0, 0), (w, 40), 90, -1)  # Wall above the board
+    for i, line in enumerate(lines):
+        cv2.putText(frame, line, (60, 110 + i * 55), cv2.FONT_HERSHEY_SIMPLEX,
+                    1.2, 40, 3, cv2.LINE_AA)
+    return cv2.resize(frame, GATE_SIZE, interpolation=cv2.INTER_AREA)
+
+
+def camera(board: np.ndarray, walker, rng: np.random.Generator, exposure: float,
+           grain: float = 3.0):
+    frame = board.astype(np.float32)
+    if walker is not None:
+        scale = GATE_SIZE[0] / FRAME_SIZE[0]
+        x = int(walker * scale)
+        frame[int(150 * scale):, max(0, x):max(0, x + int(220 * scale))] = 60
+    frame = frame * exposure + rng.normal(0, grain, frame.shape)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def post_process(aggregator, lines, previous, history, rng: random.Random):
+    """The reader's per-result host work on an OCR reading of lines."""
+    reading = [noisy(line, rng) for line in lines]
+    aggregator.add_reading(reading, [0.9] * len(reading))
+    match_lines(aggregator.consensus_text, previous)
+    history.write(json.dumps({"text_lines": reading, "num_regions": len(reading)}) + "\n")
+    return aggregator.consensus_text
+
+
+def session(args, gate):
+    """Run the simulated session; returns (host seconds, edit frames, wake delays)."""
+    rng = random.Random(0)
+    ocr_rng = random.Random(1)  # Separate, so skipping doesn't change the session
+    noise = np.random.default_rng(0)
+    lines = [" ".join(rng.choice(WORDS) for _ in range(3)) for _ in range(6)]
+    board = render_board(lines)
+    aggregator = ConfidenceAggregator()
+    previous = []
+    walker = None
+    edits = []  # Frame index of each edit
+    wake_delays = []  # Frames from an edit to the next processed result
+    host_seconds = 0.0
+    with tempfile.TemporaryFile("w") as history:
+        for frame_index in range(args.frames):
+            now = frame_index / FPS
+            if rng.random() < 1 / (args.edit_seconds * FPS):
+                if rng.random() < 0.5 and len(lines) > 1:
+                    lines.pop(rng.randrange(len(lines)))
+                elif len(lines) < 9:
+                    lines.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))))
+                board = render_board(lines)
+                edits.append(frame_index)
+            if walker is None and rng.random() < 1 / (args.walk_seconds * FPS):
+                walker = -220
+            elif walker is not None:
+                walker = walker + 150 if walker < FRAME_SIZE[0] else None
+            frame = camera(board, walker, noise, 1 + 0.04 * np.sin(now))
+
+            start = time.perf_counter()
+            if gate is not None:
+                gate.observe(frame)
+                if gate.should_skip(now):
+                    host_seconds += time.perf_counter() - start
+                    continue
+            process_start = time.perf_counter()
+            previous = post_process(aggregator, lines, previous, history, ocr_rng)
+            if gate is not None:
+                gate.mark_processed(now, time.perf_counter() - process_start)
+            host_seconds += time.perf_counter() - start
+            while len(wake_delays) < len(edits):
+                wake_delays.append(frame_index - edits[len(wake_delays)])
+    return host_seconds, edits, wake_delays
+
+
+def noisy_stretch(args):
+    """Someone at the board for stand_seconds while grain builds up, then
+    the light comes back and they write a line without stepping away.
+
+    Returns (threshold before the stretch, threshold at the edit, frames
+    from the edit to the next processed result or None).
+    """
+    rng = random.Random(2)
+    noise = np.random.default_rng(2)
+    lines = [" ".join(rng.choice(WORDS) for _ in range(3)) for _ in range(3)]
+    board = render_board(lines)
+    gate = BoardChangeGate()
+    quiet = 30 * FPS
+    edit = quiet + int(args.stand_seconds * FPS)
+    before = at_edit = None
+    for frame_index in range(edit + 15 * FPS):
+        now = frame_index / FPS
+        walker, grain = None, 3.0
+        if quiet <= frame_index < edit:
+            walker = 650 + rng.uniform(-20, 20)
+            grain += 9.0 * (frame_index - quiet) / (edit - quiet)
+        elif frame_index >= edit:
+            walker = 650  # Still at the board, writing
+        if frame_index == quiet:
+            before = gate.threshold
+        if frame_index == edit:
+            at_edit = gate.threshold
+            lines.append(" ".join(rng.choice(WORDS) for _ in range(3)))
+            board = render_board(lines)
+        gate.observe(camera(board, walker, noise, 1 + 0.04 * np.sin(now), grain))
+        if not gate.should_skip(now):
+            gate.mark_processed(now, 0.0)
+            if frame_index >= edit:
+                return before, at_edit, frame_index - edit
+    return before, at_edit, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the board change gate")
+    parser.add_argument("--frames", type=int, default=1500)
+    parser.add_argument("--edit-seconds", type=float, default=30.0,
+                        help="Average time between board edits (default: 30)")
+    parser.add_argument("--walk-seconds", type=float, default=60.0,
+                        help="Average time between people walking past (default: 60)")
+    parser.add_argument("--stand-seconds", type=float, default=600.0,
+                        help="Length of the noisy stretch before the edit (default: 600)")
+    args = parser.parse_args()
+
+    ungated_seconds, edits, _ = session(args, None)
+    gate = BoardChangeGate()
+    gated_seconds, _, wake_delays = session(args, gate)
+    stats = gate.stats
+
+    print(f"{args.frames} frames ({args.frames / FPS / 60:.0f} min at {FPS} FPS), "
+          f"{len(edits)} edits, a walk-by every ~{args.walk_seconds:.0f} s")
+    print(f"  skipped            {stats['skipped']} / {args.frames} ({stats['skip_ratio']:.1%})")
+    print(f"  hash per frame     {stats['hash_ms']:.3f} ms")
+    print(f"  post-processing    {stats['process_ms']:.3f} ms per processed result")
+    print(f"  host time          {ungated_seconds:.2f} s ungated -> {gated_seconds:.2f} s gated "
+          f"(measured {ungated_seconds - gated_seconds:.2f} s saved, "
+          f"gate estimate {stats['cpu_saved_seconds']:.2f} s)")
+    print(f"  threshold          {stats['threshold_bits']} bits at the end")
+    if wake_delays:
+        late = [d for d in wake_delays if d > 0]
+        print(f"  wake after edit    {len(wake_delays) - len(late)} of {len(wake_delays)} "
+              f"immediate, late ones after {late or '-'} frames")
+
+    before, at_edit, delay = noisy_stretch(args)
+    print(f"{args.stand_seconds:.0f} s noisy stretch at the board, then a line written")
+    print(f"  threshold          {before:.1f} bits before -> {at_edit:.1f} bits at the edit")
+    print(f"  wake after edit    "
+          f"{'not within 15 s' if delay is None else f'after {delay} frames'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Face Budget Benchmark
+=====================
+Simulates a seated class under --face-budget at RVC2 frame rates and checks
+that deferred faces keep their identity in the gaze detector's tracker.
+
+Each frame every face is detected (with box jitter), FaceBudget picks the
+ones that get crops, and only those reach the main loop's FaceTracker, as
+in gaze_detector.py; a fraction of gathered messages is dropped, like the
+non-blocking queue does. Reports the longest deferral against the bound
+and how many faces were evicted and came back under a new ID, with and
+without touching the tracks of deferred faces (FaceTracker.touch with the
+budget's present_boxes).
+
+Usage:
+    python3 benchmarks/bench_face_budget.py
+    python3 benchmarks/bench_face_budget.py --faces 40 --budget 2 --drop 0.1
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.face_budget import FaceBudget  # noqa: E402
+from utils.face_tracker import FaceTracker  # noqa: E402
+
+FACE_TRACK_MAX_AGE = 2.0  # As in gaze_detector.py
+
+
+class _Rect:
+    def __init__(self, box):
+        self._box = box
+
+    def getOuterRect(self):
+        return self._box
+
+
+class _Detection:
+    """Just enough of ImgDetectionExtended for detection_boxes."""
+
+    def __init__(self, box, confidence):
+        self.rotated_rect = _Rect(box)
+        self.confidence = confidence
+
+
+def seats(faces: int, rng: np.random.Generator) -> np.ndarray:
+    """Non-overlapping (faces, 4) xyxy boxes on a grid, nearer rows larger."""
+    cols = int(np.ceil(np.sqrt(faces * 1.5)))
+    rows = -(-faces // cols)
+    boxes = []
+    for k in range(faces):
+        r, c = divmod(k, cols)
+        size = 0.5 / cols * (0.6 + 0.4 * r / max(rows - 1, 1))
+        cx, cy = (c + 0.5) / cols, (r + 0.5) / rows
+        boxes.append((cx - size / 2, cy - size / 2, cx + size / 2, cy + size / 2))
+    return np.array(boxes) + rng.normal(0, 0.002, (faces, 4))
+
+
+def run(args, touch: bool):
+    rng = np.random.default_rng(0)
+    base = seats(args.faces, rng)
+    confidence = rng.uniform(0.6, 0.95, args.faces)
+    budget = FaceBudget(args.budget, args.max_defer)
+    tracker = FaceTracker(max_age=FACE_TRACK_MAX_AGE)
+    ids_seen = set()
+    evictions = 0
+    select_seconds = 0.0
+
+    for frame in range(args.frames):
+        timestamp = frame / args.fps
+        boxes = base + rng.normal(0, 0.002, base.shape)
+        detections = [_Detection(box.tolist(), conf) for box, conf in zip(boxes, confidence)]
+
+        start = time.perf_counter()
+        served = budget.select(detections, timestamp)
+        select_seconds += time.perf_counter() - start
+
+        if rng.random() < args.drop:
+            continue  # Gathered message dropped before the main loop
+        if touch:
+            tracker.touch(budget.present_boxes, timestamp)
+        ids_seen.update(tracker.update(boxes[served], timestamp).tolist())
+        evictions += len(tracker.evict(timestamp))
+
+    return budget, len(ids_seen) - args.faces, evictions, select_seconds / args.frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the face crop budget")
+    parser.add_argument("--faces", type=int, default=30)
+    parser.add_argument("--budget", type=int, default=2)
+    parser.add_argument("--max-defer", type=int, default=10)
+    parser.add_argument("--fps", type=float, default=5.0)
+    parser.add_argument("--frames", type=int, default=1500)
+    parser.add_argument("--drop", type=float, default=0.05,
+                        help="Fraction of gathered messages dropped (default: 0.05)")
+    args = parser.parse_args()
+
+    bound = max(args.max_defer, -(-args.faces // args.budget) - 1)
+    print(f"{args.faces} faces, budget {args.budget}, max_defer {args.max_defer}, "
+          f"{args.fps:.0f} FPS, {args.drop:.0%} of messages dropped")
+    print(f"  (faces > budget*(max_defer+1) = {args.budget * (args.max_defer + 1)}: "
+          f"{'yes' if args.faces > args.budget * (args.max_defer + 1) else 'no'})")
+    for touch in (False, True):
+        budget, new_ids, evictions, select_s = run(args, touch)
+        label = "touch deferred" if touch else "served only"
+        print(f"  {label:<15} longest deferral {budget.stats['max_deferred_frames']:>3} "
+              f"frames (bound {bound}), re-identified faces {new_ids:>4}, "
+              f"evictions {evictions:>4}, select {select_s * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
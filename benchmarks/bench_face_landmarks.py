@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Face Landmark Extraction Benchmark
+==================================
+Compares the per-face cost of the old full 468-point int conversion in
+determine_fatigue against the sparse LandmarkGather accessor, using
+synthetic MediaPipe keypoints (no camera needed).
+
+Usage:
+    python3 benchmarks/bench_face_landmarks.py
+    python3 benchmarks/bench_face_landmarks.py --iterations 20000
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.face_landmarks import (  # noqa: E402
+    LEFT_EYE_IDX,
+    POSE_IDX,
+    RIGHT_EYE_IDX,
+    _fatigue_gather,
+    calc_eye_aspect_ratio,
+)
+
+SHAPE = (768, 1024)
+
+
+def make_face(rng: np.random.Generator):
+    """Build a fake Keypoints message with 468 normalized points."""
+    xy = rng.uniform(0.3, 0.7, size=(468, 2))
+    return SimpleNamespace(
+        keypoints=[SimpleNamespace(x=float(x), y=float(y)) for x, y in xy]
+    )
+
+
+def legacy_extract(face):
+    """The previous extraction path: all 468 points, truncated to int."""
+    h, w = SHAPE
+    points = np.array([[int(kp.x * w), int(kp.y * h)] for kp in face.keypoints])
+    left_eye = points[list(LEFT_EYE_IDX)]
+    right_eye = points[list(RIGHT_EYE_IDX)]
+    pose = points[list(POSE_IDX)].astype("double")
+    return left_eye, right_eye, pose
+
+
+def sparse_extract(face):
+    """The current extraction path via LandmarkGather."""
+    points = _fatigue_gather.gather(face, SHAPE)
+    rows = _fatigue_gather.rows
+    return points[rows["left_eye"]], points[rows["right_eye"]], points[rows["pose"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark landmark extraction")
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    face = make_face(rng)
+
+    legacy_s = timeit.timeit(lambda: legacy_extract(face), number=args.iterations)
+    sparse_s = timeit.timeit(lambda: sparse_extract(face), number=args.iterations)
+
+    legacy_us = legacy_s / args.iterations * 1e6
+    sparse_us = sparse_s / args.iterations * 1e6
+    print(f"Per-face extraction ({args.iterations} iterations)")
+    print(f"  legacy (468 pts, int):   {legacy_us:8.1f} us")
+    print(f"  sparse (16 pts, float):  {sparse_us:8.1f} us")
+    print(f"  speedup:                 {legacy_us / sparse_us:8.1f}x")
+
+    # Precision lost to int truncation on the EAR signal
+    left_int, _, _ = legacy_extract(face)
+    left_float, _, _ = sparse_extract(face)
+    ear_int = calc_eye_aspect_ratio(left_int)
+    ear_float = calc_eye_aspect_ratio(left_float)
+    print(f"  EAR int vs float:        {ear_int:.4f} vs {ear_float:.4f}")
+
+
+if __name__ == "__main__":
+    main()
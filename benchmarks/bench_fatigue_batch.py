@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Batched Fatigue Analysis Benchmark
+==================================
+Compares a per-face determine_fatigue loop (three np.linalg.norm calls per
+eye, one Euler conversion per face) with the batched analyze_faces API for
+lecture-hall face counts, using synthetic landmarks built from the head-pose
+model so solvePnP converges like it does on real faces.
+
+Usage:
+    python3 benchmarks/bench_fatigue_batch.py
+    python3 benchmarks/bench_fatigue_batch.py --faces 30 --frames 200
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.face_landmarks import (  # noqa: E402
+    LEFT_EYE_IDX,
+    MOUTH_IDX,
+    POSE_IDX,
+    RIGHT_EYE_IDX,
+    analyze_faces,
+    calc_eye_aspect_ratio,
+    get_euler_angles,
+    get_pose_estimation,
+)
+
+SHAPE = (768, 1024)
+
+MODEL_POINTS = np.array(
+    [
+        (0.0, -7.9422, 5.1812),
+        (0.0, -0.4632, 7.5866),
+        (-4.4459, 2.6640, 3.1734),
+        (4.4459, 2.6640, 3.1734),
+        (-2.4562, -4.3426, 4.2839),
+        (2.4562, -4.3426, 4.2839),
+    ]
+)
+
+
+def make_face(rng: np.random.Generator):
+    """Project the pose model at a random head pose and add eye/mouth landmarks."""
+    h, w = SHAPE
+    camera_matrix = np.array([[w, 0, w / 2], [0, w, h / 2], [0, 0, 1]], dtype=float)
+    rvec = np.radians(rng.uniform(-25, 25, size=3))
+    tvec = np.array([rng.uniform(-20, 20), rng.uniform(-10, 10), rng.uniform(60, 120)])
+    projected, _ = cv2.projectPoints(MODEL_POINTS, rvec, tvec, camera_matrix, None)
+    projected = projected.reshape(-1, 2)
+
+    xy = np.tile(projected.mean(axis=0), (468, 1)) + rng.normal(0, 3, size=(468, 2))
+    xy[list(POSE_IDX)] = projected
+    for eye_idx, corner in ((LEFT_EYE_IDX, projected[2]), (RIGHT_EYE_IDX, projected[3])):
+        offsets = np.array([[-8, 0], [-3, -3], [3, -3], [8, 0], [3, 3], [-3, 3]])
+        xy[list(eye_idx)] = corner + offsets * rng.uniform(0.5, 1.5)
+    mouth_center = (projected[4] + projected[5]) / 2
+    half_width = (projected[5] - projected[4]) / 2
+    opening = np.array([0, np.linalg.norm(half_width)]) * rng.uniform(0, 1.2)
+    xy[list(MOUTH_IDX)] = [
+        projected[4], mouth_center - half_width / 2 - opening / 2,
+        mouth_center + half_width / 2 - opening / 2, projected[5],
+        mouth_center - half_width / 2 + opening / 2,
+        mouth_center + half_width / 2 + opening / 2,
+    ]
+    xy[:, 0] /= w
+    xy[:, 1] /= h
+    return SimpleNamespace(
+        keypoints=[SimpleNamespace(x=float(x), y=float(y)) for x, y in xy]
+    )
+
+
+def legacy_determine_fatigue(face, pitch_angle=20):
+    """Single-face path as it was before batching."""
+    h, w = SHAPE
+    points = np.array([[int(kp.x * w), int(kp.y * h)] for kp in face.keypoints])
+    image_points = points[list(POSE_IDX)].astype("double")
+    success, rvec, _, _, _ = get_pose_estimation(SHAPE, image_points)
+    head_tilted = False
+    if success:
+        pitch, _, _ = get_euler_angles(rvec)
+        head_tilted = pitch < -pitch_angle
+    ear = (calc_eye_aspect_ratio(points[list(LEFT_EYE_IDX)])
+           + calc_eye_aspect_ratio(points[list(RIGHT_EYE_IDX)])) / 2.0
+    return head_tilted, ear < 0.15
+
+
+def time_per_frame(fn, frames: int) -> float:
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched fatigue analysis")
+    parser.add_argument("--faces", type=int, default=20)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--fps", type=int, default=5,
+                        help="Target FPS for the frame budget (default: 5, RVC2)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    faces = [make_face(rng) for _ in range(args.faces)]
+
+    legacy_ms = time_per_frame(
+        lambda: [legacy_determine_fatigue(f) for f in faces], args.frames
+    )
+    batch_ms = time_per_frame(lambda: analyze_faces(SHAPE, faces), args.frames)
+
+    budget_ms = 1000 / args.fps
+    print(f"Fatigue analysis, {args.faces} faces ({args.frames} frames)")
+    print(f"  per-face loop:  {legacy_ms:7.2f} ms/frame")
+    print(f"  analyze_faces:  {batch_ms:7.2f} ms/frame")
+    print(f"  speedup:        {legacy_ms / batch_ms:7.2f}x")
+    print(f"  frame budget:   {budget_ms:7.2f} ms at {args.fps} FPS "
+          f"({batch_ms / budget_ms:.0%} used)")
+
+
+if __name__ == "__main__":
+    main()
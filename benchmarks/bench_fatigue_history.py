@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Fatigue History Benchmark
+=========================
+Fills a temporary history database with weeks of per-minute rollups and
+times the per-frame record() path plus DM-bot style history queries, then
+checks how the DM "history" argument parser handles hostile input.
+
+Usage:
+    python3 benchmarks/bench_fatigue_history.py
+    python3 benchmarks/bench_fatigue_history.py --weeks 8
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.fatigue_history import (  # noqa: E402
+    MAX_HISTORY_MINUTES, FatigueHistory, parse_duration, query_history, sparkline,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fatigue history store")
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--fps", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "fatigue_history.db"
+        history = FatigueHistory(db_path)
+
+        # Per-frame record cost over one simulated hour
+        now = time.time()
+        frames = 3600 * args.fps
+        start = time.perf_counter()
+        for i in range(frames):
+            level = rng.random()
+            history.record(now - 3600 + i / args.fps, level, level > 0.75,
+                           level * 0.3, 3)
+        record_us = (time.perf_counter() - start) / frames * 1e6
+
+        # Bulk-load the remaining weeks directly as minute rows
+        minutes = args.weeks * 7 * 24 * 60
+        first = int(now // 60) - minutes
+        history._conn.executemany(
+            "INSERT OR IGNORE INTO fatigue_minutes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (first + m, 300, 300 * rng.random(), 1.0, rng.randint(0, 300),
+                 30 * rng.random(), 0.4, 3)
+                for m in range(minutes - 60)
+            ),
+        )
+        history._conn.commit()
+        history.close()
+
+        print(f"History store with {args.weeks} weeks of minute rollups")
+        print(f"  record() per frame:  {record_us:8.2f} us")
+        for window in (60, 24 * 60, 7 * 24 * 60):
+            start = time.perf_counter()
+            result = query_history(db_path, window, now=now)
+            query_ms = (time.perf_counter() - start) * 1000
+            print(f"  history {window:>5} min:  {query_ms:8.2f} ms  "
+                  f"{sparkline(result['series'])}")
+
+    # DM arguments: non-finite values are rejected, huge ones clamped
+    print("parse_duration")
+    for text in ("90m", "2h", "inf", "1e400m", "nan", "-inf", "999999d"):
+        minutes = parse_duration(text)
+        ok = minutes is None or minutes <= MAX_HISTORY_MINUTES
+        print(f"  {text!r:>11} -> {minutes!s:<6} {'ok' if ok else 'FAIL'}")
+
+
+if __name__ == "__main__":
+    main()
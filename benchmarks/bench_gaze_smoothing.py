@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Gaze Smoothing Benchmark
+========================
+Measures what One-Euro smoothing does to gaze direction classification:
+direction flips per face-minute (jitter), added latency after real gaze
+shifts, and per-frame cost.
+
+Synthetic sequences hold a gaze target for a few seconds, then glance
+elsewhere, with sensor-like noise on top; their ground truth gives the
+latency. A recording made with `python3 gaze_detector.py --record-gaze
+gaze.npz` has no ground truth, so latency is estimated as the time shift
+that best aligns the smoothed signal with a centered (zero-lag) moving
+average of the raw one.
+
+Usage:
+    python3 benchmarks/bench_gaze_smoothing.py
+    python3 benchmarks/bench_gaze_smoothing.py --recording gaze.npz
+    python3 benchmarks/bench_gaze_smoothing.py --min-cutoff 0.5 --beta 2
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.gaze_analysis import classify_gazes  # noqa: E402
+from utils.one_euro import OneEuroFilterBank  # noqa: E402
+
+TARGETS = np.array([[0, 0], [-0.35, 0], [0.35, 0], [0, -0.35], [0.3, 0.3]])
+
+
+def synthetic(rng, tracks: int, seconds: float, fps: float, noise: float):
+    """Per-frame (timestamps, ids, raw (N, 3)) plus true x/y per sample."""
+    times = np.arange(0, seconds, 1 / fps)
+    ids, raw, truth, stamps = [], [], [], []
+    for track in range(tracks):
+        target = TARGETS[0]
+        change_at = rng.uniform(2, 6)
+        current = target.copy()
+        for t in times:
+            if t >= change_at:
+                target = TARGETS[rng.integers(len(TARGETS))]
+                change_at = t + rng.uniform(2, 6)
+            current += np.clip(target - current, -0.1, 0.1) * min(1.0, 15 / fps)
+            gaze = current + rng.normal(0, noise, 2)
+            ids.append(track)
+            stamps.append(t)
+            truth.append(current.copy())
+            raw.append([gaze[0], gaze[1], -1.0])
+    order = np.lexsort((np.array(ids), np.array(stamps)))
+    return (np.array(stamps)[order], np.array(ids)[order],
+            np.array(raw)[order], np.array(truth)[order])
+
+
+def run_filter(stamps, ids, raw, min_cutoff, beta):
+    """Filter frame by frame; returns smoothed values and us per frame."""
+    bank = OneEuroFilterBank(raw.shape[1], min_cutoff, beta)
+    smoothed = np.empty_like(raw)
+    frame_starts = np.flatnonzero(np.r_[True, np.diff(stamps) > 0])
+    bounds = np.r_[frame_starts, len(stamps)]
+    start = time.perf_counter()
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        smoothed[a:b] = bank.filter(ids[a:b].tolist(), float(stamps[a]), raw[a:b])
+    elapsed = time.perf_counter() - start
+    return smoothed, elapsed / len(frame_starts) * 1e6
+
+
+def flips_per_minute(stamps, ids, vectors):
+    labels = np.array(classify_gazes(vectors))
+    flips = 0
+    duration = 0.0
+    for track in np.unique(ids):
+        mask = ids == track
+        flips += int(np.sum(labels[mask][1:] != labels[mask][:-1]))
+        duration += stamps[mask][-1] - stamps[mask][0]
+    return flips / max(duration, 1e-9) * 60
+
+
+def step_latency(stamps, ids, vectors, truth):
+    """Mean seconds from a true direction change until the output matches."""
+    labels = np.array(classify_gazes(vectors))
+    true_labels = np.array(classify_gazes(truth))
+    delays = []
+    for track in np.unique(ids):
+        mask = ids == track
+        t, got, want = stamps[mask], labels[mask], true_labels[mask]
+        for i in np.flatnonzero(want[1:] != want[:-1]) + 1:
+            hit = np.flatnonzero(got[i:] == want[i])
+            if len(hit) and (i + hit[0] == len(want) - 1 or want[i + hit[0]] == want[i]):
+                delays.append(t[i + hit[0]] - t[i])
+    return float(np.mean(delays)) if delays else float("nan")
+
+
+def alignment_lag(stamps, ids, raw, smoothed, max_lag=0.5, window=0.5):
+    """Time shift (s) that best aligns smoothed gaze x with a zero-lag
+    reference (centered moving average of the raw signal)."""
+    lags = []
+    for track in np.unique(ids):
+        mask = ids == track
+        t, r, s = stamps[mask], raw[mask, 0], smoothed[mask, 0]
+        dt = float(np.median(np.diff(t))) if len(t) > 1 else 0.0
+        if len(t) < 10 or dt <= 0:
+            continue
+        half = max(1, int(window / dt / 2))
+        reference = np.convolve(r, np.ones(2 * half + 1) / (2 * half + 1), "same")
+        r, s = reference[half:-half], s[half:-half]
+        shifts = range(0, max(1, int(max_lag / dt)) + 1)
+        errors = [np.mean((s[k:] - r[:len(r) - k]) ** 2) for k in shifts]
+        lags.append(int(np.argmin(errors)) * dt)
+    return float(np.mean(lags)) if lags else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gaze smoothing")
+    parser.add_argument("--recording", type=str, default=None,
+                        help=".npz saved by gaze_detector.py --record-gaze")
+    parser.add_argument("--tracks", type=int, default=18)
+    parser.add_argument("--seconds", type=float, default=120)
+    parser.add_argument("--fps", type=float, default=15)
+    parser.add_argument("--noise", type=float, default=0.06,
+                        help="Synthetic gaze noise (default: 0.06)")
+    parser.add_argument("--min-cutoff", type=float, default=1.0)
+    parser.add_argument("--beta", type=float, default=3.0)
+    args = parser.parse_args()
+
+    if args.recording:
+        data = np.load(args.recording)
+        stamps, ids = data["timestamps"], data["ids"]
+        raw = data["values"][:, :3]
+        truth = None
+        source = args.recording
+    else:
+        stamps, ids, raw, truth = synthetic(
+            np.random.default_rng(0), args.tracks, args.seconds, args.fps, args.noise
+        )
+        source = f"synthetic, {args.tracks} faces at {args.fps:g} FPS"
+
+    smoothed, us_per_frame = run_filter(stamps, ids, raw, args.min_cutoff, args.beta)
+    print(f"Gaze smoothing on {len(stamps)} samples ({source})")
+    print(f"  min_cutoff {args.min_cutoff} Hz, beta {args.beta}: "
+          f"{us_per_frame:.1f} us/frame")
+    print(f"  direction flips/face-min:  raw {flips_per_minute(stamps, ids, raw):6.1f}"
+          f"   smoothed {flips_per_minute(stamps, ids, smoothed):6.1f}"
+          + (f"   true {flips_per_minute(stamps, ids, truth):6.1f}"
+             if truth is not None else ""))
+    if truth is not None:
+        raw_delay = step_latency(stamps, ids, raw, truth)
+        smooth_delay = step_latency(stamps, ids, smoothed, truth)
+        print(f"  latency after a gaze shift: raw {raw_delay * 1000:5.0f} ms"
+              f"   smoothed {smooth_delay * 1000:5.0f} ms"
+              f"   (+{(smooth_delay - raw_delay) * 1000:.0f} ms)")
+    print(f"  alignment lag vs centered raw average: {alignment_lag(stamps, ids, raw, smoothed) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
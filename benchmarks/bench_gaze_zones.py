@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Gaze Zone Benchmark
+===================
+Per-frame cost of zone classification (ray / rectangle intersection for
+every face and zone) next to the threshold direction classifier, and the
+zone mix for random classroom gazes.
+
+Usage:
+    python3 benchmarks/bench_gaze_zones.py
+    python3 benchmarks/bench_gaze_zones.py --faces 30 --extra-zones 8
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.gaze_analysis import classify_gazes, face_positions  # noqa: E402
+from utils.gaze_zones import DEFAULT_ZONES, GazeZones  # noqa: E402
+
+
+def classroom(rng, faces: int):
+    """Random face boxes (2-6 m away) and gaze vectors."""
+    width = rng.uniform(0.03, 0.09, faces)
+    x = rng.uniform(0.05, 0.95 - width)
+    y = rng.uniform(0.2, 0.6, faces)
+    boxes = np.column_stack([x, y, x + width, y + width * 1.3])
+    vectors = rng.normal([0, -0.1, -0.9], [0.35, 0.35, 0.1], (faces, 3))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return boxes, vectors
+
+
+def per_call_us(fn, repeats: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gaze zone classification")
+    parser.add_argument("--faces", type=int, default=18)
+    parser.add_argument("--extra-zones", type=int, default=3,
+                        help="Side-wall zones added to the defaults (default: 3)")
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    zones = list(DEFAULT_ZONES) + [
+        {"name": f"side{i}", "frame": "room", "corner": [-3.0, -1.0, 1.0 + 1.5 * i],
+         "u": [0.0, 0.0, 1.2], "v": [0.0, 2.0, 0.0]}
+        for i in range(args.extra_zones)
+    ]
+    classifier = GazeZones(zones)
+    boxes, vectors = classroom(np.random.default_rng(0), args.faces)
+    positions = face_positions(boxes, 0.75)
+
+    zone_us = per_call_us(lambda: classifier.classify(positions, vectors), args.repeats)
+    positions_us = per_call_us(lambda: face_positions(boxes, 0.75), args.repeats)
+    direction_us = per_call_us(lambda: classify_gazes(vectors), args.repeats)
+
+    print(f"{args.faces} faces, {len(zones)} zones")
+    print(f"  face positions:   {positions_us:7.1f} us/frame")
+    print(f"  zone classify:    {zone_us:7.1f} us/frame")
+    print(f"  direction labels: {direction_us:7.1f} us/frame")
+    counts = Counter(classifier.classify(positions, vectors))
+    print("  zones: " + ", ".join(f"{name} {n}" for name, n in counts.most_common()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Linear Head Pose Benchmark
+==========================
+Compares the closed-form LinearHeadPose fast path with the solvePnP
+HeadPoseSolver on the same pose landmarks: per-face time at several batch
+sizes, angle agreement, and how often the head-tilt decision differs.
+
+Landmarks come from a recording made with
+`python3 fatigue_detector.py --record-pose pose.npz` or, without one, from
+synthetic upright head motion projected through a typical OAK camera.
+
+Usage:
+    python3 benchmarks/bench_head_pose_fast.py
+    python3 benchmarks/bench_head_pose_fast.py --recording pose.npz --solver iterative
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.face_landmarks import (  # noqa: E402
+    POSE_MODEL_POINTS,
+    HeadPoseSolver,
+    LinearHeadPose,
+    get_head_angles,
+)
+
+SHAPE = (768, 1024)
+CAMERA_MATRIX = np.array(
+    [[820.0, 0, 509.0], [0, 820.0, 391.0], [0, 0, 1]], dtype=np.float64
+)
+FRONTAL = np.diag([1.0, -1.0, -1.0])
+
+
+def synthetic_points(rng, faces: int, noise: float) -> np.ndarray:
+    """(faces, 6, 2) landmarks for random upright poses at classroom distances."""
+    points = np.empty((faces, 6, 2))
+    for i in range(faces):
+        rvec = np.radians(rng.uniform(-30, 30, size=3))
+        tvec = np.array([rng.uniform(-40, 40), rng.uniform(-20, 20), rng.uniform(80, 300)])
+        rotation = cv2.Rodrigues(rvec)[0] @ FRONTAL
+        projected, _ = cv2.projectPoints(
+            POSE_MODEL_POINTS, cv2.Rodrigues(rotation)[0], tvec, CAMERA_MATRIX, None
+        )
+        points[i] = projected.reshape(-1, 2) + rng.normal(0, noise, size=(6, 2))
+    return points
+
+
+def time_batches(estimator, points: np.ndarray, batch: int) -> float:
+    """Per-face microseconds estimating `points` in chunks of `batch` faces."""
+    estimator.estimate_batch(points[:batch])  # Warm-up
+    start = time.perf_counter()
+    for i in range(0, len(points), batch):
+        estimator.estimate_batch(points[i:i + batch])
+    return (time.perf_counter() - start) / len(points) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark linear head pose")
+    parser.add_argument("--recording", type=str, default=None,
+                        help=".npz saved by fatigue_detector.py --record-pose")
+    parser.add_argument("--solver", choices=sorted(HeadPoseSolver.METHODS),
+                        default="sqpnp", help="solvePnP reference (default: sqpnp)")
+    parser.add_argument("--faces", type=int, default=2000,
+                        help="Synthetic faces when no recording is given")
+    parser.add_argument("--noise", type=float, default=0.5,
+                        help="Synthetic landmark noise in pixels (default: 0.5)")
+    parser.add_argument("--pitch-threshold", type=float, default=20)
+    args = parser.parse_args()
+
+    if args.recording:
+        data = np.load(args.recording)
+        points = np.ascontiguousarray(data["pose_points"], dtype=np.float64)
+        shape = tuple(int(v) for v in data["shape"])
+        reference = HeadPoseSolver.from_frame_size(shape, method=args.solver)
+        linear = LinearHeadPose.from_frame_size(shape)
+        source = f"{args.recording} ({shape[1]}x{shape[0]})"
+    else:
+        points = synthetic_points(np.random.default_rng(0), args.faces, args.noise)
+        reference = HeadPoseSolver(CAMERA_MATRIX, method=args.solver)
+        linear = LinearHeadPose(CAMERA_MATRIX)
+        source = "synthetic"
+
+    print(f"Head pose on {len(points)} faces from {source}")
+    for batch in (1, 4, 16):
+        pnp_us = time_batches(reference, points, batch)
+        linear_us = time_batches(linear, points, batch)
+        print(f"  batch {batch:>2}:  {args.solver} {pnp_us:7.1f} us/face   "
+              f"linear {linear_us:6.2f} us/face   ({pnp_us / linear_us:5.1f}x)")
+
+    pnp_angles = np.stack(get_head_angles(reference.estimate_batch(points)), axis=1)
+    linear_angles = np.stack(get_head_angles(linear.estimate_batch(points)), axis=1)
+    valid = ~np.isnan(pnp_angles).any(axis=1)
+    diff = np.abs(linear_angles[valid] - pnp_angles[valid])
+
+    print(f"Agreement with {args.solver} (degrees, pitch/yaw/roll)")
+    print(f"  mean {diff.mean(axis=0).round(2)}   "
+          f"p95 {np.percentile(diff, 95, axis=0).round(2)}")
+    tilted_pnp = pnp_angles[valid, 0] < -args.pitch_threshold
+    tilted_linear = linear_angles[valid, 0] < -args.pitch_threshold
+    print(f"  head-tilt decision agrees on "
+          f"{np.mean(tilted_pnp == tilted_linear):.1%} of faces "
+          f"({tilted_pnp.sum()} tilted by {args.solver})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Host Message Allocation Benchmark
+=================================
+Measures per-frame cost and garbage-collector pressure of the message
+building done by the host nodes, comparing a fresh allocation per message
+(the old behavior) with the pooled path they use now:
+
+- face crops: three ImageManipConfigs per face (LandmarksProcessing)
+- OCR crops: a skip config plus one per text region (CropConfigsCreator)
+- head pose: the [1, 3] float16 tensor sent per face (ConcatenateHeadPose)
+
+Run on the target (e.g. the Pi) with DepthAI installed; no device needed.
+
+Usage:
+    python3 benchmarks/bench_host_messages.py
+    python3 benchmarks/bench_host_messages.py --faces 30 --frames 2000
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import depthai as dai
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.message_pool import MessagePool  # noqa: E402
+
+TARGET_SIZE = (60, 60)
+
+
+def crop_rects(count: int):
+    rects = []
+    for i in range(count):
+        center = dai.Point2f(40.0 + 20 * (i % 25), 40.0 + 30 * (i // 25))
+        rects.append(dai.RotatedRect(center, dai.Size2f(24.0, 24.0), 0))
+    return rects
+
+
+def fresh_face_crops(rects, pool, keys):
+    for _ in range(3):
+        group = dai.MessageGroup()
+        for i, rect in enumerate(rects):
+            cfg = dai.ImageManipConfig()
+            cfg.addCropRotatedRect(rect, normalizedCoords=False)
+            cfg.setOutputSize(*TARGET_SIZE)
+            cfg.setReusePreviousImage(False)
+            group[str(i + 100)] = cfg
+
+
+def pooled_face_crops(rects, pools, keys):
+    for pool in pools:
+        pool.next_frame()
+        group = dai.MessageGroup()
+        for i, rect in enumerate(rects):
+            cfg = pool.get(i)
+            cfg.clearOps()
+            cfg.addCropRotatedRect(rect, normalizedCoords=False)
+            cfg.setOutputSize(*TARGET_SIZE)
+            cfg.setReusePreviousImage(False)
+            group[keys[i]] = cfg
+
+
+def fresh_ocr_crops(rects, pool, keys):
+    cfg = dai.ImageManipConfig()
+    cfg.setSkipCurrentImage(True)
+    for _ in rects:
+        cfg = dai.ImageManipConfig()
+        cfg.addCrop(10, 10, 120, 30)
+        cfg.setOutputSize(*TARGET_SIZE, dai.ImageManipConfig.ResizeMode.STRETCH)
+        cfg.setReusePreviousImage(True)
+
+
+def pooled_ocr_crops(rects, pools, keys):
+    pool = pools[0]
+    pool.next_frame()
+    cfg = pool.get(0)
+    cfg.clearOps()
+    cfg.setSkipCurrentImage(True)
+    for i in range(len(rects)):
+        cfg = pool.get(i + 1)
+        cfg.clearOps()
+        cfg.setSkipCurrentImage(False)
+        cfg.addCrop(10, 10, 120, 30)
+        cfg.setOutputSize(*TARGET_SIZE, dai.ImageManipConfig.ResizeMode.STRETCH)
+        cfg.setReusePreviousImage(True)
+
+
+def fresh_head_pose(rects, buffer, keys):
+    for i in range(len(rects)):
+        output = np.array([[0.1 * i, -0.2, 0.3]], dtype=np.float16)
+        msg = dai.NNData()
+        msg.addTensor("head_pose_angles_yaw_pitch_roll", output)
+
+
+def pooled_head_pose(rects, buffer, keys):
+    angles = buffer[0]
+    for i in range(len(rects)):
+        angles[0] = 0.1 * i
+        angles[1] = -0.2
+        angles[2] = 0.3
+        msg = dai.NNData()
+        msg.addTensor("head_pose_angles_yaw_pitch_roll", buffer)
+
+
+def measure(fn, state, rects, keys, frames: int):
+    """Return (us/frame, allocated KiB/frame, gen0 collections/1000 frames)."""
+    fn(rects, state, keys)  # Warm up (fills pools)
+
+    collections = [0]
+
+    def on_gc(phase, info):
+        if phase == "start":
+            collections[0] += 1
+
+    gc.callbacks.append(on_gc)
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn(rects, state, keys)
+    elapsed = time.perf_counter() - start
+    gc.callbacks.remove(on_gc)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    sample = min(frames, 200)
+    for _ in range(sample):
+        fn(rects, state, keys)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(
+        stat.size_diff for stat in after.compare_to(before, "filename") if stat.size_diff > 0
+    )
+
+    return (elapsed / frames * 1e6, allocated / sample / 1024,
+            collections[0] / frames * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark host message allocation")
+    parser.add_argument("--faces", type=int, default=18,
+                        help="Faces (or text regions) per frame (default: 18)")
+    parser.add_argument("--frames", type=int, default=1000)
+    args = parser.parse_args()
+
+    rects = crop_rects(args.faces)
+    keys = [str(i + 100) for i in range(args.faces)]
+    cases = [
+        ("face crops", fresh_face_crops, pooled_face_crops,
+         [MessagePool(dai.ImageManipConfig) for _ in range(3)]),
+        ("ocr crops", fresh_ocr_crops, pooled_ocr_crops,
+         [MessagePool(dai.ImageManipConfig)]),
+        ("head pose", fresh_head_pose, pooled_head_pose,
+         np.zeros((1, 3), dtype=np.float16)),
+    ]
+
+    print(f"Host message building, {args.faces} per frame, {args.frames} frames")
+    print(f"  {'':12} {'':7} {'us/frame':>9} {'KiB/frame':>10} {'gc/1k frames':>13}")
+    for name, fresh, pooled, state in cases:
+        for label, fn in (("fresh", fresh), ("pooled", pooled)):
+            us, kib, collections = measure(fn, state, rects, keys, args.frames)
+            print(f"  {name:12} {label:7} {us:9.1f} {kib:10.2f} {collections:13.1f}")
+
+
+if __name__ == "__main__":
+    main()
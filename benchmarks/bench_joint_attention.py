@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Joint Attention Benchmark
+=========================
+Checks that the joint attention score separates a class looking at one
+spot from one looking around, that per-frame cost grows linearly with
+class size (voxel hashing instead of pairwise ray tests), and that it stays
+flat as FPS x window grows (running counts instead of a window rebuild).
+
+Usage:
+    python3 benchmarks/bench_joint_attention.py
+    python3 benchmarks/bench_joint_attention.py --noise 0.05 --cell-size 0.5
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.joint_attention import JointAttention  # noqa: E402
+
+TARGET = np.array([0.5, 0.8, 0.0])  # A spot on the board next to the camera
+
+
+def seated(rng, faces: int) -> np.ndarray:
+    return np.column_stack([
+        rng.uniform(-2.5, 2.5, faces), rng.uniform(-0.4, 0.3, faces),
+        rng.uniform(1.5, 6.0, faces),
+    ])
+
+
+def looking_at(positions: np.ndarray, target: np.ndarray, rng, noise: float):
+    """Gaze vectors (model convention, z towards the camera) at a target."""
+    directions = target - positions
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    directions += rng.normal(0, noise, directions.shape)
+    directions[:, 2] *= -1
+    return directions
+
+
+def run(scenario, positions, rng, args, fps=None, window=2.0):
+    fps = fps or args.fps
+    attention = JointAttention(window=window, cell_size=args.cell_size)
+    ids = list(range(len(positions)))
+    frames = int(args.seconds * fps)
+    scores = []
+    start = time.perf_counter()
+    for frame in range(frames):
+        score = attention.update(frame / fps, ids, positions, scenario(rng))
+        scores.append(score)
+    elapsed = time.perf_counter() - start
+    return float(np.mean(scores[frames // 2:])), elapsed / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark joint attention")
+    parser.add_argument("--faces", type=int, default=18)
+    parser.add_argument("--fps", type=float, default=15)
+    parser.add_argument("--seconds", type=float, default=6)
+    parser.add_argument("--noise", type=float, default=0.03,
+                        help="Gaze direction noise per frame (default: 0.03)")
+    parser.add_argument("--cell-size", type=float, default=0.75)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    positions = seated(rng, args.faces)
+    half = args.faces // 2
+    wandering = rng.normal(0, 1, (args.faces, 3))  # Each face holds its own gaze
+
+    scenarios = {
+        "all on one spot": lambda r: looking_at(positions, TARGET, r, args.noise),
+        "half on one spot": lambda r: np.vstack([
+            looking_at(positions[:half], TARGET, r, args.noise),
+            wandering[half:] + r.normal(0, args.noise, (args.faces - half, 3)),
+        ]),
+        "each their own": lambda r: wandering + r.normal(0, args.noise, wandering.shape),
+        "random every frame": lambda r: r.normal(0, 1, (args.faces, 3)),
+    }
+    print(f"Joint attention, {args.faces} faces, {args.cell_size} m cells, "
+          f"noise {args.noise}")
+    for name, scenario in scenarios.items():
+        score, ms = run(scenario, positions, rng, args)
+        print(f"  {name:20} score {score:4.2f}   {ms:5.2f} ms/frame")
+
+    print("Scaling (all on one spot):")
+    for faces in (10, 20, 40, 80):
+        class_positions = seated(rng, faces)
+        _, ms = run(lambda r: looking_at(class_positions, TARGET, r, args.noise),
+                    class_positions, rng, args)
+        print(f"  {faces:3} faces: {ms:5.2f} ms/frame")
+
+    print("Window scaling (all on one spot):")
+    for fps, window in ((15, 2.0), (30, 2.0), (30, 5.0)):
+        _, ms = run(lambda r: looking_at(positions, TARGET, r, args.noise),
+                    positions, rng, args, fps=fps, window=window)
+        print(f"  {fps:3} FPS, {window:3.0f} s window "
+              f"({int(fps * window):3} frames): {ms:5.2f} ms/frame")
+
+
+if __name__ == "__main__":
+    main()
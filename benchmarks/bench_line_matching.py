@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Line Matching Benchmark
+=======================
+Compares greedy edit detection (each new line takes its best old line, the
+previous detect_text_changes loop) with the optimal one-to-one matching in
+utils/line_matching.py on boards with many similar lines: per-call time,
+edits paired with the right old line, and old lines claimed twice.
+
+Each trial takes a board, edits some lines with OCR-like noise, adds
+near-duplicates of existing lines and erases others, so the ground-truth
+mapping is known.
+
+Usage:
+    python3 benchmarks/bench_line_matching.py
+    python3 benchmarks/bench_line_matching.py --sizes 20,100,200 --trials 50
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_ocr_consensus import WORDS, noisy  # noqa: E402
+from utils import line_matching  # noqa: E402
+from utils.line_matching import match_lines  # noqa: E402
+from utils.text_similarity import best_match, clear_caches  # noqa: E402
+
+THRESHOLD = 0.6
+
+
+def greedy(current, previous):
+    """The old loop: each non-identical line takes its best previous line."""
+    edited = []
+    for i, line in enumerate(current):
+        if line in previous:
+            continue
+        match, _ = best_match(line, previous, THRESHOLD)
+        if match:
+            edited.append((previous.index(match), i))
+    return edited
+
+
+def trial(rng: random.Random, size: int):
+    """(previous, current, true edits as (previous index, current index))."""
+    previous = []
+    while len(previous) < size:
+        # Similar lines: numbered items sharing most words
+        stem = " ".join(rng.choice(WORDS) for _ in range(3))
+        previous.extend(f"{k}. {stem}" for k in range(1, rng.randint(2, 5)))
+    previous = previous[:size]
+
+    current, truth = [], []
+    for j, line in enumerate(previous):
+        roll = rng.random()
+        if roll < 0.1:
+            continue  # Erased
+        if roll < 0.3:
+            edited = noisy(line, rng)
+            if edited != line:
+                truth.append((j, len(current)))
+            current.append(edited)
+        else:
+            current.append(line)
+        if rng.random() < 0.05:
+            current.append(f"{rng.randint(10, 99)}. {rng.choice(WORDS)} {rng.choice(WORDS)}")
+    return previous, current, truth
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR line matching")
+    parser.add_argument("--sizes", type=str, default="10,50,100,200")
+    parser.add_argument("--trials", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"Line matching, {args.trials} trials per size "
+          f"(scipy: {line_matching.SCIPY_AVAILABLE})")
+    print(f"  {'lines':>5} {'greedy ms':>10} {'optimal ms':>11} "
+          f"{'greedy right':>13} {'optimal right':>14} {'double claims':>14}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        rng = random.Random(size)
+        trials = [trial(rng, size) for _ in range(args.trials)]
+        results = {}
+        for name, fn in (("greedy", greedy),
+                         ("optimal", lambda c, p: match_lines(c, p, THRESHOLD)[1])):
+            clear_caches()
+            start = time.perf_counter()
+            edits = [fn(current, previous) for previous, current, _ in trials]
+            ms = (time.perf_counter() - start) / len(trials) * 1000
+            right = sum(len(set(found) & set(truth))
+                        for found, (_, _, truth) in zip(edits, trials))
+            claims = sum(len(found) - len({j for j, _ in found}) for found in edits)
+            results[name] = (ms, right, claims)
+        total = sum(len(truth) for _, _, truth in trials)
+        print(f"  {size:5} {results['greedy'][0]:10.2f} {results['optimal'][0]:11.2f} "
+              f"{results['greedy'][1] / total:13.1%} {results['optimal'][1] / total:14.1%} "
+              f"{results['greedy'][2]:>7} -> {results['optimal'][2]}")
+
+
+if __name__ == "__main__":
+    main()
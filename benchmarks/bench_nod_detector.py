@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Nod Detector Benchmark
+======================
+Feeds synthetic pitch streams (nodding, still, slow head turn, fast
+jitter) through NodDetector at RVC2 and RVC4 frame rates, reporting the
+per-sample cost and the fraction of the second half of each stream that is
+flagged as nodding.
+
+Usage:
+    python3 benchmarks/bench_nod_detector.py
+    python3 benchmarks/bench_nod_detector.py --seconds 120 --noise 2
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.fatigue_metrics import NodDetector  # noqa: E402
+
+SIGNALS = {
+    "nodding 0.5 Hz": lambda t: -10 + 8 * np.sin(2 * np.pi * 0.5 * t),
+    "nodding 0.3 Hz": lambda t: -15 + 6 * np.sin(2 * np.pi * 0.3 * t),
+    "still": lambda t: -5.0 + 0 * t,
+    "slow head turn": lambda t: -30 * np.minimum(1, t / 20),
+    "fast jitter 2 Hz": lambda t: 3 * np.sin(2 * np.pi * 2 * t),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark head-nod detection")
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--noise", type=float, default=1.0,
+                        help="Pitch noise in degrees (default: 1.0)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for fps in (5, 30):
+        times = np.arange(0, args.seconds, 1 / fps)
+        print(f"{fps} FPS, {args.seconds:.0f}s per stream")
+        for name, signal in SIGNALS.items():
+            pitch = (signal(times) + rng.normal(0, args.noise, len(times))).tolist()
+            detector = NodDetector()
+            flags = []
+            start = time.perf_counter()
+            for t, p in zip(times.tolist(), pitch):
+                flags.append(detector.update(t, p))
+            us = (time.perf_counter() - start) / len(times) * 1e6
+            print(f"  {name:<18} {us:6.1f} us/sample   "
+                  f"flagged {np.mean(flags[len(flags) // 2:]):6.1%}")
+
+
+if __name__ == "__main__":
+    main()
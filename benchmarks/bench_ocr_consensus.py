@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+OCR Consensus Benchmark
+=======================
+Per-reading cost of the incremental ConfidenceAggregator versus rebuilding
+every cluster from the whole buffer (the previous algorithm), at several
+buffer sizes, plus how often both agree on the top consensus lines.
+
+Readings are synthetic: a board of lines re-read each frame with OCR-like
+character drops, substitutions and merged words, and occasional edits.
+
+Usage:
+    python3 benchmarks/bench_ocr_consensus.py
+    python3 benchmarks/bench_ocr_consensus.py --lines 12 --readings 400
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.ocr_consensus import ConfidenceAggregator, rebuild_consensus  # noqa: E402
+
+WORDS = ("CREATE MAGIC HOMEWORK DUE FRIDAY CHAPTER QUIZ PROJECT TEAM DEMO "
+         "LAB REPORT SENSOR CAMERA PYTHON OAK DEPTH MODEL READ PAGES").split()
+CONFUSIONS = {"C": "G", "G": "C", "O": "0", "I": "1", "S": "5", "B": "8", "E": "F"}
+
+
+def noisy(line: str, rng: random.Random) -> str:
+    chars = []
+    for ch in line:
+        roll = rng.random()
+        if roll < 0.04:
+            continue
+        if roll < 0.10:
+            ch = CONFUSIONS.get(ch, ch)
+        elif ch == " " and roll < 0.15:
+            continue
+        chars.append(ch)
+    return "".join(chars)
+
+
+def readings(rng: random.Random, lines: int, count: int):
+    board = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4)))
+             for _ in range(lines)]
+    for _ in range(count):
+        if rng.random() < 0.02:  # Someone edits a line
+            board[rng.randrange(lines)] = " ".join(
+                rng.choice(WORDS) for _ in range(rng.randint(2, 4)))
+        seen = [noisy(line, rng) for line in board if rng.random() > 0.1]
+        yield seen, [round(rng.uniform(0.5, 0.99), 2) for _ in seen]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR consensus")
+    parser.add_argument("--lines", type=int, default=8, help="Lines on the board")
+    parser.add_argument("--readings", type=int, default=150)
+    parser.add_argument("--top", type=int, default=5,
+                        help="Consensus lines compared for agreement (default: 5)")
+    args = parser.parse_args()
+
+    print(f"OCR consensus, {args.lines} board lines, {args.readings} readings")
+    print(f"  {'buffer':>6} {'rebuild ms':>11} {'incremental ms':>15} {'speedup':>8} "
+          f"{'top agree':>10}")
+    for buffer_size in (10, 25, 50, 100, 200):
+        stream = list(readings(random.Random(0), args.lines, args.readings))
+
+        aggregator = ConfidenceAggregator(buffer_size=buffer_size)
+        incremental = []
+        start = time.perf_counter()
+        for lines, confidences in stream:
+            aggregator.add_reading(lines, confidences)
+            incremental.append(aggregator.consensus_text[:args.top])
+        incremental_ms = (time.perf_counter() - start) / len(stream) * 1000
+
+        window = []
+        rebuilt = []
+        start = time.perf_counter()
+        for lines, confidences in stream:
+            window.append({"text_lines": lines, "confidences": confidences})
+            window = window[-buffer_size:]
+            rebuilt.append([c["text"] for c in rebuild_consensus(window)][:args.top])
+        rebuild_ms = (time.perf_counter() - start) / len(stream) * 1000
+
+        agree = sum(
+            len(set(a) & set(b)) / max(len(b), 1) for a, b in zip(incremental, rebuilt)
+        ) / len(stream)
+        print(f"  {buffer_size:6} {rebuild_ms:11.2f} {incremental_ms:15.3f} "
+              f"{rebuild_ms / incremental_ms:7.0f}x {agree:10.0%}")
+
+
+if __name__ == "__main__":
+    main()
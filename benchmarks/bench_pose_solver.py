@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Head Pose Solver Benchmark
+==========================
+Compares the stateless get_pose_estimation path (approximate intrinsics,
+SOLVEPNP_ITERATIVE from scratch) with HeadPoseSolver variants on synthetic
+head-motion sequences projected through a known camera.
+
+Reports per-face solve time and pitch/yaw/roll error against ground truth,
+plus agreement with the legacy path.
+
+Usage:
+    python3 benchmarks/bench_pose_solver.py
+    python3 benchmarks/bench_pose_solver.py --tracks 20 --frames 300 --noise 1.0
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.face_landmarks import (  # noqa: E402
+    POSE_MODEL_POINTS,
+    HeadPoseSolver,
+    get_head_angles,
+    get_pose_estimation,
+)
+
+SHAPE = (768, 1024)
+# Plausible OAK RGB intrinsics at 1024x768 (focal length differs from width)
+TRUE_CAMERA_MATRIX = np.array(
+    [[820.0, 0, 509.0], [0, 820.0, 391.0], [0, 0, 1]], dtype=np.float64
+)
+
+
+# Model-to-camera rotation of a face looking straight at the camera
+FRONTAL = np.diag([1.0, -1.0, -1.0])
+
+
+def head_angles(rotation):
+    return tuple(float(a[0]) for a in get_head_angles(rotation[None]))
+
+
+def make_sequences(rng, tracks: int, frames: int, noise: float):
+    """Smooth head motion per track -> (image_points, true angles) per frame."""
+    sequences = []
+    for _ in range(tracks):
+        phase = rng.uniform(0, 2 * np.pi, size=3)
+        amplitude = np.radians(rng.uniform(5, 25, size=3))
+        tvec = np.array([rng.uniform(-20, 20), rng.uniform(-10, 10), rng.uniform(60, 120)])
+        seq = []
+        for f in range(frames):
+            rvec = amplitude * np.sin(phase + f * 0.05)
+            # Head motion around an upright face looking at the camera
+            rotation = cv2.Rodrigues(rvec)[0] @ FRONTAL
+            points, _ = cv2.projectPoints(
+                POSE_MODEL_POINTS, cv2.Rodrigues(rotation)[0], tvec,
+                TRUE_CAMERA_MATRIX, None
+            )
+            points = points.reshape(-1, 2) + rng.normal(0, noise, size=(6, 2))
+            seq.append((np.ascontiguousarray(points), head_angles(rotation)))
+        sequences.append(seq)
+    return sequences
+
+
+def angle_error(a, b):
+    diff = (np.asarray(a) - np.asarray(b) + 180) % 360 - 180
+    return np.abs(diff)
+
+
+def run(name, solve, sequences, reference=None):
+    errors = []
+    agreement = []
+    angles = []
+    start = time.perf_counter()
+    for f in range(len(sequences[0])):
+        for track_id, seq in enumerate(sequences):
+            points, _ = seq[f]
+            success, rvec = solve(points, track_id)
+            angles.append(
+                head_angles(cv2.Rodrigues(rvec)[0]) if success else (np.nan,) * 3
+            )
+    elapsed = time.perf_counter() - start
+
+    count = len(angles)
+    truths = [seq[f][1] for f in range(len(sequences[0])) for seq in sequences]
+    errors = angle_error(angles, truths)
+    if reference is not None:
+        agreement = angle_error(angles, reference)
+    print(f"  {name:<28} {elapsed / count * 1e6:8.1f} us/face   "
+          f"err p/y/r {np.nanmean(errors, axis=0).round(2)}"
+          + (f"   vs legacy {np.nanmean(agreement, axis=0).round(2)}"
+             if reference is not None else ""))
+    return angles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark head pose solvers")
+    parser.add_argument("--tracks", type=int, default=10)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.5,
+                        help="Landmark noise in pixels (default: 0.5)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    sequences = make_sequences(rng, args.tracks, args.frames, args.noise)
+
+    print(f"Head pose, {args.tracks} tracks x {args.frames} frames, "
+          f"noise {args.noise}px (errors in degrees)")
+
+    def legacy(points, _track_id):
+        success, rvec, _, _, _ = get_pose_estimation(SHAPE, points)
+        return success, rvec
+
+    reference = run("legacy (per call)", legacy, sequences)
+
+    for method in ("iterative", "sqpnp", "epnp"):
+        solver = HeadPoseSolver(TRUE_CAMERA_MATRIX, method=method)
+
+        def solve(points, track_id, solver=solver):
+            success, rvec, _ = solver.solve(points, track_id)
+            return success, rvec
+
+        label = f"{method} (intrinsics)" + (" warm" if method == "iterative" else "")
+        run(label, solve, sequences, reference)
+
+
+if __name__ == "__main__":
+    main()
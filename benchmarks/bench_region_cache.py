@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Recognition Region Cache Benchmark
+==================================
+Simulates the CropConfigsCreator -> recognition NN -> main loop path on a
+mostly static whiteboard and reports how many recognition crops the
+RegionCache saves, what planning costs per frame, and how stale the merged
+results get when someone edits the board.
+
+The board is rendered with OpenCV at detection-model size; each frame adds
+sensor noise, slight exposure drift and box jitter. Every few seconds a
+region's text is rewritten. Recognitions come back a couple of frames
+later (the GatherData wait), and a result counts as stale when it's the
+text of an edit that's already been overwritten.
+
+Usage:
+    python3 benchmarks/bench_region_cache.py
+    python3 benchmarks/bench_region_cache.py --regions 30 --frames 600
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_ocr_consensus import WORDS  # noqa: E402
+from utils.region_cache import RegionCache, region_fingerprints  # noqa: E402
+
+FRAME_SIZE = (576, 320)  # (width, height), like the detection model input
+FPS = 5
+LATENCY_FRAMES = 2  # Frames between sending crops and the gathered result
+
+
+def layout(regions: int):
+    """(x, baseline y, font scale) per region, in two columns, in pixels."""
+    w, h = FRAME_SIZE
+    rows = -(-regions // 2)
+    row_height = h / rows
+    scale = min(1.0, row_height / 36)
+    return [(int((k % 2) * w / 2 + 10), int((k // 2 + 0.8) * row_height), scale)
+            for k in range(regions)]
+
+
+def text_boxes(anchors, texts) -> np.ndarray:
+    """Normalized xyxy box tight around each text, like a detector's."""
+    w, h = FRAME_SIZE
+    boxes = []
+    for (x, y, scale), text in zip(anchors, texts):
+        (tw, th), base = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, 1)
+        boxes.append(((x - 2) / w, (y - th - 2) / h, (x + tw + 2) / w, (y + base + 2) / h))
+    return np.array(boxes)
+
+
+def render(anchors, texts, rng: np.random.Generator, exposure: float) -> np.ndarray:
+    w, h = FRAME_SIZE
+    frame = np.full((h, w), 225, np.uint8)
+    for (x, y, scale), text in zip(anchors, texts):
+        cv2.putText(frame, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, scale, 30, 1, cv2.LINE_AA)
+    noisy = frame * exposure + rng.normal(0, 3, frame.shape)
+    return np.clip(noisy, 0, 255).astype(np.uint8)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recognition region cache")
+    parser.add_argument("--regions", type=int, default=12)
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--edit-seconds", type=float, default=10.0,
+                        help="Average time between edits (default: 10)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    noise = np.random.default_rng(0)
+    anchors = layout(args.regions)
+    board = [" ".join(rng.choice(WORDS) for _ in range(2)) for _ in anchors]
+
+    print(f"{args.regions} regions, {args.frames} frames at {FPS} FPS, "
+          f"an edit every ~{args.edit_seconds:.0f} s")
+    print(f"  {'mode':<22} {'crops sent':>11} {'hit rate':>9} {'plan ms':>8} {'stale':>7}")
+    for mode in ("no cache", "geometry only", "geometry + fingerprint"):
+        texts = list(board)
+        edits = random.Random(1)
+        cache = RegionCache() if mode != "no cache" else None
+        in_flight = deque()  # (sequence, sent regions, recognized texts)
+        sent = merged = stale = 0
+        plan_seconds = 0.0
+        for frame_index in range(args.frames):
+            if edits.random() < 1 / (args.edit_seconds * FPS):
+                texts[edits.randrange(len(texts))] = " ".join(
+                    edits.choice(WORDS) for _ in range(2))
+            boxes = text_boxes(anchors, texts)
+            jitter = boxes + noise.uniform(-0.002, 0.002, boxes.shape)
+            regions = list(range(len(boxes)))  # Region index stands in for the detection
+
+            fingerprints = None
+            if mode == "geometry + fingerprint":
+                frame = render(anchors, texts, noise, 1 + 0.05 * np.sin(frame_index / 50))
+            start = time.perf_counter()
+            if cache is None:
+                send = np.ones(len(regions), dtype=bool)
+            else:
+                if mode == "geometry + fingerprint":
+                    fingerprints = region_fingerprints(frame, jitter)
+                send = cache.plan(frame_index, frame_index / FPS, regions, jitter, fingerprints)
+            plan_seconds += time.perf_counter() - start
+
+            sent += int(send.sum())
+            sent_regions = [r for r, needed in zip(regions, send) if needed]
+            # Recognition reads the text the crop showed when it was sent
+            in_flight.append((frame_index, sent_regions, [texts[r] for r in sent_regions]))
+            if len(in_flight) > LATENCY_FRAMES:
+                sequence, gathered, recognized = in_flight.popleft()
+                if cache is not None:
+                    gathered, recognized = cache.resolve(sequence, gathered, recognized)
+                merged += len(recognized)
+                stale += sum(text != texts[r] for r, text in zip(gathered, recognized))
+
+        total = args.frames * len(anchors)
+        hit_rate = f"{cache.hit_rate:.1%}" if cache else "-"
+        print(f"  {mode:<22} {sent / total:11.1%} {hit_rate:>9} "
+              f"{plan_seconds / args.frames * 1000:8.3f} {stale / max(merged, 1):7.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Spatial Consensus Benchmark
+===========================
+Compares text-only and spatial (box-keyed) ConfidenceAggregator modes on
+boards with many regions and repeated words, such as checklists and tables:
+per-reading time as the board grows, and how many board regions end up as
+their own consensus line.
+
+Each region sits at a fixed position on a grid and is re-read with OCR-like
+noise (see bench_ocr_consensus.py) and a few pixels of box jitter; a share
+of the regions repeat the same short words. Two edge cases follow: a wide
+line whose box shifts by more than a grid cell between readings, and
+readings without boxes mixed in; each should stay one consensus line.
+
+Usage:
+    python3 benchmarks/bench_spatial_consensus.py
+    python3 benchmarks/bench_spatial_consensus.py --sizes 20,100 --readings 100
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_ocr_consensus import WORDS, noisy  # noqa: E402
+from utils.ocr_consensus import ConfidenceAggregator  # noqa: E402
+from utils.text_similarity import clear_caches  # noqa: E402
+
+REPEATED = ("TODO", "DONE", "YES", "NO", "DUE FRIDAY")
+JITTER = 0.003  # Box jitter per reading (normalized coordinates)
+
+
+def board(rng: random.Random, size: int):
+    """(text, xyxy box) per region, laid out in a grid."""
+    columns = max(1, int(size ** 0.5 / 2))
+    rows = -(-size // columns)
+    width, height = 1.0 / columns, 1.0 / rows
+    regions = []
+    for k in range(size):
+        if rng.random() < 0.4:
+            text = rng.choice(REPEATED)
+        else:
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 3)))
+        x, y = (k % columns) * width, (k // columns) * height
+        regions.append((text, (x + 0.1 * width, y + 0.2 * height,
+                               x + 0.9 * width, y + 0.8 * height)))
+    return regions
+
+
+def readings(rng: random.Random, regions, count: int):
+    for _ in range(count):
+        seen = [(noisy(text, rng), [v + rng.uniform(-JITTER, JITTER) for v in box])
+                for text, box in regions if rng.random() > 0.1]
+        yield ([text for text, _ in seen], [round(rng.uniform(0.5, 0.99), 2) for _ in seen],
+               [box for _, box in seen])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark spatial OCR consensus")
+    parser.add_argument("--sizes", type=str, default="10,50,100,200",
+                        help="Regions on the board")
+    parser.add_argument("--readings", type=int, default=60)
+    parser.add_argument("--buffer", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"OCR consensus, buffer {args.buffer}, {args.readings} readings per board")
+    print(f"  {'regions':>7} {'text ms':>8} {'spatial ms':>11} {'speedup':>8} "
+          f"{'text lines':>11} {'spatial lines':>14}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        rng = random.Random(size)
+        stream = list(readings(rng, board(rng, size), args.readings))
+        results = {}
+        for spatial in (False, True):
+            clear_caches()
+            aggregator = ConfidenceAggregator(buffer_size=args.buffer, spatial=spatial)
+            start = time.perf_counter()
+            for lines, confidences, boxes in stream:
+                aggregator.add_reading(lines, confidences, boxes)
+            ms = (time.perf_counter() - start) / len(stream) * 1000
+            # Lines seen in at least half the buffer, i.e. stable regions
+            stable = sum(d["times_seen"] >= args.buffer // 2 for d in aggregator.details)
+            results[spatial] = (ms, stable)
+        (text_ms, text_lines), (spatial_ms, spatial_lines) = results[False], results[True]
+        print(f"  {size:7} {text_ms:8.2f} {spatial_ms:11.2f} {text_ms / spatial_ms:7.1f}x "
+              f"{text_lines:11} {spatial_lines:14}")
+
+    rng = random.Random(0)
+    line = "REVIEW CHAPTER FOUR BEFORE THE QUIZ"
+    shifting = ConfidenceAggregator(buffer_size=args.buffer, spatial=True)
+    for k in range(args.readings):
+        shift = 0.08 * (k % 3)  # Camera nudged: centroid moves over a grid cell
+        shifting.add_reading([noisy(line, rng)], [0.9], [(0.05 + shift, 0.40, 0.85 + shift, 0.46)])
+    mixed = ConfidenceAggregator(buffer_size=args.buffer, spatial=True)
+    for k in range(args.readings):
+        boxes = None if k % 4 == 0 else [(0.1, 0.2, 0.7, 0.26)]
+        mixed.add_reading([noisy(line, rng)], [0.9], boxes)
+    print(f"  wide line shifting 0.08 per reading: {len(shifting.details)} consensus line(s)")
+    print(f"  every 4th reading without boxes:     {len(mixed.details)} consensus line(s)")
+
+
+if __name__ == "__main__":
+    main()
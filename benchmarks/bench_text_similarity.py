@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Text Similarity Benchmark
+=========================
+Compares utils/text_similarity.py with the difflib.SequenceMatcher calls it
+replaced, on synthetic whiteboard OCR noise (dropped and confused
+characters, merged words, edited lines; see bench_ocr_consensus.py):
+
+- per-pair cost: SequenceMatcher vs the edit-distance ratio, cold and cached
+- threshold decisions at 0.6: how often both agree
+- edit detection: best match of each line against the previous reading,
+  as in whiteboard_reader_full.detect_text_changes
+
+Usage:
+    python3 benchmarks/bench_text_similarity.py
+    python3 benchmarks/bench_text_similarity.py --lines 15 --readings 300
+"""
+
+import argparse
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_ocr_consensus import readings  # noqa: E402
+from utils import text_similarity  # noqa: E402
+from utils.text_similarity import best_match, is_similar, similarity  # noqa: E402
+
+THRESHOLD = 0.6
+
+
+def sequence_matcher(a: str, b: str) -> float:
+    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+
+def old_best_match(line, candidates):
+    best, best_score = None, 0.0
+    for candidate in candidates:
+        score = sequence_matcher(line, candidate)
+        if score > best_score:
+            best, best_score = candidate, score
+    return best if best_score > THRESHOLD else None
+
+
+def timed(fn, pairs) -> float:
+    start = time.perf_counter()
+    for a, b in pairs:
+        fn(a, b)
+    return (time.perf_counter() - start) / len(pairs) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text similarity")
+    parser.add_argument("--lines", type=int, default=10, help="Lines on the board")
+    parser.add_argument("--readings", type=int, default=200)
+    args = parser.parse_args()
+
+    stream = [lines for lines, _ in readings(random.Random(0), args.lines, args.readings)]
+    pairs = [(a, b) for previous, current in zip(stream, stream[1:])
+             for a in current for b in previous]
+    print(f"{len(pairs)} line pairs from {args.readings} noisy readings of "
+          f"{args.lines} lines (rapidfuzz: {text_similarity.RAPIDFUZZ_AVAILABLE})")
+
+    text_similarity.clear_caches()
+    cold = timed(similarity, pairs)
+    cached = timed(similarity, pairs)
+    text_similarity.clear_caches()
+    threshold_cold = timed(lambda a, b: is_similar(a, b, THRESHOLD), pairs)
+    print("Per pair (us):")
+    print(f"  SequenceMatcher.ratio      {timed(sequence_matcher, pairs):7.2f}")
+    print(f"  similarity, cold cache     {cold:7.2f}")
+    print(f"  similarity, cached         {cached:7.2f}")
+    print(f"  is_similar(0.6), cold      {threshold_cold:7.2f}")
+
+    agree = sum((sequence_matcher(a, b) >= THRESHOLD) == (similarity(a, b) >= THRESHOLD)
+                for a, b in pairs)
+    mean_diff = sum(similarity(a, b) - sequence_matcher(a, b) for a, b in pairs) / len(pairs)
+    print(f"Decisions at {THRESHOLD}: {agree / len(pairs):.2%} agree "
+          f"(score is {mean_diff:+.3f} higher on average: exact LCS vs difflib blocks)")
+
+    text_similarity.clear_caches()
+    start = time.perf_counter()
+    old = [[old_best_match(line, previous) for line in current]
+           for previous, current in zip(stream, stream[1:])]
+    old_ms = (time.perf_counter() - start) / (len(stream) - 1) * 1000
+    start = time.perf_counter()
+    new = [[best_match(line, previous, THRESHOLD)[0] for line in current]
+           for previous, current in zip(stream, stream[1:])]
+    new_ms = (time.perf_counter() - start) / (len(stream) - 1) * 1000
+    same = sum(a == b for old_lines, new_lines in zip(old, new)
+               for a, b in zip(old_lines, new_lines))
+    total = sum(len(lines) for lines in old)
+    print(f"Edit detection per reading: {old_ms:.2f} ms -> {new_ms:.2f} ms "
+          f"({old_ms / new_ms:.1f}x), same match for {same / total:.1%} of lines")
+    info = text_similarity.cache_info()["pairs"]
+    print(f"Pair cache: {info['hits']} hits, {info['misses']} misses, "
+          f"{info['currsize']}/{info['maxsize']} entries")
+
+
+if __name__ == "__main__":
+    main()
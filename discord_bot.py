@@ -14,6 +14,7 @@ Commands:
     !whiteboard-history  - Show recent whiteboard readings
     !whiteboard-screenshot - Get whiteboard camera image
     !whiteboard-consensus  - Show aggregated reading
+    !gaze-heatmap        - Where the class has been looking lately
     !set-confidence      - Set OCR confidence threshold
     !set-fps             - Set camera FPS
     !toggle-notifications - Toggle Discord notifications
@@ -51,6 +52,10 @@ WHITEBOARD_HISTORY_FILE = Path.home() / "oak-projects" / "whiteboard_history.jso
 WHITEBOARD_SCREENSHOT_FILE = Path.home() / "oak-projects" / "latest_whiteboard_frame.jpg"
 WHITEBOARD_CONFIG_FILE = Path.home() / "oak-projects" / "whiteboard_config.json"
 
+# Gaze integration
+GAZE_STATUS_FILE = Path.home() / "oak-projects" / "gaze_status.json"
+GAZE_HEATMAP_IMAGE_FILE = Path.home() / "oak-projects" / "gaze_heatmap.png"
+
 # Check token
 if not BOT_TOKEN:
     print("❌ Error: DISCORD_BOT_TOKEN not set in .env file")
@@ -397,6 +402,43 @@ async def whiteboard_screenshot(ctx):
         await ctx.send(f"❌ Error sending whiteboard screenshot: {str(e)}")
 
 
+# --- Gaze Commands ---
+
+@bot.command(name='gaze-heatmap', help='Show where the class has been looking')
+async def gaze_heatmap(ctx):
+    """Send the decayed gaze attention heatmap saved by gaze_detector.py."""
+    try:
+        if not GAZE_HEATMAP_IMAGE_FILE.exists():
+            await ctx.send("❌ No gaze heatmap available\n💡 Make sure gaze_detector.py is running")
+            return
+
+        file_age = datetime.now().timestamp() - GAZE_HEATMAP_IMAGE_FILE.stat().st_mtime
+        lines = ["👀 **Class Attention Heatmap** (board as seen by the class)"]
+
+        if GAZE_STATUS_FILE.exists():
+            status_data = json.loads(GAZE_STATUS_FILE.read_text())
+            heatmap = status_data.get('heatmap') or {}
+            half_life = heatmap.get('half_life_seconds')
+            if half_life:
+                lines.append(f"Recent gaze weighted most; older gaze fades by half "
+                             f"every {half_life / 60:.0f} min")
+            hotspot = heatmap.get('hotspot_m')
+            if hotspot:
+                # Camera x is mirrored for the class: +x is the class's left
+                side = "left" if hotspot[0] > 0 else "right"
+                height = "above" if hotspot[1] > 0 else "below"
+                lines.append(f"Hotspot: {abs(hotspot[0]):.1f} m to the {side} of the camera, "
+                             f"{abs(hotspot[1]):.1f} m {height} it (class view)")
+            if status_data.get('attention'):
+                lines.append(f"Right now: {status_data['attention']}")
+
+        lines.append(f"🕐 Saved {file_age:.0f}s ago")
+        await ctx.send("\n".join(lines), file=discord.File(str(GAZE_HEATMAP_IMAGE_FILE)))
+
+    except Exception as e:
+        await ctx.send(f"❌ Error sending gaze heatmap: {str(e)}")
+
+
 @bot.command(name='whiteboard-consensus', help='Show aggregated whiteboard reading')
 async def whiteboard_consensus(ctx):
     """Show aggregated consensus reading from recent whiteboard history."""
@@ -547,6 +589,9 @@ async def help_command(ctx):
 `!whiteboard-screenshot` - Get whiteboard camera image
 `!whiteboard-consensus` - Show aggregated reading
 
+**Gaze:**
+`!gaze-heatmap` - Where the class has been looking lately
+
 **Whiteboard Config:**
 `!set-confidence <0.0-1.0>` - Set OCR confidence threshold
 `!set-fps <1-30>` - Set camera FPS
@@ -601,6 +646,7 @@ if __name__ == '__main__':
     print("Commands: !ping, !status, !detect, !screenshot, !help")
     print("Whiteboard: !whiteboard, !whiteboard-status, !whiteboard-history,")
     print("           !whiteboard-screenshot, !whiteboard-consensus")
+    print("Gaze: !gaze-heatmap")
     print("Config: !set-confidence, !set-fps, !toggle-notifications")
     print("\nPress Ctrl+C to stop\n")
 
@@ -12,6 +12,7 @@ Run in a separate terminal alongside fatigue_detector.py:
 
 DM Commands (send these to the bot via Discord DM):
     status     - Get current fatigue status
+    history    - Fatigue summary over time (e.g. "history 60m", "history 2h")
     screenshot - Get latest camera frame
     pause      - Pause DM notifications
     resume     - Resume DM notifications
@@ -32,6 +33,8 @@ from datetime import datetime
 import discord
 from discord.ext import commands, tasks
 
+from utils.fatigue_history import parse_duration, query_history, sparkline
+
 # Load environment variables from ~/oak-projects/.env (per-user)
 try:
     from dotenv import load_dotenv
@@ -44,6 +47,7 @@ BOT_TOKEN = os.getenv('DISCORD_DM_BOT_TOKEN')
 USER_ID = os.getenv('DISCORD_USER_ID')
 STATUS_FILE = Path.home() / "oak-projects" / "fatigue_status.json"
 SCREENSHOT_FILE = Path.home() / "oak-projects" / "latest_fatigue_frame.jpg"
+HISTORY_DB = Path.home() / "oak-projects" / "fatigue_history.db"
 
 # State tracking for file watcher
 _last_status = {}
@@ -86,13 +90,53 @@ def format_status(status):
         icon = "🟢"
         state = "ALERT"
 
+    tracked = status.get('faces', [])
+    fatigued_faces = sum(1 for face in tracked if face.get('fatigue_detected'))
+
     lines = [
         f"{icon} **{state}**",
         f"Faces detected: {faces}",
+        f"Fatigued faces: {fatigued_faces} of {len(tracked)} tracked",
         f"Eyes: {'closed' if eyes else 'open'}",
         f"Head: {'tilted' if head else 'upright'}",
         f"Fatigue level: {pct:.0%}",
-        f"Last update: {ts}",
+    ]
+
+    # Eye metrics for the most fatigued tracked face
+    if tracked:
+        face = max(tracked, key=lambda f: f.get('fatigue_percent', 0))
+        lines += [
+            f"PERCLOS (60s): {face.get('perclos', 0):.0%}",
+            f"Blink rate: {face.get('blink_rate', 0):.0f}/min "
+            f"({face.get('blink_count', 0)} blinks, "
+            f"avg {face.get('mean_blink_duration', 0) * 1000:.0f} ms)",
+            f"Longest eye closure: {face.get('longest_closure', 0):.1f}s",
+            f"Nodding: {'yes' if face.get('nodding') else 'no'} "
+            f"({face.get('percent_nodding', 0):.0%} of recent frames)",
+            f"Yawns (5 min): {face.get('recent_yawns', 0)} "
+            f"({face.get('yawn_count', 0)} total"
+            + (", yawning now)" if face.get('yawning') else ")"),
+        ]
+
+    lines.append(f"Last update: {ts}")
+    return "\n".join(lines)
+
+
+def format_history(minutes):
+    """Format a fatigue history summary with a sparkline."""
+    history = query_history(HISTORY_DB, minutes)
+    if history is None:
+        return "No fatigue history yet. Is fatigue_detector.py running?"
+    if not history['active_minutes']:
+        return f"No fatigue data in the last {minutes} min."
+
+    lines = [
+        f"**Fatigue history — last {minutes} min**",
+        f"`{sparkline(history['series'])}`",
+        f"Monitored: {history['active_minutes']} min",
+        f"Time fatigued: {history['fatigued_fraction']:.0%}",
+        f"Avg / peak fatigue level: {history['avg_fatigue']:.0%} / {history['max_fatigue']:.0%}",
+        f"Avg / peak PERCLOS: {history['avg_perclos']:.0%} / {history['max_perclos']:.0%}",
     ]
     return "\n".join(lines)
 
@@ -195,6 +239,16 @@ def main():
             status = read_status()
             await message.channel.send(format_status(status))
 
+        elif cmd == "history" or cmd.startswith("history "):
+            arg = cmd[len("history"):].strip() or "60m"
+            minutes = parse_duration(arg)
+            if not minutes or minutes < 1:
+                await message.channel.send(
+                    f"Couldn't parse `{arg}`. Try `history 60m`, `history 2h` or `history 1d`."
+                )
+            else:
+                await message.channel.send(format_history(minutes))
+
         elif cmd == "screenshot":
             if SCREENSHOT_FILE.exists():
                 age = datetime.now().timestamp() - SCREENSHOT_FILE.stat().st_mtime
@@ -227,6 +281,7 @@ def main():
             help_text = (
                 "**Fatigue DM Bot Commands**\n"
                 "`status` — Current fatigue status\n"
+                "`history [60m|2h|1d]` — Fatigue over time\n"
                 "`screenshot` — Latest camera frame\n"
                 "`pause` — Pause notifications\n"
                 "`resume` — Resume notifications\n"
@@ -240,7 +295,7 @@ def main():
             )
 
     print("Starting DM bot...")
-    print(f"Commands: status, screenshot, pause, resume, help")
+    print(f"Commands: status, history, screenshot, pause, resume, help")
     print("Press Ctrl+C to stop\n")
 
     try:
@@ -3,7 +3,8 @@
 Student Fatigue Detector for OAK-D (DepthAI 3.x)
 =================================================
 Two-stage pipeline: YuNet face detection + MediaPipe face landmarks.
-Detects closed eyes and head tilting to monitor student alertness.
+Detects closed eyes, head tilting, nodding and yawning to monitor student
+alertness.
 Sends private notifications via Discord DMs (not to shared channels).
 
 Adapted from Luxonis oak-examples fatigue detection.
@@ -28,7 +29,11 @@ import json
 import cv2
 import numpy as np
 
-from utils.face_landmarks import determine_fatigue
+from utils.face_landmarks import HeadPoseSolver, LinearHeadPose, analyze_faces
+from utils.face_tracker import FaceTracker, detection_boxes
+from utils.fatigue_metrics import EarBaseline, EyeMetrics, NodDetector, YawnMetrics
+from utils.fatigue_history import FatigueHistory
+from utils.rolling_window import TimeWindow
 
 # Load environment variables from ~/oak-projects/.env (per-user)
 try:
@@ -47,7 +52,24 @@ parser.add_argument('--fps-limit', type=int, default=None,
 parser.add_argument('--pitch-threshold', type=int, default=20,
                     help='Head tilt angle threshold in degrees (default: 20)')
 parser.add_argument('--ear-threshold', type=float, default=0.15,
-                    help='Eye aspect ratio threshold (default: 0.15)')
+                    help='Eye aspect ratio threshold (default: 0.15), used until '
+                         'a per-face baseline is learned')
+parser.add_argument('--ear-fraction', type=float, default=0.5,
+                    help='Closed-eye threshold as a fraction of each face\'s '
+                         'open-eye EAR baseline (default: 0.5)')
+parser.add_argument('--mar-threshold', type=float, default=0.6,
+                    help='Mouth aspect ratio above which the mouth counts as '
+                         'wide open for yawn detection (default: 0.6)')
+parser.add_argument('--pose-solver',
+                    choices=sorted(HeadPoseSolver.METHODS) + [LinearHeadPose.method],
+                    default='sqpnp',
+                    help='Head pose method: solvePnP variant (default: sqpnp; '
+                         'iterative is warm-started per face) or the closed-form '
+                         'linear fast path')
+parser.add_argument('--record-pose', type=str, default=None,
+                    help='Save pose landmarks to this .npz on exit, the most '
+                         'recent hour at 5 FPS at most '
+                         '(for benchmarks/bench_head_pose_fast.py)')
 parser.add_argument('--device', type=str, default=None,
                     help='Optional DeviceID or IP of the camera')
 parser.add_argument('--display', action='store_true',
@@ -65,10 +87,15 @@ last_fatigue_status = None  # None = unknown, True = fatigued, False = alert
 last_eyes_closed = None
 last_head_tilted = None
 
-# Temporal smoothing (rolling windows like Luxonis example)
-closed_eye_history = deque(maxlen=30)
-head_tilted_history = deque(maxlen=30)
+# Temporal smoothing (rolling windows like Luxonis example), one per tracked face.
+# Windows are time-based (device clock) so they mean the same at any FPS.
+FATIGUE_WINDOW_SECONDS = 6.0  # Same span as the old 30 frames at 5 FPS
 FATIGUE_THRESHOLD = 0.75  # 75% of frames must show fatigue
+YAWN_WINDOW_SECONDS = 300.0  # Recent-yawn count span
+YAWNS_FOR_FATIGUE = 3  # Recent yawns that alone count as fully fatigued
+FACE_TRACK_MAX_AGE = 2.0  # Seconds before an unseen face's windows are dropped
+face_tracker = FaceTracker(max_age=FACE_TRACK_MAX_AGE)
+face_states = {}  # face ID -> FaceFatigueState
 
 # Debouncing for Discord notifications
 pending_state = None
@@ -80,12 +107,126 @@ STATUS_FILE = Path.home() / "oak-projects" / "fatigue_status.json"
 STATUS_UPDATE_INTERVAL = 10
 last_status_update_time = 0
 
+# --record-pose buffer: the most recent frames' pose landmarks
+RECORD_POSE_MAX_FRAMES = 18000  # An hour at 5 FPS
+
+# Per-minute fatigue history for DM bot "history" queries
+HISTORY_DB = Path.home() / "oak-projects" / "fatigue_history.db"
+fatigue_history = None
+
 # Screenshot for Discord bot
 SCREENSHOT_FILE = Path.home() / "oak-projects" / "latest_fatigue_frame.jpg"
 SCREENSHOT_UPDATE_INTERVAL = 5
 last_screenshot_time = 0
 
 
+class FaceFatigueState:
+    """Rolling fatigue windows for one tracked face."""
+
+    def __init__(self):
+        self.closed_eye_window = TimeWindow(FATIGUE_WINDOW_SECONDS)
+        self.head_tilted_window = TimeWindow(FATIGUE_WINDOW_SECONDS)
+        self.nodding_window = TimeWindow(FATIGUE_WINDOW_SECONDS)
+        self.eye_metrics = EyeMetrics()
+        self.ear_baseline = EarBaseline(args.ear_threshold, args.ear_fraction)
+        self.yawn_metrics = YawnMetrics(YAWN_WINDOW_SECONDS)
+        self.nod_detector = NodDetector()
+        self.eyes_closed = False
+        self.head_tilted = False
+
+    def add(self, timestamp: float, ear: float, mar: float, pitch: float,
+            head_tilted: bool) -> bool:
+        """Add one frame for this face and return whether the eyes are closed."""
+        ear_threshold = self.ear_baseline.threshold
+        self.ear_baseline.update(ear)
+        eyes_closed = ear < ear_threshold
+
+        self.eye_metrics.update(timestamp, ear, ear_threshold)
+        self.yawn_metrics.update(timestamp, mar, args.mar_threshold)
+        self.nodding_window.add(timestamp, self.nod_detector.update(timestamp, pitch))
+        self.eyes_closed = eyes_closed
+        self.head_tilted = head_tilted
+        self.closed_eye_window.add(timestamp, eyes_closed)
+        self.head_tilted_window.add(timestamp, head_tilted)
+        return eyes_closed
+
+    def expire(self, now: float):
+        """Drop samples older than the windows before device time `now`."""
+        self.closed_eye_window.expire(now)
+        self.head_tilted_window.expire(now)
+        self.nodding_window.expire(now)
+        self.eye_metrics.expire(now)
+        self.yawn_metrics.expire(now)
+
+    @property
+    def percent_eyes_closed(self) -> float:
+        return self.closed_eye_window.mean
+
+    @property
+    def percent_head_tilted(self) -> float:
+        return self.head_tilted_window.mean
+
+    @property
+    def percent_nodding(self) -> float:
+        return self.nodding_window.mean
+
+    @property
+    def yawn_level(self) -> float:
+        """Recent yawns as a 0-1 fatigue level (1.0 at YAWNS_FOR_FATIGUE)."""
+        return min(1.0, self.yawn_metrics.recent_yawns / YAWNS_FOR_FATIGUE)
+
+    @property
+    def fatigue_level(self) -> float:
+        return max(self.percent_eyes_closed, self.percent_head_tilted,
+                   self.percent_nodding, self.yawn_level)
+
+    def to_status(self, face_id: int) -> dict:
+        eyes_pct = self.percent_eyes_closed
+        head_pct = self.percent_head_tilted
+        fatigue_pct = self.fatigue_level
+        return {
+            "id": face_id,
+            "fatigue_detected": fatigue_pct >= FATIGUE_THRESHOLD,
+            "eyes_closed": self.eyes_closed,
+            "head_tilted": self.head_tilted,
+            "percent_eyes_closed": round(eyes_pct, 2),
+            "percent_head_tilted": round(head_pct, 2),
+            "percent_nodding": round(self.percent_nodding, 2),
+            "yawn_level": round(self.yawn_level, 2),
+            "fatigue_percent": round(fatigue_pct, 2),
+            "ear_baseline": round(self.ear_baseline.baseline, 3),
+            "ear_threshold": round(self.ear_baseline.threshold, 3),
+            **self.eye_metrics.to_status(),
+            **self.yawn_metrics.to_status(),
+            **self.nod_detector.to_status(),
+        }
+
+
+def summarize_faces(now: float = None):
+    """Per-face status list plus the most fatigued face's percentages.
+
+    Args:
+        now: Device time; each face's windows are expired to it first, so
+            faces not seen lately don't report stale values (None = as of
+            each face's last sample)
+
+    Returns:
+        Tuple of (faces, percent_eyes_closed, percent_head_tilted,
+        percent_nodding, yawn_level) where the values come from the face with
+        the highest fatigue level, so one drowsy student is not diluted by
+        alert neighbors.
+    """
+    if now is not None:
+        for state in face_states.values():
+            state.expire(now)
+    faces = [state.to_status(face_id) for face_id, state in face_states.items()]
+    if not faces:
+        return faces, 0.0, 0.0, 0.0, 0.0
+    worst = max(face_states.values(), key=lambda state: state.fatigue_level)
+    return (faces, worst.percent_eyes_closed, worst.percent_head_tilted,
+            worst.percent_nodding, worst.yawn_level)
+
+
 def log_event(message: str):
     """Print and optionally log an event."""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -97,9 +238,32 @@ def log_event(message: str):
         log_file.flush()
 
 
+def create_pose_solver(device, width: int, height: int):
+    """Head pose solver using the OAK's RGB intrinsics scaled to width x height."""
+    linear = args.pose_solver == LinearHeadPose.method
+    try:
+        calibration = device.readCalibration()
+        socket = dai.CameraBoardSocket.CAM_A
+        camera_matrix = np.array(
+            calibration.getCameraIntrinsics(socket, width, height)
+        )
+        dist_coeffs = np.array(calibration.getDistortionCoefficients(socket))
+        log_event(f"Head pose: {args.pose_solver} solver with device intrinsics")
+        if linear:
+            return LinearHeadPose(camera_matrix)
+        return HeadPoseSolver(camera_matrix, dist_coeffs, method=args.pose_solver)
+    except Exception as e:
+        log_event(f"WARNING: Could not read camera calibration ({e}), "
+                  "using approximate intrinsics")
+        if linear:
+            return LinearHeadPose.from_frame_size((height, width))
+        return HeadPoseSolver.from_frame_size((height, width), method=args.pose_solver)
+
+
 def update_status_file(faces_detected: int, fatigue_detected: bool,
                        eyes_closed: bool, head_tilted: bool,
-                       fatigue_percent: float, running: bool = True):
+                       fatigue_percent: float, running: bool = True,
+                       faces: list = None):
     """Update status file for Discord bot integration."""
     try:
         status_data = {
@@ -108,6 +272,7 @@ def update_status_file(faces_detected: int, fatigue_detected: bool,
             "eyes_closed": eyes_closed,
             "head_tilted": head_tilted,
             "fatigue_percent": round(fatigue_percent, 2),
+            "faces": faces or [],
             "timestamp": datetime.now().isoformat(),
             "running": running
         }
@@ -119,6 +284,7 @@ def update_status_file(faces_detected: int, fatigue_detected: bool,
 def run_detection():
     """Main fatigue detection loop using DepthAI 3.x two-stage pipeline."""
     global log_file, last_fatigue_status, last_eyes_closed, last_head_tilted
+    global fatigue_history
     global pending_state, pending_state_time
     global last_status_update_time, last_screenshot_time
 
@@ -130,7 +296,8 @@ def run_detection():
 
     startup_msg = "Fatigue detector started (DepthAI 3.x, YuNet + MediaPipe landmarks)"
     log_event(startup_msg)
-    log_event(f"EAR threshold: {args.ear_threshold}, Pitch threshold: {args.pitch_threshold}")
+    log_event(f"EAR threshold: {args.ear_threshold} (then {args.ear_fraction:.0%} of each face's "
+              f"baseline), Pitch threshold: {args.pitch_threshold}")
     log_event("Press Ctrl+C to exit (or 'q' in display window)\n")
 
     # Initialize status file
@@ -141,6 +308,18 @@ def run_detection():
     )
     last_status_update_time = time.time()
 
+    try:
+        fatigue_history = FatigueHistory(HISTORY_DB)
+    except Exception as e:
+        log_event(f"WARNING: Could not open history database: {e}")
+
+    # Device time of the newest frame and when it was handled (host
+    # monotonic), to expire windows between frames
+    last_device_time = None
+    last_frame_clock = 0.0
+    recorded_pose_points = deque(maxlen=RECORD_POSE_MAX_FRAMES)
+    recorded_shape = None  # (height, width) of the recorded landmark frames
+
     try:
         # Connect to device
         if args.device:
@@ -242,6 +421,9 @@ def run_detection():
             pipeline.start()
             log_event("Detection started. Monitoring for fatigue...\n")
 
+            # Created on the first message, once the landmark frame size is known
+            pose_solver = None
+
             while pipeline.isRunning():
                 # Get gathered data (synced detections + landmarks)
                 gather_msg = q_gather.tryGet()
@@ -257,40 +439,66 @@ def run_detection():
                     src_w, src_h = detections_msg.transformation.getSize()
 
                     faces_detected = len(detections_msg.detections)
-                    current_eyes_closed = False
-                    current_head_tilted = False
 
+                    # Keep detections and landmarks aligned
+                    detections = []
+                    faces = []
                     for detection, landmarks in zip(
                         detections_msg.detections, landmarks_list
                     ):
                         if isinstance(landmarks, Keypoints):
-                            head_tilted, eyes_closed = determine_fatigue(
-                                (src_h, src_w), landmarks,
-                                pitch_angle=args.pitch_threshold
-                            )
-
-                            closed_eye_history.append(eyes_closed)
-                            head_tilted_history.append(head_tilted)
-
-                            if eyes_closed:
-                                current_eyes_closed = True
-                            if head_tilted:
-                                current_head_tilted = True
-
-                    # Calculate fatigue percentages from rolling window
-                    percent_eyes_closed = (
-                        sum(closed_eye_history) / len(closed_eye_history)
-                        if closed_eye_history else 0.0
+                            detections.append(detection)
+                            faces.append(landmarks)
+
+                    # Stable face IDs for per-face windows and pose warm starts
+                    device_time = detections_msg.getTimestamp().total_seconds()
+                    last_device_time, last_frame_clock = device_time, time.monotonic()
+                    face_ids = face_tracker.update(
+                        detection_boxes(detections), device_time
                     )
-                    percent_head_tilted = (
-                        sum(head_tilted_history) / len(head_tilted_history)
-                        if head_tilted_history else 0.0
+                    if pose_solver is None:
+                        pose_solver = create_pose_solver(device, src_w, src_h)
+                    for face_id in face_tracker.evict(device_time):
+                        face_states.pop(face_id, None)
+                        pose_solver.forget(face_id)
+
+                    # Analyze all faces in one batched pass
+                    batch = analyze_faces(
+                        (src_h, src_w), faces, pose_solver, face_ids.tolist()
                     )
-                    fatigue_percent = max(percent_eyes_closed, percent_head_tilted)
+                    head_tilted = batch.pitch < -args.pitch_threshold
+                    if args.record_pose:
+                        recorded_pose_points.append(batch.pose_points)
+                        recorded_shape = (src_h, src_w)
+
+                    # Per-face windows; eyes-closed uses each face's own baseline
+                    eyes_closed = np.zeros(len(faces), dtype=bool)
+                    for i, (face_id, ear, mar, pitch, tilted) in enumerate(zip(
+                        face_ids.tolist(), batch.ear.tolist(), batch.mar.tolist(),
+                        batch.pitch.tolist(), head_tilted.tolist()
+                    )):
+                        state = face_states.setdefault(face_id, FaceFatigueState())
+                        eyes_closed[i] = state.add(device_time, ear, mar, pitch, tilted)
+
+                    current_eyes_closed = bool(eyes_closed.any())
+                    current_head_tilted = bool(head_tilted.any())
+
+                    # Fatigue percentages from the most fatigued face's windows
+                    (face_status, percent_eyes_closed, percent_head_tilted,
+                     percent_nodding, yawn_level) = summarize_faces(device_time)
+                    fatigue_percent = max(percent_eyes_closed, percent_head_tilted,
+                                          percent_nodding, yawn_level)
                     fatigue_detected = fatigue_percent >= FATIGUE_THRESHOLD
 
                     current_time = time.time()
 
+                    if fatigue_history is not None:
+                        fatigue_history.record(
+                            current_time, fatigue_percent, fatigue_detected,
+                            max((f["perclos"] for f in face_status), default=0.0),
+                            len(face_status),
+                        )
+
                     # Console status line (overwrite in place)
                     eyes_str = "CLOSED" if current_eyes_closed else "open"
                     head_str = "TILTED" if current_head_tilted else "up"
@@ -298,6 +506,8 @@ def run_detection():
                         f"\r  Faces: {faces_detected} | "
                         f"Eyes: {eyes_str} ({percent_eyes_closed:.0%}) | "
                         f"Head: {head_str} ({percent_head_tilted:.0%}) | "
+                        f"Nod: {percent_nodding:.0%} | "
+                        f"Yawns: {yawn_level:.0%} | "
                         f"Fatigue: {fatigue_percent:.0%}  ",
                         end="", flush=True
                     )
@@ -314,7 +524,7 @@ def run_detection():
                         update_status_file(
                             faces_detected, fatigue_detected,
                             current_eyes_closed, current_head_tilted,
-                            fatigue_percent
+                            fatigue_percent, faces=face_status
                         )
 
                     last_eyes_closed = current_eyes_closed
@@ -330,6 +540,10 @@ def run_detection():
                                         reasons.append("eyes closed")
                                     if percent_head_tilted >= FATIGUE_THRESHOLD:
                                         reasons.append("head tilted")
+                                    if percent_nodding >= FATIGUE_THRESHOLD:
+                                        reasons.append("nodding")
+                                    if yawn_level >= FATIGUE_THRESHOLD:
+                                        reasons.append("yawning")
                                     reason_str = " / ".join(reasons)
                                     log_event(f"\nFATIGUE DETECTED ({reason_str})")
                                 else:
@@ -342,7 +556,7 @@ def run_detection():
                                 update_status_file(
                                     faces_detected, fatigue_detected,
                                     current_eyes_closed, current_head_tilted,
-                                    fatigue_percent
+                                    fatigue_percent, faces=face_status
                                 )
                         else:
                             pending_state = fatigue_detected
@@ -357,11 +571,15 @@ def run_detection():
                     fatigue = last_fatigue_status if last_fatigue_status is not None else False
                     eyes = last_eyes_closed if last_eyes_closed is not None else False
                     head = last_head_tilted if last_head_tilted is not None else False
-                    pct = max(
-                        sum(closed_eye_history) / len(closed_eye_history) if closed_eye_history else 0.0,
-                        sum(head_tilted_history) / len(head_tilted_history) if head_tilted_history else 0.0,
+                    now = None
+                    if last_device_time is not None:
+                        # Device time now, so a gap in frames expires too
+                        now = last_device_time + time.monotonic() - last_frame_clock
+                    face_status, *levels = summarize_faces(now)
+                    update_status_file(
+                        len(face_status), fatigue, eyes, head,
+                        max(levels), faces=face_status
                     )
-                    update_status_file(0, fatigue, eyes, head, pct)
                     last_status_update_time = current_time
 
                 # Periodic screenshot save + live display
@@ -405,10 +623,19 @@ def run_detection():
         log_event(f"\n{shutdown_msg}")
 
     finally:
+        if args.record_pose and recorded_pose_points:
+            np.savez_compressed(
+                args.record_pose,
+                pose_points=np.concatenate(recorded_pose_points),
+                shape=np.array(recorded_shape),
+            )
+            log_event(f"Saved pose landmarks to {args.record_pose}")
         if args.display:
             cv2.destroyAllWindows()
         # Mark as not running in status file
         update_status_file(0, False, False, False, 0.0, running=False)
+        if fatigue_history is not None:
+            fatigue_history.close()
         if log_file:
             log_file.close()
 
@@ -3,7 +3,7 @@
 Gaze Direction Detector for OAK-D (DepthAI 3.x)
 =================================================
 Three-stage pipeline: YuNet face detection + head pose estimation
-+ gaze estimation ADAS. Detects where a person is looking.
++ gaze estimation ADAS. Detects where every face in view is looking.
 
 Adapted from Luxonis oak-examples gaze estimation.
 
@@ -11,9 +11,12 @@ Usage:
     python3 gaze_detector.py                    # Basic detection
     python3 gaze_detector.py --display          # Show live video with gaze vectors
     python3 gaze_detector.py --log              # Log to file
+    python3 gaze_detector.py --heatmap-plane -1.5,-0.3,1.5,1.2  # Board area
+    python3 gaze_detector.py --zones my_zones.json  # Custom gaze target zones
 """
 
 from pathlib import Path
+from collections import deque
 from datetime import datetime
 import depthai as dai
 from depthai_nodes.node import ParsingNeuralNetwork, GatherData
@@ -26,6 +29,22 @@ import numpy as np
 from utils.process_keypoints import LandmarksProcessing
 from utils.node_creators import create_crop_node
 from utils.host_concatenate_head_pose import ConcatenateHeadPose
+from utils.face_tracker import FaceTracker, detection_boxes
+from utils.gaze_analysis import (
+    GAZE_THRESHOLD,
+    attention_summary,
+    classify_gazes,
+    direction_counts,
+    face_positions,
+    gaze_vectors,
+    head_pose_angles,
+    project_gazes,
+)
+from utils.gaze_heatmap import GazeHeatmap
+from utils.gaze_zones import DEFAULT_ZONES, GazeZones, ZoneTimer
+from utils.joint_attention import JointAttention, MinuteHistory
+from utils.one_euro import OneEuroFilterBank
+from utils.sequence_join import SequenceJoin
 
 # Parse arguments
 parser = argparse.ArgumentParser(
@@ -37,6 +56,38 @@ parser.add_argument('--device', type=str, default=None,
                     help='Optional DeviceID or IP of the camera')
 parser.add_argument('--display', action='store_true',
                     help='Show live video window with gaze vectors (requires display)')
+parser.add_argument('--heatmap-plane', type=str, default='-2.0,-0.5,2.0,1.5',
+                    help='Board/screen area for the attention heatmap as '
+                         'x0,y0,x1,y1 meters on the camera wall, camera at 0,0, '
+                         'x to the image right, y up (default: -2.0,-0.5,2.0,1.5)')
+parser.add_argument('--heatmap-half-life', type=float, default=300.0,
+                    help='Seconds for old gaze in the heatmap to fade by half '
+                         '(default: 300)')
+parser.add_argument('--smoothing-min-cutoff', type=float, default=1.0,
+                    help='One-Euro cutoff (Hz) for steady gaze; lower removes '
+                         'more jitter (default: 1.0)')
+parser.add_argument('--smoothing-beta', type=float, default=3.0,
+                    help='One-Euro speed coefficient; higher follows fast '
+                         'glances with less lag (default: 3.0)')
+parser.add_argument('--no-smoothing', action='store_true',
+                    help='Classify raw gaze vectors without smoothing')
+parser.add_argument('--record-gaze', type=str, default=None,
+                    help='Save raw per-face gaze and head pose to this .npz on '
+                         'exit, the most recent hour at 15 FPS at most '
+                         '(for benchmarks/bench_gaze_smoothing.py)')
+parser.add_argument('--face-budget', type=int, default=0,
+                    help='Max faces to run head pose and gaze on per frame; '
+                         'the rest take turns across frames (default: 0 = all)')
+parser.add_argument('--max-defer-frames', type=int, default=10,
+                    help='Frames a face may be skipped under --face-budget '
+                         'before it must be updated (default: 10)')
+parser.add_argument('--zones', type=str, default=None,
+                    help='JSON file of gaze target zones (board, desk, door...); '
+                         'default: ~/oak-projects/gaze_zones.json, created with '
+                         'a board and desk zone if missing')
+parser.add_argument('--joint-attention-window', type=float, default=2.0,
+                    help='Seconds over which gaze rays must converge to count '
+                         'as joint attention (default: 2.0)')
 args = parser.parse_args()
 
 # Requested camera resolution
@@ -50,6 +101,48 @@ STATUS_FILE = Path.home() / "oak-projects" / "gaze_status.json"
 STATUS_UPDATE_INTERVAL = 2
 last_status_update_time = 0
 
+# Per-frame face limit; per-face queues on the host are sized from it
+MAX_FACES = 40
+GATHER_QUEUE_FRAMES = 4  # Gathered gaze results queued for the main loop
+
+# --record-gaze buffer: the most recent frames' raw gaze and head pose
+RECORD_GAZE_MAX_FRAMES = 54000  # An hour at 15 FPS
+
+# Per-face tracking: stable IDs and how long each face has held its direction
+FACE_TRACK_MAX_AGE = 2.0
+face_tracker = FaceTracker(max_age=FACE_TRACK_MAX_AGE)
+face_directions = {}  # face ID -> (direction, device time it started)
+face_status = {}  # face ID -> (last status dict, device time it was updated)
+
+# Per-face One-Euro smoothing of gaze x/y/z and head yaw/pitch/roll. Gaze
+# components are roughly radians, so head pose (degrees) gets beta per degree.
+signal_filter = OneEuroFilterBank(
+    6, args.smoothing_min_cutoff,
+    [args.smoothing_beta] * 3 + [np.radians(args.smoothing_beta)] * 3,
+)
+
+# Attention heatmap (decayed grid only, no frames or raw vectors are kept)
+HEATMAP_FILE = Path.home() / "oak-projects" / "gaze_heatmap.npz"
+HEATMAP_IMAGE_FILE = Path.home() / "oak-projects" / "gaze_heatmap.png"
+HEATMAP_SAVE_INTERVAL = 30
+last_heatmap_save_time = 0
+gaze_heatmap = GazeHeatmap(
+    [float(v) for v in args.heatmap_plane.split(',')],
+    half_life=args.heatmap_half_life,
+)
+
+# Gaze target zones, loaded once at startup (see utils/gaze_zones.py)
+ZONES_FILE = Path(args.zones) if args.zones else (
+    Path.home() / "oak-projects" / "gaze_zones.json"
+)
+gaze_zones = GazeZones()
+zone_timer = ZoneTimer(gaze_zones.names)
+
+# Joint attention: share of faces whose gaze converges on one region,
+# with a per-minute history for lecture feedback
+joint_attention = JointAttention(window=args.joint_attention_window)
+joint_attention_history = MinuteHistory()
+
 # Screenshot
 SCREENSHOT_FILE = Path.home() / "oak-projects" / "latest_gaze_frame.jpg"
 SCREENSHOT_UPDATE_INTERVAL = 5
@@ -78,37 +171,128 @@ def classify_gaze(gaze_x, gaze_y):
         Direction string like "center", "left", "right", "up", "down",
         or combinations like "up-left".
     """
-    threshold = 0.15
+    return classify_gazes(np.array([[gaze_x, gaze_y]]), GAZE_THRESHOLD)[0]
+
+
+def load_zones():
+    """Read the zone file, writing the defaults first if it doesn't exist.
 
-    h_dir = ""
-    v_dir = ""
+    Falls back to the default zones if the file is invalid.
+    """
+    if not ZONES_FILE.exists():
+        try:
+            ZONES_FILE.write_text(json.dumps(DEFAULT_ZONES, indent=2))
+            log_event(f"Created default gaze zones file: {ZONES_FILE}")
+        except OSError as e:
+            log_event(f"WARNING: Could not write default gaze zones: {e}")
+        return GazeZones(DEFAULT_ZONES)
+    try:
+        return GazeZones(json.loads(ZONES_FILE.read_text()))
+    except (json.JSONDecodeError, OSError, KeyError, TypeError, ValueError) as e:
+        log_event(f"WARNING: Could not load gaze zones, using defaults: {e}")
+        return GazeZones(DEFAULT_ZONES)
 
-    if gaze_x < -threshold:
-        h_dir = "left"
-    elif gaze_x > threshold:
-        h_dir = "right"
 
-    if gaze_y > threshold:
-        v_dir = "up"
-    elif gaze_y < -threshold:
-        v_dir = "down"
+def _angle(value):
+    return None if np.isnan(value) else round(value, 1)
 
-    if h_dir and v_dir:
-        return f"{v_dir}-{h_dir}"
-    elif h_dir:
-        return h_dir
-    elif v_dir:
-        return v_dir
-    else:
-        return "center"
+
+def track_faces(boxes, vectors, head_poses, timestamp, positions):
+    """Assign face IDs, smooth and classify every face, build the status.
+
+    Args:
+        boxes: (N, 4) face boxes aligned with vectors
+        vectors: (N, 3) raw gaze vectors
+        head_poses: (N, 3) raw head yaw/pitch/roll in degrees (NaN if unknown)
+        timestamp: Device timestamp in seconds
+        positions: (N, 3) face positions in room coordinates
+
+    Returns:
+        Tuple of (faces, directions, face_ids, vectors, head_poses) where
+        faces is the per-face status list and vectors/head_poses are smoothed
+    """
+    face_ids = face_tracker.update(boxes, timestamp)
+    for face_id in face_tracker.evict(timestamp):
+        face_directions.pop(face_id, None)
+        face_status.pop(face_id, None)
+        signal_filter.forget(face_id)
+        zone_timer.forget(face_id)
+
+    if not args.no_smoothing:
+        smoothed = signal_filter.filter(
+            face_ids.tolist(), timestamp, np.hstack([vectors, head_poses])
+        )
+        vectors, head_poses = smoothed[:, :3], smoothed[:, 3:]
+
+    directions = classify_gazes(vectors)
+    zones = gaze_zones.classify(positions, vectors)
+    zone_seconds = zone_timer.update(face_ids.tolist(), zones, timestamp)
+    faces = []
+    for face_id, direction, zone, in_zone, (x, y, z), (yaw, pitch, roll) in zip(
+        face_ids.tolist(), directions, zones, zone_seconds,
+        vectors.tolist(), head_poses.tolist(),
+    ):
+        previous = face_directions.get(face_id)
+        if previous is None or previous[0] != direction:
+            previous = face_directions[face_id] = (direction, timestamp)
+        face = {
+            "id": face_id,
+            "direction": direction,
+            "direction_seconds": round(timestamp - previous[1], 1),
+            "zone": zone,
+            "zone_seconds": round(in_zone, 1),
+            "gaze_x": round(x, 4),
+            "gaze_y": round(y, 4),
+            "gaze_z": round(z, 4),
+            "head_yaw": _angle(yaw),
+            "head_pitch": _angle(pitch),
+            "head_roll": _angle(roll),
+        }
+        faces.append(face)
+        face_status[face_id] = (face, timestamp)
+    return faces, directions, face_ids, vectors, head_poses
+
+
+def tracked_faces(timestamp):
+    """Status of every tracked face, including ones deferred by the face
+    budget this frame, with the seconds since each was last updated."""
+    return [
+        {**face, "updated_seconds_ago": round(timestamp - updated, 1)}
+        for face, updated in face_status.values()
+    ]
 
 
 def update_status_file(faces_detected, gaze_direction, gaze_x, gaze_y, gaze_z,
-                       head_yaw, head_pitch, head_roll, running=True):
-    """Update status file for external integration."""
+                       head_yaw, head_pitch, head_roll, running=True,
+                       faces=None, heatmap=None, face_budget=None):
+    """Update status file for external integration.
+
+    The top-level gaze fields describe the primary (largest) face; `faces`
+    carries every tracked face, and the aggregate counts are derived from it.
+    """
+    faces = faces or []
+    directions = [face["direction"] for face in faces]
     try:
         status_data = {
             "faces_detected": faces_detected,
+            "faces": faces,
+            "direction_counts": direction_counts(directions),
+            "looking_center": directions.count("center"),
+            "attention": attention_summary(directions),
+            "zone_counts": direction_counts([face["zone"] for face in faces]),
+            "zone_seconds_total": zone_timer.summary(),
+            "joint_attention": {
+                "score": (
+                    round(joint_attention.score, 3)
+                    if joint_attention.score is not None else None
+                ),
+                "faces": joint_attention.faces,
+                "focus_m": joint_attention.focus,
+                "window_seconds": joint_attention.window,
+                "history": joint_attention_history.to_list(),
+            },
+            "heatmap": heatmap,
+            "face_budget": face_budget,
             "gaze_direction": gaze_direction,
             "gaze_x": round(float(gaze_x), 4),
             "gaze_y": round(float(gaze_y), 4),
@@ -147,6 +331,7 @@ def draw_gaze_vector(frame, eye_x, eye_y, gaze_vector, src_w, src_h, color=(0, 2
 def run_detection():
     """Main gaze detection loop using DepthAI 3.x three-stage pipeline."""
     global log_file, last_status_update_time, last_screenshot_time
+    global last_heatmap_save_time, gaze_zones, zone_timer
 
     if args.log:
         log_filename = f"gaze_detection_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
@@ -156,11 +341,16 @@ def run_detection():
     log_event("Gaze detector started (DepthAI 3.x, YuNet + Head Pose + Gaze ADAS)")
     log_event("Press Ctrl+C to exit (or 'q' in display window)\n")
 
+    gaze_zones = load_zones()
+    zone_timer = ZoneTimer(gaze_zones.names)
+    log_event(f"Gaze zones: {', '.join(gaze_zones.names) or 'none'}")
+
     # Initialize status file
     update_status_file(0, "unknown", 0, 0, 0, 0, 0, 0, running=True)
     last_status_update_time = time.time()
 
-    # Track last gaze for console output when no faces detected
+    # Primary (largest) face's gaze and head pose, kept for the status file
+    # and overlay
     last_gaze_direction = "unknown"
     last_gaze_x = 0.0
     last_gaze_y = 0.0
@@ -168,6 +358,9 @@ def run_detection():
     last_head_yaw = 0.0
     last_head_pitch = 0.0
     last_head_roll = 0.0
+    last_faces = []
+    last_vectors = np.empty((0, 3))  # Smoothed gaze aligned with last_faces
+    recorded_gaze = deque(maxlen=RECORD_GAZE_MAX_FRAMES)  # (timestamps, ids, raw values) per frame
 
     try:
         # Connect to device
@@ -253,6 +446,10 @@ def run_detection():
                 head_pose_model_nn_archive.getInputWidth(),
                 head_pose_model_nn_archive.getInputHeight(),
             )
+            detection_process_node.set_face_budget(
+                args.face_budget, args.max_defer_frames
+            )
+            detection_process_node.set_max_faces(MAX_FACES)
             det_nn.out.link(detection_process_node.detections_input)
 
             # Crop nodes for left eye, right eye, and face
@@ -301,15 +498,34 @@ def run_detection():
             # Sync detections with gaze estimations
             gather_data_node = pipeline.create(GatherData).build(fps_limit)
             gaze_estimation_node.out.link(gather_data_node.input_data)
-            det_nn.out.link(gather_data_node.input_reference)
+            # Reference the budgeted detections: one gaze result per crop made
+            detection_process_node.detections_output.link(
+                gather_data_node.input_reference
+            )
 
             # Output queues (must be created before pipeline.start())
             q_gather = gather_data_node.out.createOutputQueue(
-                maxSize=4, blocking=False
+                maxSize=GATHER_QUEUE_FRAMES, blocking=False
             )
             q_preview = cam_out.createOutputQueue(
                 maxSize=4, blocking=False
             )
+            # Per-face head pose, joined to gaze results by sequence number.
+            # Non-blocking, so a slow host drops poses instead of stalling
+            # gaze; room for every face of as many frames as q_gather holds,
+            # so a full frame is never cut short by the queue.
+            q_head_pose = head_pose_concatenate_node.output.createOutputQueue(
+                maxSize=MAX_FACES * GATHER_QUEUE_FRAMES, blocking=False
+            )
+            head_pose_join = SequenceJoin()
+            # Every face of each frame under a face budget, served or not,
+            # joined the same way to keep deferred faces' tracks alive
+            q_present = None
+            if args.face_budget:
+                q_present = detection_process_node.present_output.createOutputQueue(
+                    maxSize=2 * GATHER_QUEUE_FRAMES, blocking=False
+                )
+            present_join = SequenceJoin()
 
             log_event("Pipeline created.")
             pipeline.start()
@@ -318,6 +534,11 @@ def run_detection():
             while pipeline.isRunning():
                 gather_msg = q_gather.tryGet()
                 preview_frame = q_preview.tryGet()
+                for pose_msg in q_head_pose.tryGetAll():
+                    head_pose_join.add(pose_msg.getSequenceNum(), pose_msg)
+                if q_present is not None:
+                    for present_msg in q_present.tryGetAll():
+                        present_join.add(present_msg.getSequenceNum(), present_msg)
 
                 if gather_msg is not None:
                     from depthai_nodes import ImgDetectionsExtended
@@ -328,35 +549,58 @@ def run_detection():
 
                     faces_detected = len(detections_msg.detections)
 
-                    # Process first detected face for status
-                    if faces_detected > 0 and len(gaze_list) > 0:
-                        detection = detections_msg.detections[0]
-                        gaze_data = gaze_list[0]
-
-                        gaze_tensor = gaze_data.getFirstTensor(dequantize=True).flatten()
-                        gaze_x = float(gaze_tensor[0])
-                        gaze_y = float(gaze_tensor[1])
-                        gaze_z = float(gaze_tensor[2]) if len(gaze_tensor) > 2 else 0.0
-
-                        # Extract head pose from the concatenated tensor
-                        # The head pose values were sent through the pipeline
-                        # We can get approximate values from the gaze vector direction
-                        # For accurate values, we'd need a separate queue
-                        head_yaw = last_head_yaw
-                        head_pitch = last_head_pitch
-                        head_roll = last_head_roll
-
-                        gaze_direction = classify_gaze(gaze_x, gaze_y)
+                    # Process every face: detections and gaze results share order
+                    count = min(faces_detected, len(gaze_list))
+                    detections = detections_msg.detections[:count]
+                    vectors = gaze_vectors(gaze_list[:count])
+                    head_poses = head_pose_angles(
+                        head_pose_join.pop(detections_msg.getSequenceNum()), count
+                    )
+                    boxes = detection_boxes(detections)
+                    device_time = detections_msg.getTimestamp().total_seconds()
+                    # Deferred faces are still there; keep their tracks
+                    for present_msg in present_join.pop(detections_msg.getSequenceNum()):
+                        face_tracker.touch(detection_boxes(present_msg.detections), device_time)
+                    raw_values = np.hstack([vectors, head_poses])
+                    positions = face_positions(boxes, src_h / src_w)
+                    last_faces, directions, face_ids, vectors, head_poses = track_faces(
+                        boxes, vectors, head_poses, device_time, positions
+                    )
+                    if joint_attention.update(
+                        device_time, face_ids.tolist(), positions, vectors
+                    ) is not None:
+                        joint_attention_history.add(joint_attention.score)
+                    last_vectors = vectors
+                    if args.record_gaze and count:
+                        recorded_gaze.append(
+                            (np.full(count, device_time), face_ids, raw_values)
+                        )
+                    wall_points, on_wall = project_gazes(
+                        boxes, vectors, src_h / src_w
+                    )
+                    gaze_heatmap.add(device_time, wall_points, on_wall)
+
+                    if count > 0:
+                        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+                        primary = int(np.argmax(areas))
+                        gaze_x, gaze_y, gaze_z = vectors[primary].tolist()
+
+                        # Keep the previous pose if this frame's was dropped
+                        if not np.isnan(head_poses[primary]).any():
+                            last_head_yaw, last_head_pitch, last_head_roll = (
+                                head_poses[primary].tolist()
+                            )
 
-                        last_gaze_direction = gaze_direction
+                        last_gaze_direction = directions[primary]
                         last_gaze_x = gaze_x
                         last_gaze_y = gaze_y
                         last_gaze_z = gaze_z
 
                         # Console status line
                         print(
-                            f"\r  Faces: {faces_detected} | "
-                            f"Gaze: {gaze_direction:>10} "
+                            f"\r  Faces: {count} | "
+                            f"{attention_summary(directions)} | "
+                            f"Primary: {last_gaze_direction:>10} "
                             f"(x:{gaze_x:+.2f} y:{gaze_y:+.2f} z:{gaze_z:+.2f})  ",
                             end="", flush=True
                         )
@@ -370,13 +614,38 @@ def run_detection():
                     # Update status file periodically
                     current_time = time.time()
                     if current_time - last_status_update_time >= STATUS_UPDATE_INTERVAL:
+                        hotspot = gaze_heatmap.hotspot(device_time)
+                        status_faces = last_faces
+                        budget_stats = None
+                        if args.face_budget:
+                            # Deferred faces keep their last known state
+                            status_faces = tracked_faces(device_time)
+                            faces_detected = len(status_faces)
+                            budget_stats = detection_process_node.budget_stats
                         update_status_file(
                             faces_detected, last_gaze_direction,
                             last_gaze_x, last_gaze_y, last_gaze_z,
                             last_head_yaw, last_head_pitch, last_head_roll,
+                            faces=status_faces,
+                            face_budget=budget_stats,
+                            heatmap={
+                                "half_life_seconds": args.heatmap_half_life,
+                                "hotspot_m": (
+                                    [round(v, 2) for v in hotspot] if hotspot else None
+                                ),
+                            },
                         )
                         last_status_update_time = current_time
 
+                    # Save the heatmap for the bot ("where was the class looking")
+                    if current_time - last_heatmap_save_time >= HEATMAP_SAVE_INTERVAL:
+                        try:
+                            gaze_heatmap.save(HEATMAP_FILE, device_time)
+                            cv2.imwrite(str(HEATMAP_IMAGE_FILE), gaze_heatmap.render())
+                        except Exception as e:
+                            log_event(f"WARNING: Could not save gaze heatmap: {e}")
+                        last_heatmap_save_time = current_time
+
                 # Screenshot and display
                 if preview_frame is not None:
                     try:
@@ -394,13 +663,10 @@ def run_detection():
                             gaze_list = gather_msg.gathered
                             src_w, src_h = detections_msg.transformation.getSize()
 
-                            for detection, gaze_data in zip(
-                                detections_msg.detections, gaze_list
+                            for detection, gaze_tensor, face in zip(
+                                detections_msg.detections, last_vectors, last_faces
                             ):
                                 keypoints = detection.keypoints
-                                gaze_tensor = gaze_data.getFirstTensor(
-                                    dequantize=True
-                                ).flatten()
 
                                 # Draw face bounding box
                                 bbox = detection.rotated_rect.getPoints()
@@ -409,6 +675,11 @@ def run_detection():
                                     dtype=np.int32,
                                 )
                                 cv2.polylines(frame, [pts], True, (255, 255, 0), 2)
+                                cv2.putText(
+                                    frame, f"#{face['id']} {face['direction']}",
+                                    (int(pts[:, 0].min()), int(pts[:, 1].min()) - 6),
+                                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1,
+                                )
 
                                 # Draw gaze vectors from both eyes
                                 if len(keypoints) >= 2:
@@ -434,6 +705,18 @@ def run_detection():
                                 frame, f"Gaze: {direction}", (10, 30),
                                 cv2.FONT_HERSHEY_SIMPLEX, 1.0, color, 2,
                             )
+                            cv2.putText(
+                                frame,
+                                attention_summary(
+                                    [face["direction"] for face in last_faces]
+                                ),
+                                (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2,
+                            )
+
+                            # Heatmap inset in the bottom-right corner
+                            inset_w = frame.shape[1] // 4
+                            inset = gaze_heatmap.render((inset_w, inset_w // 2))
+                            frame[-inset.shape[0]:, -inset.shape[1]:] = inset
 
                         if args.display:
                             cv2.imshow("Gaze Detector", frame)
@@ -449,6 +732,13 @@ def run_detection():
         log_event(f"\nGaze detector stopped")
 
     finally:
+        if args.record_gaze and recorded_gaze:
+            timestamps, ids, values = zip(*recorded_gaze)
+            np.savez_compressed(
+                args.record_gaze, timestamps=np.concatenate(timestamps),
+                ids=np.concatenate(ids), values=np.concatenate(values),
+            )
+            log_event(f"Saved gaze recording to {args.record_gaze}")
         if args.display:
             cv2.destroyAllWindows()
         update_status_file(0, "unknown", 0, 0, 0, 0, 0, 0, running=False)
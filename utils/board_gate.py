@@ -0,0 +1,179 @@
+"""
+Board Change Gate
+=================
+Skips host-side OCR post-processing while the whiteboard looks unchanged.
+
+Each preview frame is reduced to a perceptual hash: the frame is shrunk to
+a small grayscale image, transformed with a 2D DCT, and the lowest
+hash_size x hash_size frequencies are thresholded at their median, one bit
+each. Noise and exposure flicker flip only a few bits, while writing or
+erasing moves enough of the low-frequency energy to flip many. A sparse
+board has many coefficients near the median, so its hash flips more bits on
+noise alone; the gate learns the typical frame-to-frame distance and keeps
+its threshold a margin above it. The learned threshold is capped at
+NOISE_CAP x max_distance, below what writing a word moves, so a long
+stretch of motion (someone standing at the board) can't raise it past the
+point where edits no longer wake the gate; it settles back within seconds
+once the board is quiet again.
+
+The gate compares the newest hash against the hash of the frame that was
+last processed (not the previous frame), so a board that changes slowly
+still wakes it once the drift adds up. After a change it stays awake for
+hold_seconds, since recognitions of the new text arrive a few frames after
+the preview shows it. It also wakes every wake_seconds regardless, and
+never skips while the caller is settling a state change.
+"""
+
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+HASH_SIZE = 16  # Hash is HASH_SIZE**2 bits
+DCT_SIZE = 64  # Side of the downscaled image the DCT runs on
+NOISE_FACTOR = 1.6  # Threshold over the board's typical frame-to-frame distance
+NOISE_SMOOTHING = 0.05  # EMA weight of a new frame-to-frame distance
+NOISE_CAP = 2.5  # Learned threshold at most this many times max_distance
+
+
+def perceptual_hash(image: np.ndarray, hash_size: int = HASH_SIZE,
+                    dct_size: int = DCT_SIZE) -> int:
+    """DCT perceptual hash of a BGR or grayscale image, as an int.
+
+    Args:
+        image: Frame to hash
+        hash_size: Side of the low-frequency block kept (bits = hash_size**2)
+        dct_size: Side of the downscaled image
+
+    Returns:
+        Bit i set when low-frequency coefficient i is above the median
+    """
+    # Large frames: strided green channel as the grayscale, far cheaper than
+    # converting and area-averaging every pixel when only low frequencies
+    # are kept anyway
+    step = max(1, min(image.shape[:2]) // (4 * dct_size))
+    gray = image[::step, ::step, 1] if image.ndim == 3 else image[::step, ::step]
+    small = cv2.resize(np.ascontiguousarray(gray), (dct_size, dct_size),
+                       interpolation=cv2.INTER_AREA)
+    coeffs = cv2.dct(small.astype(np.float32))[:hash_size, :hash_size].ravel()
+    bits = coeffs[1:] > np.median(coeffs[1:])  # DC (overall brightness) left out
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+class BoardChangeGate:
+    """Decides per gathered OCR result whether host post-processing can be
+    skipped because the board hasn't visibly changed.
+
+    Args:
+        max_distance: Hash bits that may differ for the board to count as
+            unchanged (raised automatically on noisy boards, up to
+            NOISE_CAP times this)
+        wake_seconds: Process at least this often even when unchanged
+        hold_seconds: Keep processing this long after a change
+    """
+
+    def __init__(self, max_distance: int = 12, wake_seconds: float = 10.0,
+                 hold_seconds: float = 2.0):
+        self.max_distance = max_distance
+        self.wake_seconds = wake_seconds
+        self.hold_seconds = hold_seconds
+
+        self._current: Optional[int] = None  # Hash of the newest preview
+        self._noise = max_distance / NOISE_FACTOR  # Typical frame-to-frame distance
+        self._noise_cap = NOISE_CAP * max_distance / NOISE_FACTOR
+        self._reference: Optional[int] = None  # Hash when last processed
+        self._last_processed = 0.0
+        self._awake_until = 0.0
+        self.distance = 0  # Newest hash vs the reference
+        self.processed = 0
+        self.skipped = 0
+        self._process_seconds = 0.0
+        self._hash_seconds = 0.0
+        self._hashes = 0
+
+    def observe(self, image: np.ndarray):
+        """Hash a new preview frame."""
+        start = time.perf_counter()
+        current = perceptual_hash(image)
+        self._hash_seconds += time.perf_counter() - start
+        self._hashes += 1
+        if self._current is not None:
+            step = hamming(current, self._current)
+            if step <= self.threshold:  # Changes don't count as noise
+                self._noise += NOISE_SMOOTHING * (step - self._noise)
+                # Sustained motion (someone at the board) must not raise
+                # the threshold past what an edit moves
+                self._noise = min(self._noise, self._noise_cap)
+        self._current = current
+        if self._reference is not None:
+            self.distance = hamming(current, self._reference)
+
+    @property
+    def threshold(self) -> float:
+        """Distance above which the board counts as changed."""
+        return max(self.max_distance, NOISE_FACTOR * self._noise)
+
+    def should_skip(self, now: float, settling: bool = False) -> bool:
+        """True if the board looks unchanged since the last processed result.
+
+        Args:
+            now: Wall-clock time in seconds
+            settling: The caller is mid state change (e.g. debouncing) and
+                needs every result
+        """
+        skip = (
+            not settling
+            and self._reference is not None
+            and self._current is not None
+            and self.distance <= self.threshold
+            and now - self._last_processed < self.wake_seconds
+            and now >= self._awake_until
+        )
+        if skip:
+            self.skipped += 1
+        return skip
+
+    def mark_processed(self, now: float, seconds: float):
+        """Record a processed result and make the newest hash the reference.
+
+        Args:
+            now: Wall-clock time in seconds
+            seconds: Time the post-processing took
+        """
+        if self._reference is None or self.distance > self.threshold:
+            self._awake_until = now + self.hold_seconds
+        self._reference = self._current
+        self._last_processed = now
+        self.distance = 0
+        self.processed += 1
+        self._process_seconds += seconds
+
+    @property
+    def skip_ratio(self) -> float:
+        total = self.processed + self.skipped
+        return self.skipped / total if total else 0.0
+
+    @property
+    def stats(self) -> dict:
+        """Skip counts and estimated CPU time saved, for the status file."""
+        mean_process = self._process_seconds / self.processed if self.processed else 0.0
+        mean_hash = self._hash_seconds / self._hashes if self._hashes else 0.0
+        return {
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "skip_ratio": round(self.skip_ratio, 3),
+            "process_ms": round(mean_process * 1000, 3),
+            "hash_ms": round(mean_hash * 1000, 3),
+            "threshold_bits": round(self.threshold, 1),
+            # Estimate: skipped results at the mean processing cost, minus
+            # the time spent hashing
+            "cpu_saved_seconds": round(
+                self.skipped * mean_process - self._hash_seconds, 2
+            ),
+        }
@@ -0,0 +1,132 @@
+"""
+Face Crop Budget
+================
+Chooses which faces get eye/face crops (and so head-pose and gaze NN runs)
+each frame when a room has more faces than the pipeline can keep up with.
+
+Faces are ranked by importance (box size, detection confidence and how
+long the face has been tracked), but every face's priority grows with the
+number of frames it has been deferred, so the less important faces are
+served round-robin rather than starved. A face deferred `max_defer` frames
+in a row is overdue, as is a newly appeared face, and overdue faces are
+served before any other, longest-waiting first. When more faces are overdue
+than the budget allows they queue, so no face waits much longer than
+max(max_defer, ceil(faces / budget) - 1) frames. Downstream trackers that
+only see served faces can keep deferred ones alive with present_boxes.
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from utils.face_tracker import FaceTracker, detection_boxes
+
+AGE_SATURATION_SECONDS = 10.0  # Track age beyond which importance stops growing
+
+
+class FaceBudget:
+    """Per-frame face selection under a crop budget.
+
+    Args:
+        budget: Faces served per frame (None or 0 = all)
+        max_defer: Frames a face may be skipped before it must be served
+        size_weight, confidence_weight, age_weight: Importance weights
+    """
+
+    def __init__(
+        self,
+        budget: int = None,
+        max_defer: int = 10,
+        size_weight: float = 0.5,
+        confidence_weight: float = 0.3,
+        age_weight: float = 0.2,
+    ):
+        self.budget = budget
+        self.max_defer = max_defer
+        self.weights = np.array([size_weight, confidence_weight, age_weight])
+
+        self.tracker = FaceTracker()
+        self._first_seen = {}  # track ID -> timestamp
+        self._deferred = {}  # track ID -> consecutive frames skipped
+        self._unserved = set()  # Track IDs not served since they appeared
+        self.present_boxes = np.empty((0, 4))  # Every face of the latest frame
+
+        self.frames = 0
+        self.faces_seen = 0
+        self.faces_served = 0
+        self.max_deferred_frames = 0
+
+    def select(self, detections: Sequence, timestamp: float) -> List[int]:
+        """Return the indices (ascending) of detections to crop this frame."""
+        n = len(detections)
+        self.frames += 1
+        self.faces_seen += n
+
+        boxes = detection_boxes(detections)
+        self.present_boxes = boxes
+        ids = self.tracker.update(boxes, timestamp).tolist()
+        for track_id in self.tracker.evict(timestamp):
+            self._first_seen.pop(track_id, None)
+            self._deferred.pop(track_id, None)
+            self._unserved.discard(track_id)
+        for track_id in ids:
+            if track_id not in self._first_seen:
+                self._first_seen[track_id] = timestamp
+                self._deferred[track_id] = 0
+                self._unserved.add(track_id)
+
+        if not self.budget or n <= self.budget:
+            for track_id in ids:
+                self._deferred[track_id] = 0
+                self._unserved.discard(track_id)
+            self.faces_served += n
+            return list(range(n))
+
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        features = np.empty((n, 3))
+        features[:, 0] = areas / max(float(areas.max()), 1e-9)
+        features[:, 1] = [detection.confidence for detection in detections]
+        features[:, 2] = [
+            min(1.0, (timestamp - self._first_seen[track_id]) / AGE_SATURATION_SECONDS)
+            for track_id in ids
+        ]
+        importance = features @ self.weights
+
+        # Priority grows with waiting; a new face waits as if already
+        # overdue. Overdue faces go first, longest-waiting first, so a
+        # backlog of them is served in turn rather than by importance.
+        waiting = np.array([
+            self._deferred[track_id] + self.max_defer * (track_id in self._unserved)
+            for track_id in ids
+        ])
+        overdue_wait = np.where(waiting >= self.max_defer, waiting, -1)
+        priority = importance * (1 + waiting)
+        chosen = np.sort(np.lexsort((-priority, -overdue_wait))[:self.budget])
+
+        served = np.zeros(n, dtype=bool)
+        served[chosen] = True
+        for track_id, was_served in zip(ids, served.tolist()):
+            if was_served:
+                self._deferred[track_id] = 0
+                self._unserved.discard(track_id)
+            else:
+                waited = self._deferred[track_id] + 1
+                self._deferred[track_id] = waited
+                self.max_deferred_frames = max(self.max_deferred_frames, waited)
+
+        self.faces_served += len(chosen)
+        return chosen.tolist()
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Budget and deferral counters since start."""
+        deferred = self.faces_seen - self.faces_served
+        return {
+            "budget": self.budget or 0,
+            "frames": self.frames,
+            "faces_seen": self.faces_seen,
+            "faces_served": self.faces_served,
+            "faces_deferred": deferred,
+            "deferral_rate": round(deferred / self.faces_seen, 3) if self.faces_seen else 0.0,
+            "max_deferred_frames": self.max_deferred_frames,
+        }
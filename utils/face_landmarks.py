@@ -2,60 +2,398 @@
 Face Landmarks Fatigue Analysis
 ================================
 Determines fatigue state from MediaPipe face landmarks.
-Uses Eye Aspect Ratio (EAR) and head pose estimation.
+Uses Eye Aspect Ratio (EAR), Mouth Aspect Ratio (MAR) and head pose estimation.
 
 Adapted from Luxonis oak-examples fatigue detection:
 https://github.com/luxonis/depthai-experiments
 """
 
-from typing import Tuple
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
 import cv2
 import math
 import numpy as np
 from depthai_nodes import Keypoints
 
 
-def determine_fatigue(
-    shape: Tuple[int, int], face_keypoints: Keypoints, pitch_angle: int = 20
-):
-    """Determine if a person is fatigued based on face landmarks.
+# MediaPipe face mesh indices used by the fatigue analysis
+LEFT_EYE_IDX = (33, 160, 158, 133, 144, 153)
+RIGHT_EYE_IDX = (263, 387, 385, 362, 373, 380)
+POSE_IDX = (199, 4, 33, 263, 61, 291)  # chin, nose, eye corners, mouth corners
+# Inner lips in EAR order: corners (p1, p4) and two upper/lower pairs
+MOUTH_IDX = (61, 81, 311, 291, 178, 402)
+
+
+class LandmarkGather:
+    """Gather a fixed subset of face landmarks into a reusable float array.
+
+    Only the requested MediaPipe indices are read from the keypoints message
+    (instead of converting all 468), and pixel scaling is applied in a single
+    vectorized multiply. Coordinates stay float so EAR keeps sub-pixel precision.
+
+    Each named group (e.g. "left_eye") is exposed as a row-index array into
+    the gathered points, so callers can slice without extra lookups.
+    """
+
+    def __init__(self, groups: Dict[str, Sequence[int]]):
+        unique = sorted({idx for indices in groups.values() for idx in indices})
+        row_of = {idx: row for row, idx in enumerate(unique)}
+
+        self.indices = tuple(unique)
+        self.rows = {
+            name: np.array([row_of[idx] for idx in indices], dtype=np.intp)
+            for name, indices in groups.items()
+        }
+        self._batch = np.empty((1, len(unique), 2), dtype=np.float64)
+        self._scale = np.ones(2, dtype=np.float64)
+
+    def gather(self, face_keypoints: Keypoints, shape: Tuple[int, int]) -> np.ndarray:
+        """Fill and return the (K, 2) pixel-coordinate array for one face.
+
+        The returned array is reused by the next call; copy it if it must
+        outlive the current face.
+        """
+        return self.gather_batch([face_keypoints], shape)[0]
+
+    def gather_batch(
+        self, faces: Sequence[Keypoints], shape: Tuple[int, int]
+    ) -> np.ndarray:
+        """Fill and return the (N, K, 2) pixel-coordinate array for N faces.
+
+        The buffer grows to the largest batch seen and is then reused.
+        """
+        n = len(faces)
+        if n > len(self._batch):
+            self._batch = np.empty(
+                (max(n, 2 * len(self._batch)), len(self.indices), 2),
+                dtype=np.float64,
+            )
+
+        points = self._batch[:n]
+        for face, face_points in zip(faces, points):
+            keypoints = face.keypoints
+            for row, idx in enumerate(self.indices):
+                kp = keypoints[idx]
+                face_points[row, 0] = kp.x
+                face_points[row, 1] = kp.y
+
+        h, w = shape
+        self._scale[0] = w
+        self._scale[1] = h
+        points *= self._scale
+        return points
+
+
+_fatigue_gather = LandmarkGather(
+    {
+        "left_eye": LEFT_EYE_IDX,
+        "right_eye": RIGHT_EYE_IDX,
+        "mouth": MOUTH_IDX,
+        "pose": POSE_IDX,
+    }
+)
+# Both eyes and the mouth as one (3, 6) row block, so EAR and MAR are a
+# single NumPy operation (the mouth shares two landmarks with the pose)
+_RATIO_ROWS = np.stack(
+    [
+        _fatigue_gather.rows["left_eye"],
+        _fatigue_gather.rows["right_eye"],
+        _fatigue_gather.rows["mouth"],
+    ]
+)
+
+
+class FatigueBatch(NamedTuple):
+    """Per-face fatigue signals for one frame (arrays of length N).
+
+    Pose angles are in degrees relative to a frontal face (see
+    get_head_angles): negative pitch means the head is tilted down. They
+    are NaN for faces where the pose solve failed, so threshold comparisons
+    on them are simply False. pose_points holds the (N, 6, 2) pixel
+    landmarks the pose was solved from.
+    """
+
+    ear: np.ndarray
+    mar: np.ndarray
+    pitch: np.ndarray
+    yaw: np.ndarray
+    roll: np.ndarray
+    pose_points: np.ndarray
+
+
+# Generic 3D head model matching POSE_IDX order
+POSE_MODEL_POINTS = np.array(
+    [
+        (0.0, -7.9422, 5.1812),   # Chin
+        (0.0, -0.4632, 7.5866),   # Nose tip
+        (-4.4459, 2.6640, 3.1734), # Left eye corner
+        (4.4459, 2.6640, 3.1734),  # Right eye corner
+        (-2.4562, -4.3426, 4.2839), # Left mouth corner
+        (2.4562, -4.3426, 4.2839),  # Right mouth corner
+    ],
+    dtype="double",
+)
+
+
+class HeadPoseSolver:
+    """Reusable solvePnP head-pose estimator for one camera.
+
+    Built once per pipeline from the camera intrinsics (ideally the OAK's
+    calibration, see fatigue_detector), so the model points, camera matrix
+    and distortion coefficients are not rebuilt per face.
+
+    With the "iterative" method each tracked face is warm-started from its
+    previous rvec/tvec (useExtrinsicGuess), which converges in a few
+    iterations when the head barely moved. A new track, or one whose last
+    solve failed, starts from the SQPnP solution rather than from scratch.
+    "sqpnp" and "epnp" are non-iterative alternatives that are cheaper per
+    call but cannot use a guess.
+    """
+
+    METHODS = {
+        "iterative": cv2.SOLVEPNP_ITERATIVE,
+        "sqpnp": cv2.SOLVEPNP_SQPNP,
+        "epnp": cv2.SOLVEPNP_EPNP,
+    }
+
+    def __init__(
+        self,
+        camera_matrix: np.ndarray,
+        dist_coeffs: Optional[np.ndarray] = None,
+        method: str = "iterative",
+    ):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown pose solver method: {method}")
+        self.method = method
+        self._flags = self.METHODS[method]
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64).reshape(3, 3)
+        self.dist_coeffs = (
+            np.zeros((4, 1)) if dist_coeffs is None
+            else np.asarray(dist_coeffs, dtype=np.float64).reshape(-1, 1)
+        )
+        self._guesses = {}  # track ID -> (rvec, tvec) from the previous frame
+
+    @classmethod
+    def from_frame_size(cls, shape: Tuple[int, int], method: str = "iterative"):
+        """Approximate intrinsics (focal length = frame width), no distortion.
+
+        This is what get_pose_estimation has always assumed; use it when the
+        device calibration is unavailable.
+        """
+        h, w = shape
+        camera_matrix = np.array(
+            [[w, 0, w / 2], [0, w, h / 2], [0, 0, 1]], dtype=np.float64
+        )
+        return cls(camera_matrix, method=method)
+
+    def solve(self, image_points: np.ndarray, track_id: Optional[int] = None):
+        """Solve head pose for one face.
+
+        Args:
+            image_points: (6, 2) float64 pixel coordinates in POSE_IDX order
+            track_id: Optional face track ID to warm-start from
+
+        Returns:
+            Tuple of (success, rotation_vector, translation_vector)
+        """
+        if self._flags != cv2.SOLVEPNP_ITERATIVE:
+            success, rvec, tvec = cv2.solvePnP(
+                POSE_MODEL_POINTS, image_points, self.camera_matrix,
+                self.dist_coeffs, flags=self._flags,
+            )
+        else:
+            guess = self._guesses.get(track_id) if track_id is not None else None
+            if guess is None:
+                # Cold start: the iterative solver from scratch often settles
+                # in a flipped local minimum (tens of degrees of roll), so
+                # start it from the global SQPnP solution instead
+                success, rvec, tvec = cv2.solvePnP(
+                    POSE_MODEL_POINTS, image_points, self.camera_matrix,
+                    self.dist_coeffs, flags=cv2.SOLVEPNP_SQPNP,
+                )
+                guess = (rvec, tvec) if success else None
+            if guess is not None:
+                success, rvec, tvec = cv2.solvePnP(
+                    POSE_MODEL_POINTS, image_points, self.camera_matrix,
+                    self.dist_coeffs, rvec=guess[0].copy(), tvec=guess[1].copy(),
+                    useExtrinsicGuess=True, flags=self._flags,
+                )
+                # A head behind the camera means the refinement diverged
+                success = bool(success) and float(tvec[2, 0]) > 0
+
+        if track_id is not None:
+            if success:
+                self._guesses[track_id] = (rvec, tvec)
+            else:
+                self._guesses.pop(track_id, None)
+        return success, rvec, tvec
+
+    def forget(self, track_id: int):
+        """Drop the warm-start state of an evicted track."""
+        self._guesses.pop(track_id, None)
+
+    def estimate_batch(
+        self, pose_points: np.ndarray, track_ids: Optional[Sequence[int]] = None
+    ) -> np.ndarray:
+        """Solve every face and return (N, 3, 3) rotation matrices (NaN on failure)."""
+        rotation_matrices = np.full((len(pose_points), 3, 3), np.nan)
+        for i, image_points in enumerate(pose_points):
+            success, rotation_vector, _ = self.solve(
+                image_points, None if track_ids is None else track_ids[i]
+            )
+            if success:
+                rotation_matrices[i], _ = cv2.Rodrigues(rotation_vector)
+        return rotation_matrices
+
+
+class LinearHeadPose:
+    """Closed-form head pose from the 2D pose landmarks, vectorized across faces.
+
+    Under a scaled-orthographic camera the image landmarks are an affine
+    function of the 3D model points, so the 2x3 projection of every face is
+    one matrix product with the precomputed pseudo-inverse of the centered
+    model (the first step of the POS algorithm). Its rows, orthonormalized,
+    give the rotation. No iterations are needed.
+
+    Without intrinsics, faces far from the image center are biased by the
+    oblique viewing angle. With a camera matrix, each face's rays are first
+    rotated into a virtual camera looking straight at it, which removes most
+    of that bias for the cost of a few more array operations (lens
+    distortion is ignored). Same interface as HeadPoseSolver.
+    """
+
+    method = "linear"
+
+    def __init__(self, camera_matrix: Optional[np.ndarray] = None):
+        centered = POSE_MODEL_POINTS - POSE_MODEL_POINTS.mean(axis=0)
+        self._model_pinv = np.linalg.pinv(centered.T)  # (6, 3)
+        self.camera_matrix = camera_matrix
+
+    @classmethod
+    def from_frame_size(cls, shape: Tuple[int, int]):
+        """Same approximate intrinsics as HeadPoseSolver.from_frame_size."""
+        return cls(HeadPoseSolver.from_frame_size(shape).camera_matrix)
+
+    def forget(self, track_id: int):
+        pass
+
+    def estimate_batch(
+        self, pose_points: np.ndarray, track_ids: Optional[Sequence[int]] = None
+    ) -> np.ndarray:
+        """Return (N, 3, 3) model-to-camera rotation matrices for (N, 6, 2) points."""
+        if self.camera_matrix is None:
+            return self._orthographic(pose_points)
+
+        k = self.camera_matrix
+        rays = np.ones(pose_points.shape[:2] + (3,))
+        rays[..., :2] = (pose_points - k[:2, 2]) / (k[0, 0], k[1, 1])
+
+        # Virtual camera per face: z along the ray to the landmark centroid,
+        # x perpendicular to it in the camera's xz plane
+        view = np.zeros((len(rays), 3, 3))
+        z = rays.mean(axis=1)
+        z /= np.sqrt(np.sum(z * z, axis=1, keepdims=True))
+        x_norm = np.sqrt(z[:, 0] ** 2 + z[:, 2] ** 2)
+        view[:, 0, 0] = z[:, 2] / x_norm
+        view[:, 2, 0] = -z[:, 0] / x_norm
+        view[:, :, 1] = _cross(z, view[:, :, 0])
+        view[:, :, 2] = z
+
+        virtual = rays @ view
+        return view @ self._orthographic(virtual[..., :2] / virtual[..., 2:])
+
+    def _orthographic(self, pose_points: np.ndarray) -> np.ndarray:
+        centered = pose_points - pose_points.mean(axis=1, keepdims=True)
+        # (N, 2, 3) affine projection: image rows as functions of model xyz
+        projection = centered.transpose(0, 2, 1) @ self._model_pinv
+
+        rotation = np.empty((len(projection), 3, 3))
+        r1 = projection[:, 0]
+        r1 = r1 / np.sqrt(np.sum(r1 * r1, axis=1, keepdims=True))
+        r2 = projection[:, 1]
+        r2 = r2 - np.sum(r1 * r2, axis=1, keepdims=True) * r1
+        r2 = r2 / np.sqrt(np.sum(r2 * r2, axis=1, keepdims=True))
+        rotation[:, 0] = r1
+        rotation[:, 1] = r2
+        rotation[:, 2] = _cross(r1, r2)
+        return rotation
+
+
+def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise cross product of (N, 3) arrays (np.cross has high call overhead)."""
+    return np.stack([
+        a[:, 1] * b[:, 2] - a[:, 2] * b[:, 1],
+        a[:, 2] * b[:, 0] - a[:, 0] * b[:, 2],
+        a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0],
+    ], axis=1)
+
+
+_default_solvers = {}  # frame shape -> HeadPoseSolver.from_frame_size
+
+
+def analyze_faces(
+    shape: Tuple[int, int],
+    faces: Sequence[Keypoints],
+    pose_solver=None,
+    track_ids: Optional[Sequence[int]] = None,
+) -> FatigueBatch:
+    """Compute EAR and head pose for every face in a gathered message.
 
     Args:
         shape: (height, width) of the source frame
-        face_keypoints: MediaPipe face landmark keypoints
-        pitch_angle: Head tilt threshold in degrees (default 20)
+        faces: MediaPipe face landmark keypoints, one per face
+        pose_solver: HeadPoseSolver built from the camera intrinsics, or a
+            LinearHeadPose; defaults to solvePnP with approximate intrinsics
+            for the frame size
+        track_ids: Optional face track IDs (aligned with faces) used to
+            warm-start the pose solver
 
     Returns:
-        Tuple of (head_tilted: bool, eyes_closed: bool)
+        FatigueBatch with mean EAR (both eyes), MAR, pitch, yaw and roll per face
     """
-    h, w = shape
-    face_points_2d = np.array(
-        [[int(kp.x * w), int(kp.y * h)] for kp in face_keypoints.keypoints]
-    )
+    n = len(faces)
+    if n == 0:
+        empty = np.empty(0, dtype=np.float64)
+        return FatigueBatch(empty, empty, empty, empty, empty, np.empty((0, 6, 2)))
 
-    left_eye_idx = [33, 160, 158, 133, 144, 153]
-    right_eye_idx = [263, 387, 385, 362, 373, 380]
+    if pose_solver is None:
+        pose_solver = _default_solvers.get(shape)
+        if pose_solver is None:
+            pose_solver = _default_solvers[shape] = HeadPoseSolver.from_frame_size(shape)
 
-    left_eye = face_points_2d[left_eye_idx]
-    right_eye = face_points_2d[right_eye_idx]
+    points = _fatigue_gather.gather_batch(faces, shape)
 
-    pose_indices = [199, 4, 33, 263, 61, 291]
-    image_points = face_points_2d[pose_indices].astype("double")
+    # (N, 2 eyes + mouth, 6 points, 2) -> aspect ratios; EAR is the eye mean
+    ratios = calc_eye_aspect_ratios(points[:, _RATIO_ROWS])
+    ear = ratios[:, :2].mean(axis=1)
+    mar = ratios[:, 2]
 
-    success, rotation_vector, translation_vector, camera_matrix, dist_coeffs = (
-        get_pose_estimation(shape, image_points)
-    )
+    pose_points = np.ascontiguousarray(points[:, _fatigue_gather.rows["pose"]])
+    rotation_matrices = pose_solver.estimate_batch(pose_points, track_ids)
+
+    pitch, yaw, roll = get_head_angles(rotation_matrices)
+    return FatigueBatch(ear, mar, pitch, yaw, roll, pose_points)
+
+
+def determine_fatigue(
+    shape: Tuple[int, int],
+    face_keypoints: Keypoints,
+    pitch_angle: int = 20,
+    ear_threshold: float = 0.15,
+):
+    """Determine if a person is fatigued based on face landmarks.
 
-    head_tilted = False
-    if success:
-        pitch, yaw, roll = get_euler_angles(rotation_vector)
-        if pitch < -pitch_angle:
-            head_tilted = True
+    Args:
+        shape: (height, width) of the source frame
+        face_keypoints: MediaPipe face landmark keypoints
+        pitch_angle: Head tilt threshold in degrees (default 20)
+        ear_threshold: EAR below which eyes count as closed (default 0.15)
 
-    left_ear = calc_eye_aspect_ratio(left_eye)
-    right_ear = calc_eye_aspect_ratio(right_eye)
-    ear = (left_ear + right_ear) / 2.0
-    eyes_closed = True if ear < 0.15 else False
+    Returns:
+        Tuple of (head_tilted: bool, eyes_closed: bool)
+    """
+    batch = analyze_faces(shape, [face_keypoints])
+    head_tilted = bool(batch.pitch[0] < -pitch_angle)
+    eyes_closed = bool(batch.ear[0] < ear_threshold)
 
     return head_tilted, eyes_closed
 
@@ -72,20 +410,32 @@ def calc_eye_aspect_ratio(eye_points):
     return (A + B) / (2.0 * C)
 
 
+# Point pairs for the EAR formula: (p2, p5), (p3, p6), (p1, p4)
+_EAR_FROM = np.array([1, 2, 0])
+_EAR_TO = np.array([4, 5, 3])
+
+
+def calc_eye_aspect_ratios(eyes: np.ndarray) -> np.ndarray:
+    """Vectorized EAR for any number of eyes.
+
+    The same formula on MOUTH_IDX points gives the Mouth Aspect Ratio.
+
+    Args:
+        eyes: Array of shape (..., 6, 2) with eye landmark points
+
+    Returns:
+        Array of shape (...) with one EAR per eye
+    """
+    dist = np.linalg.norm(eyes[..., _EAR_FROM, :] - eyes[..., _EAR_TO, :], axis=-1)
+    return (dist[..., 0] + dist[..., 1]) / (2.0 * dist[..., 2])
+
+
 def get_pose_estimation(shape, image_points):
-    """Estimate head pose using 6 facial landmarks and solvePnP."""
-    model_points = np.array(
-        [
-            (0.0, -7.9422, 5.1812),   # Chin
-            (0.0, -0.4632, 7.5866),   # Nose tip
-            (-4.4459, 2.6640, 3.1734), # Left eye corner
-            (4.4459, 2.6640, 3.1734),  # Right eye corner
-            (-2.4562, -4.3426, 4.2839), # Left mouth corner
-            (2.4562, -4.3426, 4.2839),  # Right mouth corner
-        ],
-        dtype="double",
-    )
+    """Estimate head pose using 6 facial landmarks and solvePnP.
 
+    Stateless reference path with approximate intrinsics; the detectors use
+    HeadPoseSolver instead.
+    """
     focal_length = shape[1]
     center = (shape[1] / 2, shape[0] / 2)
     camera_matrix = np.array(
@@ -96,7 +446,7 @@ def get_pose_estimation(shape, image_points):
     dist_coeffs = np.zeros((4, 1))
 
     success, rotation_vector, translation_vector = cv2.solvePnP(
-        model_points,
+        POSE_MODEL_POINTS,
         image_points,
         camera_matrix,
         dist_coeffs,
@@ -126,3 +476,45 @@ def get_euler_angles(rotation_vector):
     roll_deg = roll * 180 / math.pi
 
     return pitch_deg, yaw_deg, roll_deg
+
+
+def get_euler_angles_batch(rotation_matrices: np.ndarray):
+    """Vectorized get_euler_angles for an (N, 3, 3) stack of rotation matrices.
+
+    Returns:
+        Tuple of (pitch, yaw, roll) arrays in degrees
+    """
+    r = rotation_matrices
+    sy = np.hypot(r[:, 0, 0], r[:, 1, 0])
+    singular = sy < 1e-6
+
+    pitch = np.where(
+        singular,
+        np.arctan2(-r[:, 1, 2], r[:, 1, 1]),
+        np.arctan2(r[:, 2, 1], r[:, 2, 2]),
+    )
+    yaw = np.arctan2(-r[:, 2, 0], sy)
+    roll = np.where(singular, 0.0, np.arctan2(r[:, 1, 0], r[:, 0, 0]))
+
+    return np.degrees(pitch), np.degrees(yaw), np.degrees(roll)
+
+
+# POSE_MODEL_POINTS are y-up / z-toward-viewer while the camera is y-down /
+# z-forward, so a frontal face solves to diag(1, -1, -1), i.e. 180 degrees of
+# raw pitch. Re-expressing the camera axes in the model's convention makes a
+# frontal face the identity rotation.
+_FRONTAL = np.diag([1.0, -1.0, -1.0])
+
+
+def get_head_angles(rotation_matrices: np.ndarray):
+    """Head pitch, yaw and roll in degrees, relative to a frontal face.
+
+    Args:
+        rotation_matrices: (N, 3, 3) model-to-camera rotations from a solver
+
+    Returns:
+        Tuple of (pitch, yaw, roll) arrays; 0/0/0 for a face looking straight
+        at the camera, negative pitch when the head tilts down
+    """
+    pitch, yaw, roll = get_euler_angles_batch(_FRONTAL @ rotation_matrices)
+    return -pitch, yaw, roll
@@ -0,0 +1,174 @@
+"""
+Face Identity Tracker
+=====================
+Lightweight IoU / centroid tracker that assigns stable IDs to YuNet face
+detections across frames, so each student gets their own rolling windows.
+
+Matching cost is computed as one vectorized (tracks x detections) matrix per
+frame; assignment is greedy on the best scores, which is plenty for faces
+that barely move between frames.
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+def detection_boxes(detections: Sequence) -> np.ndarray:
+    """Convert ImgDetectionExtended detections to an (N, 4) xyxy array.
+
+    Coordinates stay normalized (0-1), as produced by the detection parser.
+    """
+    boxes = np.empty((len(detections), 4), dtype=np.float64)
+    for i, detection in enumerate(detections):
+        boxes[i] = detection.rotated_rect.getOuterRect()
+    return boxes
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes -> (N, M)."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def _greedy_match(
+    score: np.ndarray, valid: np.ndarray
+) -> List[Tuple[int, int]]:
+    """Pair rows and columns by descending score among valid entries."""
+    rows, cols = np.nonzero(valid)
+    order = np.argsort(-score[rows, cols], kind="stable")
+
+    pairs = []
+    used_rows = set()
+    used_cols = set()
+    for k in order:
+        r, c = rows[k], cols[k]
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        pairs.append((int(r), int(c)))
+    return pairs
+
+
+class FaceTracker:
+    """Assign stable integer IDs to face boxes across frames.
+
+    Detections are matched to live tracks by IoU first; anything left over
+    is matched by centroid distance (normalized by face size), which keeps
+    IDs stable when a face moves quickly at low FPS. Tracks not seen for
+    max_age seconds are evicted.
+    """
+
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        max_centroid_distance: float = 1.0,
+        max_age: float = 2.0,
+    ):
+        self.iou_threshold = iou_threshold
+        self.max_centroid_distance = max_centroid_distance
+        self.max_age = max_age
+
+        self._boxes = np.empty((0, 4), dtype=np.float64)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._last_seen = np.empty(0, dtype=np.float64)
+        self._next_id = 1
+
+    @property
+    def active_ids(self) -> List[int]:
+        return self._ids.tolist()
+
+    def update(self, boxes: np.ndarray, timestamp: float) -> np.ndarray:
+        """Match (N, 4) xyxy boxes to tracks and return their IDs.
+
+        Args:
+            boxes: Face boxes for the current frame
+            timestamp: Frame timestamp in seconds (device clock)
+
+        Returns:
+            Array of N track IDs, aligned with boxes
+        """
+        n = len(boxes)
+        ids = np.zeros(n, dtype=np.int64)
+        track_det = np.full(len(self._ids), -1, dtype=np.intp)
+        matched_dets = np.zeros(n, dtype=bool)
+
+        if n and len(self._ids):
+            iou = iou_matrix(self._boxes, boxes)
+            for t, d in _greedy_match(iou, iou >= self.iou_threshold):
+                track_det[t] = d
+                matched_dets[d] = True
+
+            # Centroid fallback for the leftovers
+            unmatched_tracks = track_det < 0
+            if unmatched_tracks.any() and not matched_dets.all():
+                dist = self._centroid_distance(self._boxes, boxes)
+                valid = dist <= self.max_centroid_distance
+                valid &= unmatched_tracks[:, None]
+                valid &= ~matched_dets[None, :]
+                for t, d in _greedy_match(-dist, valid):
+                    track_det[t] = d
+                    matched_dets[d] = True
+
+        matched_tracks = track_det >= 0
+        ids[track_det[matched_tracks]] = self._ids[matched_tracks]
+        self._boxes[matched_tracks] = boxes[track_det[matched_tracks]]
+        self._last_seen[matched_tracks] = timestamp
+
+        # New tracks for unmatched detections
+        new = ~matched_dets
+        new_count = int(new.sum())
+        if new_count:
+            new_ids = np.arange(self._next_id, self._next_id + new_count)
+            self._next_id += new_count
+            ids[new] = new_ids
+            self._boxes = np.concatenate([self._boxes, boxes[new]])
+            self._ids = np.concatenate([self._ids, new_ids])
+            self._last_seen = np.concatenate(
+                [self._last_seen, np.full(new_count, timestamp)]
+            )
+
+        return ids
+
+    def touch(self, boxes: np.ndarray, timestamp: float):
+        """Mark tracks overlapping any of (N, 4) boxes as seen, without
+        moving them or starting new ones.
+
+        For faces that are known to be present but whose updates were
+        skipped (e.g. deferred by a face budget), so they aren't evicted.
+        """
+        if not len(boxes) or not len(self._ids):
+            return
+        present = (iou_matrix(self._boxes, boxes) >= self.iou_threshold).any(axis=1)
+        self._last_seen[present] = timestamp
+
+    def evict(self, timestamp: float) -> List[int]:
+        """Drop tracks not seen for max_age seconds and return their IDs."""
+        stale = timestamp - self._last_seen > self.max_age
+        if not stale.any():
+            return []
+        evicted = self._ids[stale].tolist()
+        keep = ~stale
+        self._boxes = self._boxes[keep]
+        self._ids = self._ids[keep]
+        self._last_seen = self._last_seen[keep]
+        return evicted
+
+    @staticmethod
+    def _centroid_distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Centroid distance in units of the track's face width -> (N, M)."""
+        ca = (a[:, :2] + a[:, 2:]) / 2
+        cb = (b[:, :2] + b[:, 2:]) / 2
+        dist = np.linalg.norm(ca[:, None, :] - cb[None, :, :], axis=-1)
+        scale = np.maximum(a[:, 2] - a[:, 0], 1e-6)
+        return dist / scale[:, None]
+
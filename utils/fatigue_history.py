@@ -0,0 +1,185 @@
+"""
+Fatigue History Store
+=====================
+Compact per-minute time series of fatigue levels in SQLite.
+
+The detector calls record() every frame; samples are folded into an
+in-memory rollup for the current minute, and only one row per minute is
+written. A week of continuous running is ~10k rows, and history queries
+are primary-key range scans, so the DM bot can answer "history 60m" in
+milliseconds without touching raw logs.
+"""
+
+import math
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Optional
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+MAX_HISTORY_MINUTES = 30 * 1440  # Longest window a history query covers
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fatigue_minutes (
+    minute INTEGER PRIMARY KEY,      -- Unix time // 60
+    samples INTEGER NOT NULL,
+    fatigue_sum REAL NOT NULL,
+    fatigue_max REAL NOT NULL,
+    fatigued_samples INTEGER NOT NULL,
+    perclos_sum REAL NOT NULL,
+    perclos_max REAL NOT NULL,
+    faces_max INTEGER NOT NULL
+)
+"""
+
+
+class FatigueHistory:
+    """Append-only writer that rolls per-frame samples up into minutes."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")  # Readers don't block us
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._minute = None
+        self._reset()
+
+    def _reset(self):
+        self._samples = 0
+        self._fatigue_sum = 0.0
+        self._fatigue_max = 0.0
+        self._fatigued_samples = 0
+        self._perclos_sum = 0.0
+        self._perclos_max = 0.0
+        self._faces_max = 0
+
+    def record(self, timestamp: float, fatigue_percent: float,
+               fatigue_detected: bool, perclos: float, faces: int):
+        """Add one frame's sample (wall-clock seconds)."""
+        minute = int(timestamp // 60)
+        if self._minute is not None and minute != self._minute:
+            self.flush()
+        self._minute = minute
+
+        self._samples += 1
+        self._fatigue_sum += fatigue_percent
+        self._fatigue_max = max(self._fatigue_max, fatigue_percent)
+        self._fatigued_samples += bool(fatigue_detected)
+        self._perclos_sum += perclos
+        self._perclos_max = max(self._perclos_max, perclos)
+        self._faces_max = max(self._faces_max, faces)
+
+    def flush(self):
+        """Write the current minute's rollup (merging with any existing row)."""
+        if not self._samples:
+            return
+        self._conn.execute(
+            """
+            INSERT INTO fatigue_minutes VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(minute) DO UPDATE SET
+                samples = samples + excluded.samples,
+                fatigue_sum = fatigue_sum + excluded.fatigue_sum,
+                fatigue_max = MAX(fatigue_max, excluded.fatigue_max),
+                fatigued_samples = fatigued_samples + excluded.fatigued_samples,
+                perclos_sum = perclos_sum + excluded.perclos_sum,
+                perclos_max = MAX(perclos_max, excluded.perclos_max),
+                faces_max = MAX(faces_max, excluded.faces_max)
+            """,
+            (
+                self._minute, self._samples, self._fatigue_sum, self._fatigue_max,
+                self._fatigued_samples, self._perclos_sum, self._perclos_max,
+                self._faces_max,
+            ),
+        )
+        self._conn.commit()
+        self._reset()
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
+def parse_duration(text: str) -> Optional[int]:
+    """Parse "90m", "2h", "1d" or a bare number of minutes into minutes.
+
+    Returns None for text that isn't a finite duration; longer durations
+    are clamped to MAX_HISTORY_MINUTES.
+    """
+    text = text.strip().lower()
+    units = {"m": 1, "h": 60, "d": 1440}
+    scale = 1
+    if text and text[-1] in units:
+        text, scale = text[:-1], units[text[-1]]
+    try:
+        minutes = float(text) * scale
+    except ValueError:
+        return None
+    if not math.isfinite(minutes):
+        return None
+    return int(min(minutes, MAX_HISTORY_MINUTES))
+
+
+def query_history(path: Path, minutes: int, buckets: int = 30,
+                  now: float = None) -> Optional[dict]:
+    """Summarize the last `minutes` of history, downsampled to `buckets`.
+
+    Returns None if there is no database yet.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    now = time.time() if now is None else now
+    end = int(now // 60)
+    start = end - minutes + 1
+    step = max(1, -(-minutes // buckets))  # Ceiling division
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        totals = conn.execute(
+            """
+            SELECT COUNT(*), SUM(samples), SUM(fatigue_sum), MAX(fatigue_max),
+                   SUM(fatigued_samples), SUM(perclos_sum), MAX(perclos_max),
+                   MAX(faces_max)
+            FROM fatigue_minutes WHERE minute BETWEEN ? AND ?
+            """,
+            (start, end),
+        ).fetchone()
+        rows = conn.execute(
+            """
+            SELECT (minute - ?) / ?, SUM(fatigue_sum) / SUM(samples)
+            FROM fatigue_minutes WHERE minute BETWEEN ? AND ?
+            GROUP BY 1
+            """,
+            (start, step, start, end),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    series: List[Optional[float]] = [None] * (-(-minutes // step))
+    for index, value in rows:
+        series[int(index)] = value
+
+    active_minutes, samples = totals[0], totals[1] or 0
+    return {
+        "minutes": minutes,
+        "active_minutes": active_minutes,
+        "avg_fatigue": totals[2] / samples if samples else 0.0,
+        "max_fatigue": totals[3] or 0.0,
+        "fatigued_fraction": totals[4] / samples if samples else 0.0,
+        "avg_perclos": totals[5] / samples if samples else 0.0,
+        "max_perclos": totals[6] or 0.0,
+        "max_faces": totals[7] or 0,
+        "series": series,
+    }
+
+
+def sparkline(series: List[Optional[float]]) -> str:
+    """Render 0-1 values as a unicode sparkline (gaps shown as spaces)."""
+    top = len(SPARK_CHARS) - 1
+    return "".join(
+        " " if value is None
+        else SPARK_CHARS[min(top, max(0, int(round(value * top))))]
+        for value in series
+    )
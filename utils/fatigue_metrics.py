@@ -0,0 +1,467 @@
+"""
+Streaming Fatigue Metrics
+=========================
+Per-face metrics computed from the EAR time series instead of the
+per-frame eyes_closed boolean alone.
+
+All state lives in fixed-size ring buffers and scalars, so memory per face
+is constant no matter how long a lecture runs, and each sample is O(1).
+"""
+
+import math
+
+import numpy as np
+
+from utils.rolling_window import TimeWindow
+
+
+class EyeMetrics:
+    """PERCLOS, blink rate/duration and longest closure for one face.
+
+    Time is attributed between consecutive samples using device timestamps,
+    so the metrics mean the same at 5 FPS and 30 FPS. Closures up to
+    `blink_max` seconds count as blinks; longer ones only count toward the
+    longest-closure metric.
+
+    The PERCLOS / blink-rate window is a ring of `window / bucket` buckets,
+    each holding closed time, observed time and blink count.
+    """
+
+    def __init__(
+        self,
+        window: float = 60.0,
+        bucket: float = 1.0,
+        blink_max: float = 0.5,
+        max_gap: float = 1.0,
+    ):
+        self.window = window
+        self.bucket = bucket
+        self.blink_max = blink_max
+        self.max_gap = max_gap  # Longer gaps (face lost) are not attributed
+
+        n = max(1, int(math.ceil(window / bucket)))
+        self._closed_time = [0.0] * n
+        self._observed_time = [0.0] * n
+        self._blinks = [0] * n
+        self._closed_sum = 0.0
+        self._observed_sum = 0.0
+        self._blinks_sum = 0
+        self._head_bucket = None  # Absolute bucket number of the newest sample
+
+        self._last_time = None
+        self._last_closed = False
+        self._closure_start = None
+
+        self.blink_count = 0
+        self._blink_duration_sum = 0.0
+        self.longest_closure = 0.0
+
+    def update(self, timestamp: float, ear: float, closed_threshold: float):
+        """Consume one EAR sample for this face."""
+        closed = ear < closed_threshold
+        self._advance(timestamp)
+
+        if self._last_time is not None:
+            dt = timestamp - self._last_time
+            if 0 < dt <= self.max_gap:
+                slot = self._head_bucket % len(self._observed_time)
+                self._observed_time[slot] += dt
+                self._observed_sum += dt
+                if self._last_closed:
+                    self._closed_time[slot] += dt
+                    self._closed_sum += dt
+
+        if closed and not self._last_closed:
+            self._closure_start = timestamp
+        elif not closed and self._last_closed and self._closure_start is not None:
+            self._end_closure(timestamp - self._closure_start)
+            self._closure_start = None
+
+        self._last_time = timestamp
+        self._last_closed = closed
+
+    def expire(self, now: float):
+        """Drop window buckets older than the window before `now`, e.g.
+        before reading a face that has not been sampled for a while."""
+        if self._head_bucket is not None:
+            self._advance(now)
+
+    def _end_closure(self, duration: float):
+        self.longest_closure = max(self.longest_closure, duration)
+        if duration <= self.blink_max:
+            self.blink_count += 1
+            self._blink_duration_sum += duration
+            self._blinks[self._head_bucket % len(self._blinks)] += 1
+            self._blinks_sum += 1
+
+    def _advance(self, timestamp: float):
+        """Move the ring head to the bucket for timestamp, clearing old slots."""
+        bucket = int(timestamp // self.bucket)
+        if self._head_bucket is None:
+            self._head_bucket = bucket
+            return
+
+        n = len(self._observed_time)
+        steps = min(bucket - self._head_bucket, n)
+        for i in range(1, steps + 1):
+            slot = (self._head_bucket + i) % n
+            self._closed_sum -= self._closed_time[slot]
+            self._observed_sum -= self._observed_time[slot]
+            self._blinks_sum -= self._blinks[slot]
+            self._closed_time[slot] = 0.0
+            self._observed_time[slot] = 0.0
+            self._blinks[slot] = 0
+        if bucket > self._head_bucket:
+            self._head_bucket = bucket
+
+    @property
+    def perclos(self) -> float:
+        """Fraction of observed time with eyes closed over the window."""
+        if self._observed_sum <= 0:
+            return 0.0
+        return min(1.0, max(0.0, self._closed_sum / self._observed_sum))
+
+    @property
+    def blink_rate(self) -> float:
+        """Blinks per minute over the window's observed time."""
+        if self._observed_sum <= 0:
+            return 0.0
+        return self._blinks_sum * 60.0 / self._observed_sum
+
+    @property
+    def mean_blink_duration(self) -> float:
+        """Mean blink duration in seconds since tracking started."""
+        if not self.blink_count:
+            return 0.0
+        return self._blink_duration_sum / self.blink_count
+
+    @property
+    def current_closure(self) -> float:
+        """Seconds the eyes have been closed so far (0 when open)."""
+        if not self._last_closed or self._closure_start is None:
+            return 0.0
+        return self._last_time - self._closure_start
+
+    def to_status(self) -> dict:
+        return {
+            "perclos": round(self.perclos, 3),
+            "blink_count": self.blink_count,
+            "blink_rate": round(self.blink_rate, 1),
+            "mean_blink_duration": round(self.mean_blink_duration, 3),
+            "longest_closure": round(
+                max(self.longest_closure, self.current_closure), 2
+            ),
+        }
+
+
+class YawnMetrics:
+    """Yawn events for one face from the Mouth Aspect Ratio stream.
+
+    A yawn is the mouth staying open (MAR above the threshold) for at least
+    `min_duration` seconds, which excludes talking and short gasps. Open
+    phases interrupted by a gap longer than `max_gap` (face lost) are
+    dropped. Recent yawns are counted over `window` seconds.
+    """
+
+    def __init__(self, window: float = 300.0, min_duration: float = 1.5,
+                 max_gap: float = 1.0):
+        self.min_duration = min_duration
+        self.max_gap = max_gap
+        self._recent = TimeWindow(window)
+
+        self._last_time = None
+        self._open_start = None
+
+        self.yawn_count = 0
+        self._duration_sum = 0.0
+        self.last_duration = 0.0
+
+    def update(self, timestamp: float, mar: float, open_threshold: float) -> bool:
+        """Consume one MAR sample and return whether the mouth is wide open."""
+        mouth_open = mar > open_threshold
+        if self._last_time is not None and timestamp - self._last_time > self.max_gap:
+            self._open_start = None
+
+        if mouth_open and self._open_start is None:
+            self._open_start = timestamp
+        elif not mouth_open and self._open_start is not None:
+            duration = timestamp - self._open_start
+            if duration >= self.min_duration:
+                self.yawn_count += 1
+                self._duration_sum += duration
+                self.last_duration = duration
+                self._recent.add(timestamp, 1)
+            self._open_start = None
+
+        self._recent.expire(timestamp)
+        self._last_time = timestamp
+        return mouth_open
+
+    def expire(self, now: float):
+        """Drop yawns older than the window before `now`."""
+        self._recent.expire(now)
+
+    @property
+    def recent_yawns(self) -> int:
+        """Completed yawns within the window."""
+        return len(self._recent)
+
+    @property
+    def mean_duration(self) -> float:
+        if not self.yawn_count:
+            return 0.0
+        return self._duration_sum / self.yawn_count
+
+    @property
+    def yawning(self) -> bool:
+        """Mouth has been open long enough to count as a yawn in progress."""
+        return (self._open_start is not None
+                and self._last_time - self._open_start >= self.min_duration)
+
+    def to_status(self) -> dict:
+        return {
+            "yawning": self.yawning,
+            "yawn_count": self.yawn_count,
+            "recent_yawns": self.recent_yawns,
+            "mean_yawn_duration": round(self.mean_duration, 2),
+            "last_yawn_duration": round(self.last_duration, 2),
+        }
+
+
+class NodDetector:
+    """Periodic head nodding from one face's pitch stream.
+
+    Dozing students nod in slow, regular pitch oscillations well before the
+    head stays below --pitch-threshold. Pitch is resampled onto a fixed
+    `sample_rate` grid (linear interpolation between frames, so any camera
+    FPS works) and a sliding DFT tracks only the bins between `min_freq`
+    and `max_freq` over the last `window` seconds. Each grid sample costs
+    one small vector update; the bins are recomputed from the ring buffer
+    once per window to stop floating-point drift.
+
+    Nodding is flagged when the strongest nod-band component has at least
+    `min_amplitude` degrees amplitude and the band holds at least
+    `min_band_fraction` of the window's pitch variance (so a single slow
+    head turn or noisy pitch does not count).
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 5.0,
+        window: float = 8.0,
+        min_freq: float = 0.25,
+        max_freq: float = 1.0,
+        min_amplitude: float = 4.0,
+        min_band_fraction: float = 0.5,
+        max_gap: float = 1.0,
+    ):
+        self.sample_rate = sample_rate
+        self.min_amplitude = min_amplitude
+        self.min_band_fraction = min_band_fraction
+        self.max_gap = max_gap
+
+        n = max(4, int(round(window * sample_rate)))
+        first = max(1, int(math.ceil(min_freq * n / sample_rate)))
+        last = min(n // 2 - 1, int(max_freq * n / sample_rate))
+        self._bins = np.arange(first, max(first, last) + 1)
+        self._twiddle = np.exp(2j * np.pi * self._bins / n)
+        self._buffer = np.zeros(n)
+        self.reset()
+
+    def reset(self):
+        """Forget all samples (e.g. after the face was lost)."""
+        self._buffer[:] = 0.0
+        self._pos = 0
+        self._count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._spectrum = np.zeros(len(self._bins), dtype=np.complex128)
+        self._next_time = None
+        self._last_time = None
+        self._last_pitch = None
+
+    def update(self, timestamp: float, pitch: float) -> bool:
+        """Consume one pitch sample (degrees) and return whether nodding."""
+        if math.isnan(pitch):
+            return self.nodding
+        if self._last_time is not None and timestamp - self._last_time > self.max_gap:
+            self.reset()
+
+        if self._next_time is None:
+            self._next_time = timestamp
+        step = 1.0 / self.sample_rate
+        while self._next_time <= timestamp:
+            if self._last_time is None or timestamp <= self._last_time:
+                value = pitch
+            else:
+                frac = (self._next_time - self._last_time) / (timestamp - self._last_time)
+                value = self._last_pitch + frac * (pitch - self._last_pitch)
+            self._push(value)
+            self._next_time += step
+
+        self._last_time = timestamp
+        self._last_pitch = pitch
+        return self.nodding
+
+    def _push(self, value: float):
+        n = len(self._buffer)
+        old = self._buffer[self._pos]
+        self._buffer[self._pos] = value
+        self._pos = (self._pos + 1) % n
+        self._count = min(self._count + 1, n)
+        self._sum += value - old
+        self._sum_sq += value * value - old * old
+        self._spectrum = (self._spectrum + (value - old)) * self._twiddle
+
+        if self._pos == 0:
+            # Resync once per window: bins of the oldest-to-newest buffer
+            self._spectrum = np.fft.fft(self._buffer)[self._bins]
+            self._sum = float(self._buffer.sum())
+            self._sum_sq = float(np.dot(self._buffer, self._buffer))
+
+    @property
+    def _ready(self) -> bool:
+        return self._count == len(self._buffer)
+
+    @property
+    def amplitude(self) -> float:
+        """Amplitude in degrees of the strongest nod-band component."""
+        if not self._ready:
+            return 0.0
+        return 2.0 * float(np.abs(self._spectrum).max()) / len(self._buffer)
+
+    @property
+    def frequency(self) -> float:
+        """Frequency in Hz of the strongest nod-band component."""
+        if not self._ready:
+            return 0.0
+        k = self._bins[int(np.argmax(np.abs(self._spectrum)))]
+        return float(k * self.sample_rate / len(self._buffer))
+
+    @property
+    def band_fraction(self) -> float:
+        """Share of the window's pitch variance inside the nod band."""
+        if not self._ready:
+            return 0.0
+        n = len(self._buffer)
+        energy = self._sum_sq - self._sum * self._sum / n  # Parseval, DC removed
+        if energy <= 1e-9:
+            return 0.0
+        band = 2.0 * float(np.sum(np.abs(self._spectrum) ** 2)) / n
+        return min(1.0, band / energy)
+
+    @property
+    def nodding(self) -> bool:
+        return bool(self.amplitude >= self.min_amplitude
+                    and self.band_fraction >= self.min_band_fraction)
+
+    def to_status(self) -> dict:
+        return {
+            "nodding": self.nodding,
+            "nod_frequency": round(self.frequency, 2),
+            "nod_amplitude": round(self.amplitude, 1),
+        }
+
+
+class P2Quantile:
+    """Streaming quantile estimate with the P-square algorithm.
+
+    Jain & Chlamtac (1985): five markers track the min, max, target quantile
+    and two intermediate quantiles, adjusted with a piecewise-parabolic fit.
+    Memory and per-sample cost are constant.
+    """
+
+    def __init__(self, p: float):
+        self.p = p
+        self._initial = []
+        self._q = None  # Marker heights
+        self._n = None  # Marker positions
+        self._np = [1.0, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5.0]  # Desired positions
+        self._dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+        self.count = 0
+
+    def update(self, x: float):
+        self.count += 1
+        if self._q is None:
+            self._initial.append(x)
+            if len(self._initial) == 5:
+                self._q = sorted(self._initial)
+                self._n = [1, 2, 3, 4, 5]
+            return
+
+        q, n = self._q, self._n
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._np[i] += self._dn[i]
+
+        for i in (1, 2, 3):
+            d = self._np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = candidate
+                n[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self._q, self._n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self) -> float:
+        if self._q is not None:
+            return self._q[2]
+        if not self._initial:
+            return 0.0
+        ordered = sorted(self._initial)
+        return ordered[min(len(ordered) - 1, int(self.p * len(ordered)))]
+
+
+class EarBaseline:
+    """Per-face open-eye EAR baseline and derived closed-eye threshold.
+
+    Eyes are open most of the time, so an upper quantile of the EAR stream
+    tracks the face's open-eye EAR even with frequent blinks. The closed
+    threshold is `fraction` of that baseline, which adapts to naturally
+    narrow eyes or glasses. Until `warmup` samples are seen, the fixed
+    --ear-threshold is used. The adaptive threshold is clamped to within
+    [0.5x, 2x] of the fixed one to guard against a face that starts asleep.
+    """
+
+    def __init__(self, default_threshold: float = 0.15, fraction: float = 0.5,
+                 quantile: float = 0.75, warmup: int = 30):
+        self.default_threshold = default_threshold
+        self.fraction = fraction
+        self.warmup = warmup
+        self._sketch = P2Quantile(quantile)
+
+    def update(self, ear: float):
+        self._sketch.update(ear)
+
+    @property
+    def baseline(self) -> float:
+        return self._sketch.value
+
+    @property
+    def threshold(self) -> float:
+        if self._sketch.count < self.warmup:
+            return self.default_threshold
+        adaptive = self.fraction * self._sketch.value
+        return min(2 * self.default_threshold,
+                   max(0.5 * self.default_threshold, adaptive))
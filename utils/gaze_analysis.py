@@ -0,0 +1,154 @@
+"""
+Gaze Analysis
+=============
+Vectorized helpers for the gaze pipeline: extract every face's gaze vector
+from the gathered NN outputs, classify directions for all faces at once,
+and summarize a classroom's attention.
+
+Adapted from Luxonis oak-examples gaze estimation.
+"""
+
+from collections import Counter
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+GAZE_THRESHOLD = 0.15  # Gaze component beyond which a face looks off-center
+CAMERA_HFOV_DEGREES = 69.0  # OAK RGB camera horizontal field of view
+FACE_WIDTH_METERS = 0.15  # Typical adult face width, for distance from box size
+MIN_GAZE_Z = 0.2  # Gazes more oblique than this never reach the camera's wall
+
+_HORIZONTAL = np.array(["left", "", "right"])
+_VERTICAL = np.array(["down", "", "up"])
+
+
+def gaze_vectors(gaze_list: Sequence) -> np.ndarray:
+    """Stack the gaze model outputs of N faces into an (N, 3) float array.
+
+    Args:
+        gaze_list: NNData messages from the gaze model, one per face
+
+    Returns:
+        (N, 3) array of x (right), y (up), z components; z is 0 if the
+        model output has only two values
+    """
+    vectors = np.zeros((len(gaze_list), 3), dtype=np.float64)
+    for i, gaze_data in enumerate(gaze_list):
+        tensor = gaze_data.getFirstTensor(dequantize=True).ravel()
+        vectors[i, :min(3, tensor.size)] = tensor[:3]
+    return vectors
+
+
+def head_pose_angles(pose_messages: Sequence, count: int) -> np.ndarray:
+    """Yaw/pitch/roll of `count` faces from ConcatenateHeadPose messages.
+
+    Args:
+        pose_messages: NNData messages for one frame, in face order
+        count: Number of faces in the frame
+
+    Returns:
+        (count, 3) array in degrees; all NaN unless exactly one message per
+        face arrived (a partial set cannot be aligned to faces safely)
+    """
+    angles = np.full((count, 3), np.nan)
+    if len(pose_messages) != count:
+        return angles
+    for i, message in enumerate(pose_messages):
+        angles[i] = message.getFirstTensor(dequantize=True).ravel()[:3]
+    return angles
+
+
+def face_positions(
+    boxes: np.ndarray,
+    aspect: float,
+    hfov_degrees: float = CAMERA_HFOV_DEGREES,
+    face_width: float = FACE_WIDTH_METERS,
+) -> np.ndarray:
+    """Approximate 3D face positions from box size and position.
+
+    Face distance is estimated from the box width, which is enough to place
+    gaze on a board or screen next to the camera without depth. Room
+    coordinates are meters from the camera with x to the image's right
+    (the class's left), y up and z out into the room.
+
+    Args:
+        boxes: (N, 4) normalized xyxy face boxes
+        aspect: Source frame height / width
+        hfov_degrees: Camera horizontal field of view
+        face_width: Assumed face width in meters
+
+    Returns:
+        (N, 3) face positions
+    """
+    tan_half = np.tan(np.radians(hfov_degrees) / 2)
+    width = np.maximum(boxes[:, 2] - boxes[:, 0], 1e-6)
+    positions = np.empty((len(boxes), 3))
+    positions[:, 2] = face_width / (width * 2 * tan_half)
+
+    # Position along the box center ray (image y points down)
+    scale = 2 * tan_half * positions[:, 2]
+    positions[:, 0] = ((boxes[:, 0] + boxes[:, 2]) / 2 - 0.5) * scale
+    positions[:, 1] = (0.5 - (boxes[:, 1] + boxes[:, 3]) / 2) * aspect * scale
+    return positions
+
+
+def project_gazes(
+    boxes: np.ndarray,
+    vectors: np.ndarray,
+    aspect: float,
+    hfov_degrees: float = CAMERA_HFOV_DEGREES,
+    face_width: float = FACE_WIDTH_METERS,
+):
+    """Intersect each face's gaze ray with the wall the camera is mounted on.
+
+    Wall coordinates are the room x/y of face_positions (meters from the
+    camera, x to the image's right, y up).
+
+    Args:
+        boxes: (N, 4) normalized xyxy face boxes
+        vectors: (N, 3) gaze vectors (x right, y up, z towards the camera)
+        aspect: Source frame height / width
+        hfov_degrees: Camera horizontal field of view
+        face_width: Assumed face width in meters
+
+    Returns:
+        Tuple of ((N, 2) wall points, (N,) bool mask of usable gazes)
+    """
+    faces = face_positions(boxes, aspect, hfov_degrees, face_width)
+    gaze_z = np.abs(vectors[:, 2])
+    valid = gaze_z >= MIN_GAZE_Z
+    travel = faces[:, 2] / np.maximum(gaze_z, MIN_GAZE_Z)
+    points = faces[:, :2] + travel[:, None] * vectors[:, :2]
+    return points, valid
+
+
+def classify_gazes(vectors: np.ndarray, threshold: float = GAZE_THRESHOLD) -> List[str]:
+    """Classify (N, 2+) gaze vectors into direction strings.
+
+    Returns:
+        One direction per face: "center", "left", "right", "up", "down",
+        or combinations like "up-left"
+    """
+    # -1 / 0 / +1 per axis, used to index the direction names
+    h = (vectors[:, 0] > threshold).astype(np.intp) - (vectors[:, 0] < -threshold)
+    v = (vectors[:, 1] > threshold).astype(np.intp) - (vectors[:, 1] < -threshold)
+    directions = []
+    for h_dir, v_dir in zip(_HORIZONTAL[h + 1].tolist(), _VERTICAL[v + 1].tolist()):
+        if h_dir and v_dir:
+            directions.append(f"{v_dir}-{h_dir}")
+        else:
+            directions.append(h_dir or v_dir or "center")
+    return directions
+
+
+def direction_counts(directions: Sequence[str]) -> Dict[str, int]:
+    """Count faces per gaze direction, most common first."""
+    return dict(Counter(directions).most_common())
+
+
+def attention_summary(directions: Sequence[str]) -> str:
+    """Human-readable aggregate like "14 of 18 looking center"."""
+    if not directions:
+        return "no faces"
+    center = sum(1 for direction in directions if direction == "center")
+    return f"{center} of {len(directions)} looking center"
@@ -0,0 +1,131 @@
+"""
+Gaze Attention Heatmap
+======================
+Accumulates where faces look on the board/screen wall into a fixed-size
+grid with exponential time decay, so "where was the class looking lately"
+can be answered without keeping frames or per-frame gaze vectors.
+
+Decay is applied lazily: new hits are weighted by 2 ** (t / half_life)
+relative to a reference time instead of scaling the whole grid each frame,
+and the grid is renormalized only when the weights grow large. Each update
+therefore costs O(faces), and memory is the grid plus fixed render buffers.
+"""
+
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+_RENORMALIZE_WEIGHT = 1e9
+
+
+class GazeHeatmap:
+    """Exponentially decaying 2D histogram of gaze hits on a wall plane.
+
+    Args:
+        extent: (x0, y0, x1, y1) wall area in meters, camera at the origin,
+            x to the image's right and y up (see gaze_analysis.project_gazes)
+        shape: (rows, cols) of the grid
+        half_life: Seconds for a hit's weight to halve
+    """
+
+    def __init__(
+        self,
+        extent: Sequence[float] = (-2.0, -0.5, 2.0, 1.5),
+        shape: Tuple[int, int] = (40, 80),
+        half_life: float = 300.0,
+    ):
+        self.extent = tuple(float(v) for v in extent)
+        self.shape = tuple(shape)
+        self.half_life = half_life
+
+        x0, y0, x1, y1 = self.extent
+        rows, cols = self.shape
+        self._scale = np.array([cols / (x1 - x0), rows / (y1 - y0)])
+        self._origin = np.array([x0, y0])
+        self._grid = np.zeros(rows * cols, dtype=np.float64)
+        self._t_ref = None
+
+        # Render buffers, reused across calls
+        self._norm = np.empty(self.shape, dtype=np.float32)
+        self._gray = np.empty(self.shape, dtype=np.uint8)
+        self._colored = np.empty(self.shape + (3,), dtype=np.uint8)
+        self._mirrored = np.empty(self.shape + (3,), dtype=np.uint8)
+        self._image = None
+
+    def _weight(self, timestamp: float) -> float:
+        if self._t_ref is None:
+            self._t_ref = timestamp
+        weight = 2.0 ** ((timestamp - self._t_ref) / self.half_life)
+        if weight > _RENORMALIZE_WEIGHT:
+            self._grid /= weight
+            self._t_ref = timestamp
+            weight = 1.0
+        return weight
+
+    def add(self, timestamp: float, points: np.ndarray,
+            valid: Optional[np.ndarray] = None):
+        """Add (N, 2) wall points (meters) seen at timestamp (seconds)."""
+        if valid is not None:
+            points = points[valid]
+        if not len(points):
+            return
+        cells = np.floor((points - self._origin) * self._scale).astype(np.intp)
+        rows, cols = self.shape
+        # Row 0 is the top of the wall
+        col = cells[:, 0]
+        row = rows - 1 - cells[:, 1]
+        inside = (col >= 0) & (col < cols) & (row >= 0) & (row < rows)
+        np.add.at(self._grid, row[inside] * cols + col[inside], self._weight(timestamp))
+
+    def values(self, now: float) -> np.ndarray:
+        """Decayed hit weights as a (rows, cols) array at time `now`."""
+        if self._t_ref is None:
+            return np.zeros(self.shape)
+        decay = 2.0 ** (-(now - self._t_ref) / self.half_life)
+        return (self._grid * decay).reshape(self.shape)
+
+    def hotspot(self, now: float) -> Optional[Tuple[float, float]]:
+        """Wall coordinates (meters) of the most-looked-at cell, or None."""
+        grid = self.values(now)
+        if not grid.any():
+            return None
+        row, col = np.unravel_index(int(np.argmax(grid)), self.shape)
+        rows, cols = self.shape
+        x = self._origin[0] + (col + 0.5) / self._scale[0]
+        y = self._origin[1] + (rows - row - 0.5) / self._scale[1]
+        return float(x), float(y)
+
+    def render(self, size: Tuple[int, int] = (640, 320),
+               class_view: bool = True) -> np.ndarray:
+        """Render the heatmap as a BGR image (reused buffer; copy to keep).
+
+        Args:
+            size: (width, height) of the output image
+            class_view: Mirror horizontally so the board reads as the class
+                sees it (the camera faces the class)
+        """
+        grid = self._grid.reshape(self.shape)
+        peak = grid.max()
+        if peak > 0:
+            np.multiply(grid, 255.0 / peak, out=self._norm, casting="unsafe")
+        else:
+            self._norm.fill(0)
+        self._gray[...] = self._norm
+        colored = cv2.applyColorMap(self._gray, cv2.COLORMAP_JET, dst=self._colored)
+        if class_view:
+            colored = cv2.flip(colored, 1, dst=self._mirrored)
+
+        if self._image is None or self._image.shape[1::-1] != tuple(size):
+            self._image = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        cv2.resize(colored, tuple(size), dst=self._image,
+                   interpolation=cv2.INTER_LINEAR)
+        return self._image
+
+    def save(self, path: Path, now: float):
+        """Write the decayed grid and its geometry to an .npz file."""
+        np.savez_compressed(
+            path, grid=self.values(now).astype(np.float32),
+            extent=np.array(self.extent), half_life=self.half_life,
+        )
@@ -0,0 +1,146 @@
+"""
+Gaze Target Zones
+=================
+Labels what each face is looking at (board, desk, door, ...) by casting its
+gaze ray into the room and intersecting it with configurable rectangles.
+
+Zones are rectangles (or any parallelogram: the edges need not be
+perpendicular) given by a corner and two edge vectors, either in room
+coordinates (camera at the origin, x to the image's right, y up, z out into
+the room, see gaze_analysis.face_positions) or relative to each face (for
+things that move with the person, like their own desk or laptop). All plane
+geometry is stacked into arrays once, so a frame costs a few (faces x zones)
+array operations.
+
+Zone file format (JSON list):
+    [{"name": "board", "frame": "room",
+      "corner": [-2.0, -0.5, 0.0], "u": [4.0, 0.0, 0.0], "v": [0.0, 2.0, 0.0]},
+     {"name": "door", "frame": "room",
+      "corner": [-3.0, -1.2, 4.0], "u": [0.0, 0.0, 1.0], "v": [0.0, 2.1, 0.0]}]
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+NO_ZONE = "elsewhere"
+MAX_ZONE_GAP = 1.0  # Seconds of missed frames still counted as time in zone
+
+DEFAULT_ZONES = [
+    # Board/screen wall around the camera (matches the default heatmap plane)
+    {"name": "board", "frame": "room",
+     "corner": [-2.0, -0.5, 0.0], "u": [4.0, 0.0, 0.0], "v": [0.0, 2.0, 0.0]},
+    # Desk or laptop: a horizontal patch below and in front of each face
+    {"name": "desk", "frame": "face",
+     "corner": [-0.4, -0.35, -0.05], "u": [0.8, 0.0, 0.0], "v": [0.0, 0.0, -0.6]},
+]
+
+
+class GazeZones:
+    """Vectorized gaze ray / zone rectangle intersection.
+
+    Args:
+        zones: Zone dicts with name, frame ("room" or "face"), corner, u, v
+
+    Raises:
+        ValueError: If a zone's edges are degenerate or its frame is unknown
+    """
+
+    def __init__(self, zones: Sequence[Dict] = DEFAULT_ZONES):
+        self.names = [zone["name"] for zone in zones]
+        count = len(zones)
+        self._corner = np.zeros((count, 3))
+        self._normal = np.zeros((count, 3))
+        self._u = np.zeros((count, 3))  # Dual edge vectors: hit @ _u and hit @ _v
+        self._v = np.zeros((count, 3))  # are the hit's coordinates along u and v
+        self._room = np.zeros(count, dtype=bool)
+
+        for i, zone in enumerate(zones):
+            if zone.get("frame", "room") not in ("room", "face"):
+                raise ValueError(f"Zone {zone['name']!r}: frame must be room or face")
+            corner, u, v = (np.asarray(zone[key], dtype=np.float64)
+                            for key in ("corner", "u", "v"))
+            normal = np.cross(u, v)
+            if np.linalg.norm(normal) < 1e-9:
+                raise ValueError(f"Zone {zone['name']!r}: u and v must not be parallel")
+            self._corner[i] = corner
+            self._normal[i] = normal
+            # Plane coordinates (a, b) of hit = a*u + b*v solve the 2x2 Gram
+            # system; folded into one vector per edge so skewed edges cost
+            # the same as perpendicular ones
+            uu, uv, vv = u @ u, u @ v, v @ v
+            det = uu * vv - uv * uv
+            self._u[i] = (vv * u - uv * v) / det
+            self._v[i] = (uu * v - uv * u) / det
+            self._room[i] = zone.get("frame", "room") == "room"
+
+        self._plane_offset = np.einsum("ij,ij->i", self._normal, self._corner)
+        self._labels = np.array(self.names + [NO_ZONE], dtype=object)
+
+    def classify(self, positions: np.ndarray, vectors: np.ndarray) -> List[str]:
+        """Zone label per face: the nearest zone its gaze ray hits.
+
+        Args:
+            positions: (N, 3) face positions in room coordinates
+            vectors: (N, 3) gaze vectors (x right, y up, z towards the camera)
+
+        Returns:
+            One zone name per face, or NO_ZONE
+        """
+        if not len(positions) or not len(self.names):
+            return [NO_ZONE] * len(positions)
+
+        # Gaze direction in room coordinates (towards the camera is -z)
+        directions = vectors.copy()
+        directions[:, 2] = -np.abs(vectors[:, 2])
+
+        # Ray origins: the face's room position for room zones, zero for
+        # face-relative zones (their corners are already relative to it)
+        origins = positions[:, None, :] * self._room[None, :, None]  # (N, Z, 3)
+        facing = directions @ self._normal.T  # (N, Z)
+        along = self._plane_offset - np.einsum("nzk,zk->nz", origins, self._normal)
+        # Rays parallel to a plane give inf/NaN here and fail the bounds test
+        with np.errstate(divide="ignore", invalid="ignore"):
+            distance = along / facing
+            hits = origins + distance[..., None] * directions[:, None, :] - self._corner
+            a = np.einsum("nzk,zk->nz", hits, self._u)
+            b = np.einsum("nzk,zk->nz", hits, self._v)
+        inside = (distance > 0) & (a >= 0) & (a <= 1) & (b >= 0) & (b <= 1)
+
+        distance = np.where(inside, distance, np.inf)
+        nearest = np.argmin(distance, axis=1)
+        nearest[~inside.any(axis=1)] = len(self.names)
+        return self._labels[nearest].tolist()
+
+
+class ZoneTimer:
+    """Per-face time in current zone and per-zone accumulated gaze time."""
+
+    def __init__(self, names: Sequence[str]):
+        self.totals = {name: 0.0 for name in list(names) + [NO_ZONE]}
+        self._current = {}  # face ID -> (zone, entered at, last update)
+
+    def update(self, face_ids: Sequence[int], zones: Sequence[str],
+               timestamp: float) -> List[float]:
+        """Record one frame and return each face's seconds in its zone."""
+        seconds = []
+        for face_id, zone in zip(face_ids, zones):
+            previous = self._current.get(face_id)
+            if previous is not None:
+                gap = timestamp - previous[2]
+                if gap <= MAX_ZONE_GAP:
+                    self.totals[previous[0]] += gap
+            if previous is None or previous[0] != zone:
+                entered = timestamp
+            else:
+                entered = previous[1]
+            self._current[face_id] = (zone, entered, timestamp)
+            seconds.append(timestamp - entered)
+        return seconds
+
+    def forget(self, face_id: int):
+        self._current.pop(face_id, None)
+
+    def summary(self) -> Dict[str, float]:
+        """Accumulated face-seconds per zone, rounded for the status file."""
+        return {name: round(total, 1) for name, total in self.totals.items()}
@@ -18,11 +18,15 @@ class ConcatenateHeadPose(dai.node.HostNode):
     The head pose estimation model outputs three separate Predictions messages.
     The gaze estimation ADAS model expects them concatenated as a single
     [1, 3] tensor named "head_pose_angles_yaw_pitch_roll".
+
+    The angles are written into one preallocated float16 buffer; addTensor
+    copies it into the message, so the buffer is safe to reuse right away.
     """
 
     def __init__(self):
         super().__init__()
         self.output = self.createOutput()
+        self._angles = np.zeros((1, 3), dtype=np.float16)
 
     def build(
         self,
@@ -46,13 +50,13 @@ class ConcatenateHeadPose(dai.node.HostNode):
         ts = yaw_msg.getTimestamp()
         seq_num = yaw_msg.getSequenceNum()
 
-        yaw = yaw_msg.predictions[0].prediction
-        pitch = pitch_msg.predictions[0].prediction
-        roll = roll_msg.predictions[0].prediction
-        output = np.array([[yaw, pitch, roll]], dtype=np.float16)
+        angles = self._angles[0]
+        angles[0] = yaw_msg.predictions[0].prediction
+        angles[1] = pitch_msg.predictions[0].prediction
+        angles[2] = roll_msg.predictions[0].prediction
 
         output_msg = dai.NNData()
-        output_msg.addTensor("head_pose_angles_yaw_pitch_roll", output)
+        output_msg.addTensor("head_pose_angles_yaw_pitch_roll", self._angles)
         output_msg.setTimestamp(ts)
         output_msg.setSequenceNum(seq_num)
 
@@ -0,0 +1,240 @@
+"""
+Joint Attention
+===============
+Streaming "are they all looking at the same thing" score for a class: the
+fraction of tracked faces whose gaze rays pass through one common region
+of the room within a short time window.
+
+Testing every pair of rays for proximity grows quadratically with class
+size. Instead each ray is sampled at fixed steps and the samples are hashed
+into a voxel grid; rays that come close share a voxel, so the most popular
+voxel is the joint focus. Each face counts towards a voxel by the fraction
+of its frames in the window whose ray passed through it, so only sustained
+convergence scores, not rays jittering across many voxels. A second grid
+offset by half a cell catches rays that meet near a cell boundary.
+
+The window is kept as running counts: per face, the frames it appeared in
+and the hits on each voxel, and per voxel the support summed over faces.
+A frame adds its (face, voxel) pairs and the frame leaving the window
+subtracts its own, so an update costs O(faces x samples) of the frames
+entering and leaving, whatever the FPS and window length. Only a face
+whose frame count changes (it appeared, left, or the frame rate moved) has
+its voxels rescaled. Picking the best voxel is one pass over the voxels
+currently supported.
+
+Room coordinates follow gaze_analysis.face_positions (meters, camera at the
+origin, x right, y up, z out into the room).
+"""
+
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+_AXIS_CELLS = 1 << 12  # Grid cells per axis in the packed key
+_AXIS_OFFSET = _AXIS_CELLS // 2
+_FACE_BITS = 20  # Face ID (wrapped) in the low bits of a packed pair
+_FACE_MASK = (1 << _FACE_BITS) - 1
+
+
+class JointAttention:
+    """Fraction of faces whose gaze converges on one region.
+
+    Args:
+        window: Seconds of gaze history a face's ray counts for
+        cell_size: Voxel edge in meters (how close rays must pass)
+        min_distance: Ray length skipped in front of each face, so
+            neighbours are not "converging" on each other's heads
+        max_distance: Ray length sampled (stops at the camera wall)
+        step: Sample spacing along each ray in meters
+    """
+
+    def __init__(
+        self,
+        window: float = 2.0,
+        cell_size: float = 0.75,
+        min_distance: float = 0.5,
+        max_distance: float = 6.0,
+        step: float = 0.25,
+    ):
+        self.window = window
+        self.cell_size = cell_size
+        self._steps = np.arange(min_distance, max_distance + 1e-9, step)
+        self._frames = deque()  # (timestamp, packed (face, voxel) pairs)
+        self._face_frames: Dict[int, int] = {}  # Face -> frames in the window
+        self._hits: Dict[int, Dict[int, int]] = {}  # Face -> voxel -> frames hit
+        self._support: Dict[int, float] = {}  # Voxel -> sum of hits / face frames
+        self._voxel_faces: Dict[int, int] = {}  # Voxel -> faces with hits on it
+
+        self.score: Optional[float] = None
+        self.faces = 0
+        self.focus: Optional[List[float]] = None
+
+    def _voxel_keys(self, positions: np.ndarray, directions: np.ndarray):
+        """Packed voxel keys (both grids) of every ray sample, per face."""
+        samples = (positions[:, None, :]
+                   + self._steps[None, :, None] * directions[:, None, :])
+        in_room = samples[..., 2] >= 0  # In front of the camera wall
+        cells = np.empty((2,) + samples.shape, dtype=np.int64)
+        np.floor(samples / self.cell_size, out=cells[0], casting="unsafe")
+        np.floor(samples / self.cell_size + 0.5, out=cells[1], casting="unsafe")
+        np.clip(cells + _AXIS_OFFSET, 0, _AXIS_CELLS - 1, out=cells)
+        keys = (cells[..., 0] * _AXIS_CELLS + cells[..., 1]) * _AXIS_CELLS + cells[..., 2]
+        keys = keys * 2 + np.arange(2)[:, None, None]  # Grid flag in the low bit
+        return keys, in_room
+
+    def update(self, timestamp: float, face_ids: Sequence[int],
+               positions: np.ndarray, vectors: np.ndarray) -> Optional[float]:
+        """Add one frame of gaze rays and return the current score.
+
+        Args:
+            timestamp: Device time in seconds
+            face_ids: Track ID per face
+            positions: (N, 3) face positions in room coordinates
+            vectors: (N, 3) gaze vectors (x right, y up, z towards the camera)
+
+        Returns:
+            Fraction (0-1) of faces in the window looking at the most shared
+            region, or None with fewer than two faces
+        """
+        if len(face_ids):
+            directions = vectors.astype(np.float64)
+            directions[:, 2] = -np.abs(directions[:, 2])
+            directions /= np.maximum(
+                np.linalg.norm(directions, axis=1, keepdims=True), 1e-9
+            )
+            keys, in_room = self._voxel_keys(positions, directions)
+            ids = np.broadcast_to(np.asarray(face_ids, dtype=np.int64)[None, :, None],
+                                  keys.shape)
+            mask = np.broadcast_to(in_room, keys.shape)
+            pairs = np.unique((keys[mask] << _FACE_BITS) | (ids[mask] & _FACE_MASK))
+            self._frames.append((timestamp, pairs))
+            changes = [(pairs, 1)]
+        else:
+            changes = []
+
+        while self._frames and timestamp - self._frames[0][0] > self.window:
+            changes.append((self._frames.popleft()[1], -1))
+        self._apply(changes)
+
+        self.score, self.focus = None, None
+        self.faces = len(self._face_frames)
+        if self.faces < 2:
+            return None
+        best = max(self._support, key=self._support.get)
+        self.score = self._support[best] / self.faces
+        self.focus = self._voxel_center(best)
+        return self.score
+
+    def _apply(self, changes):
+        """Fold frames entering (sign 1) and leaving (sign -1) the window
+        into the running counts.
+
+        Args:
+            changes: (packed pairs, sign) per frame
+        """
+        if not changes:
+            return
+        # Net change per (face, voxel) pair and per face; a steady gaze hits
+        # the same voxels in the frames entering and leaving, which cancel
+        pairs = np.concatenate([frame_pairs for frame_pairs, _ in changes])
+        signs = np.concatenate([np.full(len(frame_pairs), sign)
+                                for frame_pairs, sign in changes])
+        unique, inverse = np.unique(pairs, return_inverse=True)
+        net = np.bincount(inverse, signs, minlength=len(unique)).astype(np.int64)
+        frame_delta: Dict[int, int] = {}
+        for frame_pairs, sign in changes:
+            for face in np.unique(frame_pairs & _FACE_MASK).tolist():
+                frame_delta[face] = frame_delta.get(face, 0) + sign
+        hit_delta: Dict[int, Dict[int, int]] = {face: {} for face in frame_delta}
+        changed = net != 0
+        for pair, delta in zip(unique[changed].tolist(), net[changed].tolist()):
+            hit_delta[pair & _FACE_MASK][pair >> _FACE_BITS] = delta
+
+        support, voxel_faces = self._support, self._voxel_faces
+        for face, deltas in hit_delta.items():
+            old = self._face_frames.get(face, 0)
+            new = old + frame_delta[face]
+            hits = self._hits.setdefault(face, {})
+            rescale = old != new
+            if not rescale and not deltas:
+                continue
+            if rescale and old:
+                # Weight 1/old -> 1/new: take out the face's whole
+                # contribution, re-add it below
+                for voxel, count in hits.items():
+                    support[voxel] -= count / old
+            for voxel, delta in deltas.items():
+                before = hits.get(voxel, 0)
+                count = before + delta
+                if count:
+                    hits[voxel] = count
+                else:
+                    del hits[voxel]
+                if not before:
+                    voxel_faces[voxel] = voxel_faces.get(voxel, 0) + 1
+                    support.setdefault(voxel, 0.0)
+                elif not count:
+                    voxel_faces[voxel] -= 1
+                    if not voxel_faces[voxel]:
+                        del voxel_faces[voxel], support[voxel]
+                        continue
+                if not rescale:
+                    support[voxel] += delta / new
+            if rescale and new:
+                for voxel, count in hits.items():
+                    support[voxel] += count / new
+
+            if new:
+                self._face_frames[face] = new
+            else:
+                del self._face_frames[face], self._hits[face]
+
+    def _voxel_center(self, key: int) -> List[float]:
+        grid, key = key & 1, key >> 1
+        z = key % _AXIS_CELLS - _AXIS_OFFSET
+        y = (key // _AXIS_CELLS) % _AXIS_CELLS - _AXIS_OFFSET
+        x = key // (_AXIS_CELLS * _AXIS_CELLS) - _AXIS_OFFSET
+        shift = 0.0 if grid else 0.5  # Offset grid cells are centered on nodes
+        return [round((c + shift) * self.cell_size, 2) for c in (x, y, z)]
+
+
+class MinuteHistory:
+    """Per-minute mean/max of a streaming score, newest last.
+
+    Args:
+        minutes: Number of completed minutes kept
+    """
+
+    def __init__(self, minutes: int = 120):
+        self._minutes = deque(maxlen=minutes)
+        self._minute = None
+        self._sum = 0.0
+        self._max = 0.0
+        self._samples = 0
+
+    def add(self, value: float, wall_time: float = None):
+        """Add one sample at wall-clock time (default: now)."""
+        minute = int((time.time() if wall_time is None else wall_time) // 60)
+        if self._minute is not None and minute != self._minute and self._samples:
+            self._minutes.append(self._rollup())
+            self._sum, self._max, self._samples = 0.0, 0.0, 0
+        self._minute = minute
+        self._sum += value
+        self._max = max(self._max, value)
+        self._samples += 1
+
+    def _rollup(self) -> Dict:
+        return {
+            "minute": time.strftime("%H:%M", time.localtime(self._minute * 60)),
+            "mean": round(self._sum / self._samples, 3),
+            "max": round(self._max, 3),
+        }
+
+    def to_list(self) -> List[Dict]:
+        """Completed minutes plus the current partial one."""
+        history = list(self._minutes)
+        if self._samples:
+            history.append(self._rollup())
+        return history
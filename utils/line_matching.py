@@ -0,0 +1,173 @@
+"""
+Line Matching
+=============
+One-to-one matching of the current OCR reading's lines to the previous
+reading's, so edits, additions and removals come from one consistent
+mapping instead of each new line grabbing its own best old line.
+
+Lines present in both readings are paired first. The remaining lines get a
+similarity matrix in one pass: character-histogram upper bounds for all
+pairs are computed with NumPy, and the exact score (utils/text_similarity)
+only for pairs whose bound clears the threshold. The assignment maximizing
+total similarity above the threshold is then solved with scipy's linear_sum_assignment, or a
+NumPy Hungarian implementation when SciPy is not installed.
+"""
+
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from utils.text_similarity import CACHE_SIZE, normalize, similarity
+
+try:
+    from scipy.optimize import linear_sum_assignment
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+HISTOGRAM_BINS = 64  # Characters hashed into this many bins (bound stays valid)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _histogram(text: str) -> np.ndarray:
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    return np.bincount(codes % HISTOGRAM_BINS, minlength=HISTOGRAM_BINS)
+
+
+def similarity_matrix(rows: Sequence[str], cols: Sequence[str],
+                      threshold: float) -> np.ndarray:
+    """Pairwise similarity, exact where it can exceed threshold, else 0.
+
+    Args:
+        rows, cols: Lines to compare
+        threshold: Scores at or below this are not needed exactly
+
+    Returns:
+        (len(rows), len(cols)) float array
+    """
+    scores = np.zeros((len(rows), len(cols)))
+    if not len(rows) or not len(cols):
+        return scores
+    row_keys = [normalize(line) for line in rows]
+    col_keys = [normalize(line) for line in cols]
+    row_hist = np.array([_histogram(key) for key in row_keys])
+    col_hist = np.array([_histogram(key) for key in col_keys])
+    lengths = row_hist.sum(1)[:, None] + col_hist.sum(1)[None, :]
+    common = np.minimum(row_hist[:, None, :], col_hist[None, :, :]).sum(2)
+    bound = 2.0 * common / np.maximum(lengths, 1)
+    for i, j in zip(*np.nonzero(bound > threshold)):
+        scores[i, j] = similarity(row_keys[i], col_keys[j])
+    return scores
+
+
+def _hungarian(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Minimum-cost assignment for an (n, m) matrix with n <= m.
+
+    Shortest augmenting path with potentials (O(n^2 m)), the inner loop
+    vectorized over columns.
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    assigned = np.zeros(m + 1, dtype=np.intp)  # Column -> row (1-based), 0 = free
+    way = np.zeros(m + 1, dtype=np.intp)
+    for i in range(1, n + 1):
+        assigned[0] = i
+        j0 = 0
+        min_slack = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = assigned[j0]
+            free = ~used
+            free[0] = False
+            slack = cost[i0 - 1] - u[i0] - v[1:]
+            improve = free[1:] & (slack < min_slack[1:])
+            min_slack[1:][improve] = slack[improve]
+            way[1:][improve] = j0
+            candidates = np.where(free, min_slack, np.inf)
+            j1 = int(np.argmin(candidates))
+            delta = candidates[j1]
+            u[assigned[used]] += delta
+            v[used] -= delta
+            min_slack[free] -= delta
+            j0 = j1
+            if assigned[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            assigned[j0] = assigned[j1]
+            j0 = j1
+    cols = np.flatnonzero(assigned[1:])
+    rows = assigned[1:][cols] - 1
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+
+
+def linear_assignment(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Row and column indices of a minimum-cost one-to-one assignment."""
+    cost = np.asarray(cost, dtype=np.float64)
+    if not cost.size:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    if SCIPY_AVAILABLE:
+        return linear_sum_assignment(cost)
+    if cost.shape[0] > cost.shape[1]:
+        cols, rows = _hungarian(cost.T)
+        order = np.argsort(rows)
+        return rows[order], cols[order]
+    return _hungarian(cost)
+
+
+def match_lines(current: Sequence[str], previous: Sequence[str],
+                threshold: float = 0.6):
+    """Optimal one-to-one matching of current lines to previous lines.
+
+    Exact matches are paired first; the rest are assigned to maximize total
+    similarity, keeping only pairs above threshold.
+
+    Returns:
+        Tuple of (stable, edited, added, removed): stable and edited are
+        lists of (previous index, current index) pairs, edited sorted by
+        current index; added and removed are index lists into current and
+        previous
+    """
+    stable = []
+    unmatched_previous = {}  # Line -> previous indices not yet paired
+    for j, line in enumerate(previous):
+        unmatched_previous.setdefault(line, []).append(j)
+    rest_current = []
+    for i, line in enumerate(current):
+        waiting = unmatched_previous.get(line)
+        if waiting:
+            stable.append((waiting.pop(0), i))
+        else:
+            rest_current.append(i)
+    rest_previous = sorted(j for indices in unmatched_previous.values() for j in indices)
+
+    scores = similarity_matrix(
+        [current[i] for i in rest_current], [previous[j] for j in rest_previous],
+        threshold,
+    )
+    # Only lines with some candidate above threshold enter the assignment
+    rows = np.flatnonzero((scores > threshold).any(1))
+    cols = np.flatnonzero((scores > threshold).any(0))
+    edited = []
+    matched_current, matched_previous = set(), set()
+    if len(rows):
+        sub = scores[np.ix_(rows, cols)]
+        # Gain is similarity above threshold, so an extra mediocre pair can't
+        # outweigh pairing a line with its clearly best partner
+        cost = np.where(sub > threshold, threshold - sub, 0.0)
+        for r, c in zip(*linear_assignment(cost)):
+            if sub[r, c] > threshold:
+                i, j = rest_current[rows[r]], rest_previous[cols[c]]
+                edited.append((j, i))
+                matched_current.add(i)
+                matched_previous.add(j)
+    edited.sort(key=lambda pair: pair[1])
+
+    added = [i for i in rest_current if i not in matched_current]
+    removed = [j for j in rest_previous if j not in matched_previous]
+    return stable, edited, added, removed
+
@@ -0,0 +1,58 @@
+"""
+Message Pool
+============
+Reusable per-frame message slots for host nodes that send many small
+messages every frame (crop configs per face or text region).
+
+A sent message is only referenced by the queues downstream, not copied,
+so a pooled message must not be touched again until those queues have
+moved past it. The pool therefore keeps `depth` frames of messages and
+hands them out round-robin: a slot is reused `depth` frames later, which
+must exceed the number of frames the downstream queues can hold. A node
+that sends at least one message per frame into a queue of N messages can
+have at most N frames queued, plus the one being sent and the one the
+consumer holds; for_queue sizes the pool from N that way, so it follows
+the queue depth instead of being tuned separately.
+"""
+
+from typing import Callable, Generic, List, TypeVar
+
+T = TypeVar("T")
+
+IN_FLIGHT_FRAMES = 2  # Frames held outside the queue: being sent, being consumed
+
+
+class MessagePool(Generic[T]):
+    """Ring of `depth` frames, each a growable list of reusable messages.
+
+    Args:
+        factory: Creates a new message when a frame needs more than before
+        depth: Frames before a slot is reused (> downstream queue depth)
+    """
+
+    def __init__(self, factory: Callable[[], T], depth: int = 8):
+        self.factory = factory
+        self.depth = depth
+        self._frames: List[List[T]] = [[] for _ in range(depth)]
+        self._frame = self._frames[0]
+        self._index = 0
+        self.created = 0
+
+    @classmethod
+    def for_queue(cls, factory: Callable[[], T], queue_depth: int) -> "MessagePool[T]":
+        """Pool for messages sent (at least one per frame) into a queue of
+        `queue_depth` messages."""
+        return cls(factory, queue_depth + IN_FLIGHT_FRAMES)
+
+    def next_frame(self):
+        """Move to the next frame's slots (call once per input message)."""
+        self._index = (self._index + 1) % self.depth
+        self._frame = self._frames[self._index]
+
+    def get(self, i: int) -> T:
+        """Message i of the current frame; the caller resets its contents."""
+        frame = self._frame
+        while len(frame) <= i:
+            frame.append(self.factory())
+            self.created += 1
+        return frame[i]
@@ -9,11 +9,16 @@ Adapted from Luxonis oak-examples gaze estimation.
 import depthai as dai
 from pathlib import Path
 
+# Script config input depth; LandmarksProcessing sizes its config pools
+# from it, so keep the two in step
+CONFIG_QUEUE_DEPTH = 8
+
 
 def create_crop_node(
     pipeline: dai.Pipeline,
     input_frame: dai.Node.Output,
     configs_message: dai.Node.Output,
+    config_queue_depth: int = CONFIG_QUEUE_DEPTH,
 ) -> dai.node.ImageManip:
     """Create a Script + ImageManip pair for cropping regions from frames.
 
@@ -24,6 +29,7 @@ def create_crop_node(
         pipeline: The DepthAI pipeline
         input_frame: Camera output to crop from
         configs_message: MessageGroup of ImageManipConfig crops
+        config_queue_depth: Max MessageGroups queued at the Script input
 
     Returns:
         ImageManip node whose .out produces cropped regions
@@ -36,6 +42,7 @@ def create_crop_node(
     config_sender_script.setScript(script_content)
     config_sender_script.inputs["frame_input"].setBlocking(True)
     config_sender_script.inputs["config_input"].setBlocking(True)
+    config_sender_script.inputs["config_input"].setMaxSize(config_queue_depth)
 
     img_manip_node = pipeline.create(dai.node.ImageManip)
     img_manip_node.initialConfig.setReusePreviousImage(False)
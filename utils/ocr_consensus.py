@@ -0,0 +1,328 @@
+"""
+OCR Consensus
+=============
+Rolling consensus over repeated OCR readings of the same whiteboard.
+
+The same line is usually read with small variations frame to frame:
+    "LSREATEMACIK" (0.85)
+    "LCREATE MACIK" (0.87)
+    "CREATE MAGIK"  (0.92)
+which aggregate into the best guess "CREATE MAGIK" (seen 3x, best 0.92).
+
+Clusters are maintained incrementally: a new reading's lines are matched
+against each cluster's best member only, and when the buffer rolls over the
+expired reading's lines are removed from their clusters again. Per-cluster
+best/count/confidence sums are updated in place, so a reading costs
+O(lines x clusters) similarity checks regardless of buffer size, most of
+which the cheap bounds in utils/text_similarity.py reject outright.
+
+In spatial mode clusters are also keyed by where the line sits on the
+board: each cluster keeps a smoothed detection box, indexed under every
+cell of a coarse grid that the box covers. A new line only considers the
+clusters indexed under its own box's cells, which are exactly those that
+can overlap it however wide the line or far it shifted, and text similarity
+decides only among those that overlap enough. A reading costs roughly
+O(lines) and the same word written in two places stays two clusters.
+Clusters from readings without boxes have no position yet; they are
+matched by text alone and indexed once a boxed line joins them.
+"""
+
+import time
+from collections import deque
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Sequence
+
+from utils.text_similarity import is_similar, normalize
+
+DEFAULT_LINE_CONFIDENCE = 0.5  # Used when a line has no confidence score
+# Spatial index cell size (normalized frame coordinates); wide and short,
+# like text lines, so a line covers only a few cells
+GRID_CELL_X = 0.2
+GRID_CELL_Y = 0.05
+BOX_SMOOTHING = 0.3  # Weight of a new member's box in the cluster box
+
+
+class _Cluster:
+    """Readings of one line: members plus running stats."""
+
+    __slots__ = ("members", "best", "best_key", "confidence_sum", "order",
+                 "box", "cells")
+
+    def __init__(self, order: int):
+        self.members = []  # [text, confidence] lists, identity used for removal
+        self.best = None
+        self.best_key = ""  # Normalized best text, what new lines are matched to
+        self.confidence_sum = 0.0
+        self.order = order  # Creation order, the matching priority
+        self.box = None  # Smoothed xyxy box (spatial mode)
+        self.cells = ()  # Grid cells the box is indexed under
+
+    def add(self, member: list):
+        self.members.append(member)
+        self.confidence_sum += member[1]
+        if self.best is None or member[1] > self.best[1]:
+            self.best = member
+            self.best_key = normalize(member[0])
+
+    def remove(self, member: list):
+        for i, candidate in enumerate(self.members):
+            if candidate is member:
+                del self.members[i]
+                break
+        self.confidence_sum -= member[1]
+        if member is self.best:
+            self.best = max(self.members, key=lambda m: m[1]) if self.members else None
+            self.best_key = normalize(self.best[0]) if self.best else ""
+
+
+def _box_cells(box: Sequence[float]):
+    """Grid cells covered by a box (clamped to the frame)."""
+    x1 = int(min(max(box[0], 0.0), 1.0) // GRID_CELL_X)
+    x2 = int(min(max(box[2], 0.0), 1.0) // GRID_CELL_X)
+    y1 = int(min(max(box[1], 0.0), 1.0) // GRID_CELL_Y)
+    y2 = int(min(max(box[3], 0.0), 1.0) // GRID_CELL_Y)
+    if x1 == x2 and y1 == y2:
+        return ((x1, y1),)
+    return tuple((x, y) for x in range(x1, x2 + 1) for y in range(y1, y2 + 1))
+
+
+def _iou(a: Sequence[float], b: Sequence[float]) -> float:
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class ConfidenceAggregator:
+    """
+    Maintains a rolling buffer of recent OCR readings and finds consensus text.
+
+    Args:
+        buffer_size: Readings kept; the oldest is evicted when full
+        similarity_threshold: Similarity (utils/text_similarity.py) for a
+            line to join a cluster, compared against its best reading
+        spatial: Key clusters by detection box position as well (requires
+            boxes in add_reading)
+        iou_threshold: Box overlap for a line to be at a cluster's position
+    """
+
+    def __init__(self, buffer_size: int = 10, similarity_threshold: float = 0.6,
+                 spatial: bool = False, iou_threshold: float = 0.3):
+        self.buffer = deque()
+        self.buffer_size = buffer_size
+        self.similarity_threshold = similarity_threshold
+        self.spatial = spatial
+        self.iou_threshold = iou_threshold
+        self._grid: Dict[tuple, List[_Cluster]] = {}
+        self._unplaced: List[_Cluster] = []  # Spatial mode clusters without a box
+        self._clusters: List[_Cluster] = []
+        self._next_order = 0
+        self._consensus_text = []
+        self._consensus_confidence = 0.0
+        self._consensus_details = []
+
+    def add_reading(self, text_lines: list, confidence_scores: list,
+                    boxes: Optional[Sequence[Sequence[float]]] = None):
+        """Add a new OCR reading to the buffer.
+
+        Args:
+            text_lines: Recognized text per region
+            confidence_scores: Confidence per line
+            boxes: Normalized xyxy box per line (used in spatial mode)
+        """
+        if not text_lines:
+            return
+        if len(self.buffer) >= self.buffer_size:
+            self._evict(self.buffer.popleft())
+
+        spatial = self.spatial and boxes is not None
+        placed = []  # (cluster, member) per line, for eviction
+        for i, line in enumerate(text_lines):
+            conf = confidence_scores[i] if i < len(confidence_scores) else DEFAULT_LINE_CONFIDENCE
+            member = [line, conf]
+            key = normalize(line)
+            if spatial:
+                cluster = self._match_at(key, boxes[i])
+            else:
+                cluster = self._match(key)
+            if cluster is None:
+                cluster = _Cluster(self._next_order)
+                self._next_order += 1
+                self._clusters.append(cluster)
+                if self.spatial and not spatial:
+                    self._unplaced.append(cluster)
+            cluster.add(member)
+            if spatial:
+                self._move(cluster, boxes[i])
+            placed.append((cluster, member))
+
+        self.buffer.append({
+            'text_lines': text_lines,
+            'confidences': confidence_scores,
+            'timestamp': time.time(),
+            'placed': placed,
+        })
+        self._update_consensus()
+
+    def _match(self, key: str):
+        """First cluster (in creation order) similar enough to key, or None."""
+        threshold = self.similarity_threshold
+        for cluster in self._clusters:
+            if is_similar(key, cluster.best_key, threshold):
+                return cluster
+        return None
+
+    def _match_at(self, key: str, box: Sequence[float]):
+        """Best-overlapping text-similar cluster at box, else the first
+        similar cluster that has no box yet, or None."""
+        cells = _box_cells(box)
+        if len(cells) == 1:
+            candidates = self._grid.get(cells[0], ())
+        else:
+            # Clusters covering several of these cells are listed once
+            candidates = {c: None for cell in cells for c in self._grid.get(cell, ())}
+        best, best_iou = None, 0.0
+        for cluster in candidates:
+            overlap = _iou(box, cluster.box)
+            if overlap < self.iou_threshold or overlap <= best_iou:
+                continue
+            if is_similar(key, cluster.best_key, self.similarity_threshold):
+                best, best_iou = cluster, overlap
+        if best is None:
+            for cluster in self._unplaced:
+                if is_similar(key, cluster.best_key, self.similarity_threshold):
+                    return cluster
+        return best
+
+    def _move(self, cluster: _Cluster, box: Sequence[float]):
+        """Blend box into the cluster's box and re-index it if needed."""
+        if cluster.box is None:
+            cluster.box = list(box)
+            if cluster in self._unplaced:
+                self._unplaced.remove(cluster)
+        else:
+            cluster.box = [old + BOX_SMOOTHING * (new - old)
+                           for old, new in zip(cluster.box, box)]
+        cells = _box_cells(cluster.box)
+        if cells != cluster.cells:
+            self._unindex(cluster)
+            for cell in cells:
+                self._grid.setdefault(cell, []).append(cluster)
+            cluster.cells = cells
+
+    def _unindex(self, cluster: _Cluster):
+        for cell in cluster.cells:
+            bucket = self._grid[cell]
+            bucket.remove(cluster)
+            if not bucket:
+                del self._grid[cell]
+        cluster.cells = ()
+
+    def _evict(self, reading: Dict):
+        emptied = False
+        for cluster, member in reading['placed']:
+            cluster.remove(member)
+            if not cluster.members:
+                emptied = True
+                self._unindex(cluster)
+        if emptied:
+            self._clusters = [c for c in self._clusters if c.members]
+            self._unplaced = [c for c in self._unplaced if c.members]
+
+    def _update_consensus(self):
+        """Rebuild the consensus list from the clusters' running stats."""
+        consensus = []
+        for cluster in self._clusters:
+            times_seen = len(cluster.members)
+            detail = {
+                'text': cluster.best[0],
+                'confidence': cluster.best[1],
+                'times_seen': times_seen,
+                'avg_confidence': cluster.confidence_sum / times_seen,
+            }
+            if cluster.box is not None:
+                detail['box'] = list(cluster.box)
+            consensus.append(detail)
+
+        # Sort by times_seen (most frequent first), then by confidence
+        consensus.sort(key=lambda x: (x['times_seen'], x['confidence']), reverse=True)
+
+        self._consensus_text = [c['text'] for c in consensus]
+        self._consensus_confidence = (
+            sum(c['avg_confidence'] for c in consensus) / len(consensus) if consensus else 0.0
+        )
+        self._consensus_details = consensus
+
+    @property
+    def consensus_text(self) -> list:
+        """Best-guess text lines based on aggregated readings."""
+        return self._consensus_text
+
+    @property
+    def consensus_confidence(self) -> float:
+        """Overall aggregated confidence score."""
+        return self._consensus_confidence
+
+    @property
+    def details(self) -> list:
+        """Detailed consensus info: text, confidence, times_seen, avg_confidence
+        (and box in spatial mode)."""
+        return self._consensus_details
+
+    def format_consensus_summary(self) -> str:
+        """Human-readable summary of the current consensus."""
+        if not self.details:
+            return "No readings yet"
+        parts = []
+        for d in self.details[:5]:
+            seen = f"(seen {d['times_seen']}x, conf {d['avg_confidence']:.0%})"
+            parts.append(f"  \"{d['text']}\" {seen}")
+        return "Best reading:\n" + "\n".join(parts)
+
+    def clear(self):
+        """Reset the aggregator."""
+        self.buffer.clear()
+        self._clusters = []
+        self._grid = {}
+        self._unplaced = []
+        self._consensus_text = []
+        self._consensus_confidence = 0.0
+        self._consensus_details = []
+
+
+def rebuild_consensus(readings: Sequence[Dict], similarity_threshold: float = 0.6):
+    """Cluster a whole buffer from scratch (the original, non-incremental
+    algorithm); kept as the reference for benchmarks/bench_ocr_consensus.py.
+
+    Returns:
+        List of {'text', 'confidence', 'times_seen', 'avg_confidence'},
+        sorted like ConfidenceAggregator.details
+    """
+    clusters = []
+    for reading in readings:
+        for i, line in enumerate(reading['text_lines']):
+            confidences = reading['confidences']
+            conf = confidences[i] if i < len(confidences) else DEFAULT_LINE_CONFIDENCE
+            for cluster in clusters:
+                best_in_cluster = max(cluster, key=lambda x: x[1])
+                sim = SequenceMatcher(None, line.lower(), best_in_cluster[0].lower()).ratio()
+                if sim >= similarity_threshold:
+                    cluster.append((line, conf))
+                    break
+            else:
+                clusters.append([(line, conf)])
+
+    consensus = []
+    for cluster in clusters:
+        best_text, best_conf = max(cluster, key=lambda x: x[1])
+        consensus.append({
+            'text': best_text,
+            'confidence': best_conf,
+            'times_seen': len(cluster),
+            'avg_confidence': sum(c for _, c in cluster) / len(cluster),
+        })
+    consensus.sort(key=lambda x: (x['times_seen'], x['confidence']), reverse=True)
+    return consensus
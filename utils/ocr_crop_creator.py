@@ -1,15 +1,28 @@
 from typing import Optional, Tuple
 
 import depthai as dai
+import numpy as np
 
 from depthai_nodes import ImgDetectionExtended, ImgDetectionsExtended
 
+from utils.message_pool import MessagePool
+from utils.region_cache import RegionCache, region_fingerprints
+
+# Default ImageManip config queue depth the config pool is sized for (see
+# build's config_queue_depth)
+CONFIG_QUEUE_DEPTH = 8
+
 
 class CropConfigsCreator(dai.node.HostNode):
     """A node to create and send a dai.ImageManipConfig crop configuration for each
     detection in a list of detections. An optional target size and resize mode can be
     set to ensure uniform crop sizes.
 
+    With a RegionCache, crops are only sent for regions that are new or
+    changed, and detections_output carries just those regions; the cache
+    supplies the rest when the gathered results are resolved. Linking a
+    frame input lets the cache compare crop fingerprints too.
+
     Adapted from Luxonis oak-examples for whiteboard OCR.
     """
 
@@ -31,6 +44,8 @@ class CropConfigsCreator(dai.node.HostNode):
         self._target_w: int = None
         self._target_h: int = None
         self.resize_mode: dai.ImageManipConfig.ResizeMode = None
+        self._config_pool = MessagePool.for_queue(dai.ImageManipConfig, CONFIG_QUEUE_DEPTH)
+        self.region_cache: Optional[RegionCache] = None
 
     @property
     def w(self) -> int:
@@ -74,8 +89,18 @@ class CropConfigsCreator(dai.node.HostNode):
         source_size: Tuple[int, int],
         target_size: Optional[Tuple[int, int]] = None,
         resize_mode: dai.ImageManipConfig.ResizeMode = dai.ImageManipConfig.ResizeMode.STRETCH,
+        region_cache: Optional[RegionCache] = None,
+        frame_input: Optional[dai.Node.Output] = None,
+        config_queue_depth: int = CONFIG_QUEUE_DEPTH,
     ) -> "CropConfigsCreator":
-        """Link the node input and set the correct source and target image sizes."""
+        """Link the node input and set the correct source and target image sizes.
+
+        region_cache enables recognition skipping for unchanged regions;
+        frame_input (any resolution, synced with the detections) adds crop
+        fingerprints to its change test. config_queue_depth is the max size
+        of the ImageManip config input config_output is linked to; pooled
+        configs are not reused while that queue can still hold them.
+        """
 
         self.w = source_size[0]
         self.h = source_size[1]
@@ -85,12 +110,18 @@ class CropConfigsCreator(dai.node.HostNode):
             self.target_h = target_size[1]
 
         self.resize_mode = resize_mode
+        self.region_cache = region_cache
+        self._config_pool = MessagePool.for_queue(dai.ImageManipConfig, config_queue_depth)
 
-        self.link_args(detections_input)
+        if frame_input is not None:
+            self.link_args(detections_input, frame_input)
+        else:
+            self.link_args(detections_input)
 
         return self
 
-    def process(self, detections_input: dai.Buffer) -> None:
+    def process(self, detections_input: dai.Buffer,
+                frame_input: Optional[dai.ImgFrame] = None) -> None:
         """Process the input detections and create crop configurations."""
 
         assert isinstance(detections_input, (ImgDetectionsExtended, dai.ImgDetections))
@@ -105,8 +136,11 @@ class CropConfigsCreator(dai.node.HostNode):
 
         detections = detections_msg.detections
 
-        # Skip the current frame / load new frame
-        cfg = dai.ImageManipConfig()
+        # Skip the current frame / load new frame. Slot 0 of each pooled
+        # frame is this skip config, region crops use the slots after it.
+        self._config_pool.next_frame()
+        cfg = self._config_pool.get(0)
+        cfg.clearOps()
         cfg.setSkipCurrentImage(True)
         cfg.setTimestamp(timestamp)
         cfg.setSequenceNum(sequence_num)
@@ -114,7 +148,7 @@ class CropConfigsCreator(dai.node.HostNode):
         while not send_status:
             send_status = self.config_output.trySend(cfg)
 
-        valid_detections = []
+        regions = []  # (detection, pixel crop) above the confidence and size limits
         for detection in detections:
             if detection.confidence > 0.8:
                 rect = detection.rotated_rect
@@ -129,21 +163,31 @@ class CropConfigsCreator(dai.node.HostNode):
                 if xmax - xmin < 50 or ymax - ymin < 12:
                     continue
 
-                valid_detections.append(detection)
+                regions.append((detection, (xmin, ymin, xmax, ymax)))
+
+        send = self._plan_recognition(regions, sequence_num, timestamp, frame_input)
 
-                cfg = dai.ImageManipConfig()
-                cfg.addCrop(xmin, ymin, xmax - xmin, ymax - ymin)
+        valid_detections = []
+        for (detection, (xmin, ymin, xmax, ymax)), needed in zip(regions, send):
+            if not needed:
+                continue
+            valid_detections.append(detection)
 
-                if self.target_w is not None and self.target_h is not None:
-                    cfg.setOutputSize(self.target_w, self.target_h, self.resize_mode)
+            cfg = self._config_pool.get(len(valid_detections))
+            cfg.clearOps()
+            cfg.setSkipCurrentImage(False)
+            cfg.addCrop(xmin, ymin, xmax - xmin, ymax - ymin)
 
-                cfg.setReusePreviousImage(True)
-                cfg.setTimestamp(timestamp)
-                cfg.setSequenceNum(sequence_num)
+            if self.target_w is not None and self.target_h is not None:
+                cfg.setOutputSize(self.target_w, self.target_h, self.resize_mode)
 
-                send_status = False
-                while not send_status:
-                    send_status = self.config_output.trySend(cfg)
+            cfg.setReusePreviousImage(True)
+            cfg.setTimestamp(timestamp)
+            cfg.setSequenceNum(sequence_num)
+
+            send_status = False
+            while not send_status:
+                send_status = self.config_output.trySend(cfg)
 
         valid_msg = ImgDetectionsExtended()
         valid_msg.setSequenceNum(sequence_num)
@@ -153,6 +197,21 @@ class CropConfigsCreator(dai.node.HostNode):
 
         self.detections_output.send(valid_msg)
 
+    def _plan_recognition(self, regions: list, sequence_num: int, timestamp,
+                          frame_input: Optional[dai.ImgFrame]) -> list:
+        """Which regions need a recognition crop (all without a cache)."""
+        if self.region_cache is None:
+            return [True] * len(regions)
+        boxes = np.array([crop for _, crop in regions], dtype=np.float64).reshape(-1, 4)
+        boxes /= (self.w, self.h, self.w, self.h)
+        fingerprints = None
+        if frame_input is not None and len(boxes):
+            fingerprints = region_fingerprints(frame_input.getCvFrame(), boxes)
+        return self.region_cache.plan(
+            sequence_num, timestamp.total_seconds(),
+            [detection for detection, _ in regions], boxes, fingerprints,
+        ).tolist()
+
     def _expand_rect(self, rect: dai.RotatedRect) -> dai.RotatedRect:
         s = rect.size
         rect.size = dai.Size2f(s.width * 1.03, s.height * 1.10)
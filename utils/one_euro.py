@@ -0,0 +1,112 @@
+"""
+One-Euro Filter Bank
+====================
+Adaptive low-pass filtering of per-face signals (gaze vector, head pose),
+vectorized across tracked faces.
+
+The One-Euro filter (Casiez et al., CHI 2012) is an exponential smoother
+whose cutoff frequency rises with the signal's speed: a steady gaze is
+smoothed hard (no jitter), while a real glance raises the cutoff so the
+output follows with little lag. Smoothing is keyed by device timestamp, so
+it behaves the same at any FPS.
+
+All tracks live in one (tracks, dims) state array; each frame updates the
+present faces with a handful of NumPy operations regardless of face count.
+"""
+
+import math
+from typing import Sequence
+
+import numpy as np
+
+
+def _alpha(cutoff: np.ndarray, dt: np.ndarray) -> np.ndarray:
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilterBank:
+    """One-Euro filters for D-dimensional signals of many tracks.
+
+    Args:
+        min_cutoff: Cutoff (Hz) for a still signal, scalar or per dimension;
+            lower removes more jitter
+        beta: Cutoff increase per unit/s of speed, scalar or per dimension;
+            higher reduces lag on fast movements
+        d_cutoff: Cutoff (Hz) for the speed estimate
+    """
+
+    def __init__(self, dims: int, min_cutoff=1.0, beta=3.0, d_cutoff: float = 1.0):
+        self.dims = dims
+        self.min_cutoff = np.broadcast_to(np.asarray(min_cutoff, dtype=np.float64), (dims,))
+        self.beta = np.broadcast_to(np.asarray(beta, dtype=np.float64), (dims,))
+        self.d_cutoff = d_cutoff
+
+        self._rows = {}  # track ID -> row in the state arrays
+        self._free = []
+        self._x = np.zeros((0, dims))
+        self._dx = np.zeros((0, dims))
+        self._t = np.zeros(0)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _row(self, track_id: int) -> int:
+        row = self._rows.get(track_id)
+        if row is not None:
+            return row
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = len(self._x)
+            grow = max(4, row)
+            self._x = np.concatenate([self._x, np.zeros((grow, self.dims))])
+            self._dx = np.concatenate([self._dx, np.zeros((grow, self.dims))])
+            self._t = np.concatenate([self._t, np.zeros(grow)])
+            self._free.extend(range(row + grow - 1, row, -1))
+        self._rows[track_id] = row
+        self._x[row] = np.nan  # Marks a fresh track: first sample passes through
+        self._dx[row] = 0.0
+        return row
+
+    def filter(self, track_ids: Sequence[int], timestamp: float,
+               values: np.ndarray) -> np.ndarray:
+        """Smooth one frame of (N, D) values for N tracks.
+
+        NaN inputs (e.g. a missing head pose) leave that track's dimension
+        unchanged and are returned as NaN.
+
+        Args:
+            track_ids: Track ID per row of values
+            timestamp: Frame time in seconds (device clock)
+            values: (N, D) raw signals
+
+        Returns:
+            (N, D) smoothed signals
+        """
+        if not len(track_ids):
+            return np.empty((0, self.dims))
+        rows = np.fromiter((self._row(t) for t in track_ids), dtype=np.intp,
+                           count=len(track_ids))
+        prev = self._x[rows]
+        fresh = np.isnan(prev)
+        missing = np.isnan(values)
+
+        dt = np.maximum(timestamp - self._t[rows], 1e-3)[:, None]
+        dx = np.where(fresh | missing, 0.0, (values - prev) / dt)
+        dx_hat = self._dx[rows] + _alpha(self.d_cutoff, dt) * (dx - self._dx[rows])
+        cutoff = self.min_cutoff + self.beta * np.abs(dx_hat)
+        x_hat = prev + _alpha(cutoff, dt) * (values - prev)
+        x_hat = np.where(fresh, values, x_hat)
+        x_hat = np.where(missing, prev, x_hat)
+
+        self._x[rows] = x_hat
+        self._dx[rows] = np.where(missing, self._dx[rows], dx_hat)
+        self._t[rows] = timestamp
+        return np.where(missing, np.nan, x_hat)
+
+    def forget(self, track_id: int):
+        """Drop a track's state (e.g. when the face tracker evicts it)."""
+        row = self._rows.pop(track_id, None)
+        if row is not None:
+            self._free.append(row)
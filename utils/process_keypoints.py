@@ -4,12 +4,28 @@ Landmarks Processing for Gaze Estimation Pipeline
 ThreadedHostNode that processes YuNet face detection keypoints
 and produces crop configurations for left eye, right eye, and face.
 
+With a face budget set, only the most important faces (plus round-robin
+turns for the rest, see utils.face_budget) get crops each frame, and the
+matching subset of detections is sent on detections_output so downstream
+gathering stays aligned; every face of the frame, served or not, goes out
+on present_output so trackers can keep deferred faces alive. With a face
+limit set, faces beyond it (lowest detection confidence first) get no
+crops at all, which bounds the per-face messages of a frame for queues
+sized from it.
+
+Crop configs come from a MessagePool and are reset with clearOps() rather
+than allocated per face per frame.
+
 Adapted from Luxonis oak-examples gaze estimation.
 """
 
 import depthai as dai
 from depthai_nodes import ImgDetectionExtended, ImgDetectionsExtended
 
+from utils.face_budget import FaceBudget
+from utils.message_pool import MessagePool
+from utils.node_creators import CONFIG_QUEUE_DEPTH
+
 
 class LandmarksProcessing(dai.node.ThreadedHostNode):
     """Process face detection keypoints into crop configs for eyes and face.
@@ -19,6 +35,9 @@ class LandmarksProcessing(dai.node.ThreadedHostNode):
     - left_config_output: crops around left eye
     - right_config_output: crops around right eye
     - face_config_output: crops of the full face bounding box
+    and detections_output, the detections the crops were made for (all of
+    them unless a face budget is set). With a face budget, present_output
+    carries every face of the frame, served or deferred.
     """
 
     def __init__(self):
@@ -27,6 +46,8 @@ class LandmarksProcessing(dai.node.ThreadedHostNode):
         self.left_config_output = self.createOutput()
         self.right_config_output = self.createOutput()
         self.face_config_output = self.createOutput()
+        self.detections_output = self.createOutput()
+        self.present_output = self.createOutput()
 
         self._w = 1
         self._h = 1
@@ -34,6 +55,15 @@ class LandmarksProcessing(dai.node.ThreadedHostNode):
         self._target_w = 100
         self._target_h = 100
 
+        self._budget = None  # FaceBudget, only when a budget is set
+        self._max_faces = None
+
+        # One MessageGroup per frame goes to each crop Script's config input
+        self._left_pool = MessagePool.for_queue(dai.ImageManipConfig, CONFIG_QUEUE_DEPTH)
+        self._right_pool = MessagePool.for_queue(dai.ImageManipConfig, CONFIG_QUEUE_DEPTH)
+        self._face_pool = MessagePool.for_queue(dai.ImageManipConfig, CONFIG_QUEUE_DEPTH)
+        self._keys = []  # MessageGroup keys per face index, built once
+
     def run(self) -> None:
         while self.isRunning():
             img_detections = self.detections_input.get()
@@ -41,9 +71,22 @@ class LandmarksProcessing(dai.node.ThreadedHostNode):
             sequence_num = img_detections.getSequenceNum()
             timestamp = img_detections.getTimestamp()
 
+            if self._max_faces and len(detections) > self._max_faces:
+                detections = self._strongest(detections)
+            if self._budget is not None:
+                self.present_output.send(self._detections_message(img_detections, detections))
+                selected = self._budget.select(detections, timestamp.total_seconds())
+                detections = [detections[i] for i in selected]
+            self.detections_output.send(self._detections_message(img_detections, detections))
+
             left_configs_message = dai.MessageGroup()
             right_configs_message = dai.MessageGroup()
             face_configs_message = dai.MessageGroup()
+            self._left_pool.next_frame()
+            self._right_pool.next_frame()
+            self._face_pool.next_frame()
+            while len(self._keys) < len(detections):
+                self._keys.append(str(len(self._keys) + 100))
             for i, detection in enumerate(detections):
                 detection: ImgDetectionExtended = detection
                 keypoints = detection.keypoints
@@ -53,21 +96,21 @@ class LandmarksProcessing(dai.node.ThreadedHostNode):
                 right_eye = self.crop_rectangle(
                     keypoints[0], face_w * 0.25, face_h * 0.25
                 )
-                right_configs_message[str(i + 100)] = self.create_crop_cfg(
-                    right_eye, img_detections
+                right_configs_message[self._keys[i]] = self.create_crop_cfg(
+                    right_eye, img_detections, self._right_pool.get(i)
                 )
 
                 left_eye = self.crop_rectangle(
                     keypoints[1], face_w * 0.25, face_h * 0.25
                 )
-                left_configs_message[str(i + 100)] = self.create_crop_cfg(
-                    left_eye, img_detections
+                left_configs_message[self._keys[i]] = self.create_crop_cfg(
+                    left_eye, img_detections, self._left_pool.get(i)
                 )
 
                 face_rect = detection.rotated_rect
                 face_rect = face_rect.denormalize(self.w, self.h)
-                face_configs_message[str(i + 100)] = self.create_crop_cfg(
-                    face_rect, img_detections
+                face_configs_message[self._keys[i]] = self.create_crop_cfg(
+                    face_rect, img_detections, self._face_pool.get(i)
                 )
 
             left_configs_message.setSequenceNum(sequence_num)
@@ -95,9 +138,15 @@ class LandmarksProcessing(dai.node.ThreadedHostNode):
         return croped_rectangle.denormalize(self.w, self.h)
 
     def create_crop_cfg(
-        self, rectangle: dai.RotatedRect, img_detections: ImgDetectionsExtended
+        self,
+        rectangle: dai.RotatedRect,
+        img_detections: ImgDetectionsExtended,
+        cfg: dai.ImageManipConfig = None,
     ):
-        cfg = dai.ImageManipConfig()
+        if cfg is None:
+            cfg = dai.ImageManipConfig()
+        else:
+            cfg.clearOps()
         cfg.addCropRotatedRect(rectangle, normalizedCoords=False)
         cfg.setOutputSize(self.target_w, self.target_h)
         cfg.setReusePreviousImage(False)
@@ -114,6 +163,43 @@ class LandmarksProcessing(dai.node.ThreadedHostNode):
         self._w = w
         self._h = h
 
+    @staticmethod
+    def _detections_message(img_detections: ImgDetectionsExtended,
+                            detections: list) -> ImgDetectionsExtended:
+        """img_detections itself if detections are all of it, else a copy
+        of its metadata carrying just detections."""
+        if len(detections) == len(img_detections.detections):
+            return img_detections
+        msg = ImgDetectionsExtended()
+        msg.setSequenceNum(img_detections.getSequenceNum())
+        msg.setTimestamp(img_detections.getTimestamp())
+        msg.detections = detections
+        msg.setTransformation(img_detections.getTransformation())
+        return msg
+
+    def set_max_faces(self, max_faces: int):
+        """Crop at most `max_faces` faces per frame (None or 0 = no limit)."""
+        self._max_faces = max_faces
+
+    def _strongest(self, detections: list) -> list:
+        """The max_faces most confident detections, in detection order."""
+        ranked = sorted(range(len(detections)), key=lambda i: -detections[i].confidence)
+        return [detections[i] for i in sorted(ranked[:self._max_faces])]
+
+    def set_face_budget(self, budget: int, max_defer: int = 10):
+        """Limit crops to `budget` faces per frame (None or 0 = no limit).
+
+        Faces left out are deferred about `max_defer` frames in a row,
+        longer when more faces are overdue than the budget serves.
+        """
+        self._budget = FaceBudget(budget, max_defer) if budget else None
+
+    @property
+    def budget_stats(self):
+        """Faces seen/served/deferred so far (see FaceBudget.stats), or
+        None without a budget."""
+        return self._budget.stats if self._budget is not None else None
+
     @property
     def w(self):
         return self._w
@@ -0,0 +1,233 @@
+"""
+Recognition Region Cache
+========================
+Skips the text-recognition NN for whiteboard regions that have not changed.
+
+CropConfigsCreator asks the cache which regions of a frame need recognition
+(plan), sends crops only for those, and the main loop merges the fresh
+recognitions with the cached ones for the untouched regions (resolve):
+
+    region boxes --plan--> [send, cached, send, cached, ...]
+    gathered recognitions --resolve--> every region's latest recognition
+
+A region is matched to a cache entry by box IoU (the entry keeps the last
+box it was seen at, so detector jitter doesn't break the match). It is
+recognized again when its crop fingerprint (a small normalized thumbnail,
+available when the node gets frames) differs from the one recognized, when
+the cached result is older than refresh_seconds, or when there is no result
+yet. Fingerprints catch rewritten lines; a single changed character in a
+long line is below the noise and waits for the refresh. A region already
+sent is not sent again while its recognition is on the way, unless that
+takes longer than pending_timeout (the gathered message was dropped).
+
+Both sides run in the same process (the crop creator is a host node), so
+the cache is one shared object guarded by a lock.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from utils.face_tracker import iou_matrix
+
+FINGERPRINT_SIZE = (32, 8)  # (width, height) of the crop thumbnail
+MAX_PLANS = 64  # Frames awaiting resolve; older plans were dropped downstream
+
+
+def region_fingerprints(frame: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """Small normalized grayscale thumbnail of each region.
+
+    Args:
+        frame: Grayscale or BGR image
+        boxes: (N, 4) normalized xyxy boxes
+
+    Returns:
+        (N, height, width) float32 array, zero mean and unit standard
+        deviation so exposure and contrast changes don't count as edits
+    """
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    h, w = frame.shape[:2]
+    thumbs = np.zeros((len(boxes), FINGERPRINT_SIZE[1], FINGERPRINT_SIZE[0]), np.uint8)
+    pixels = np.clip(np.asarray(boxes) * (w, h, w, h), 0, (w, h, w, h)).astype(int)
+    for i, (x1, y1, x2, y2) in enumerate(pixels.tolist()):
+        if x2 - x1 < 2 or y2 - y1 < 2:
+            continue
+        thumbs[i] = cv2.resize(frame[y1:y2, x1:x2], FINGERPRINT_SIZE,
+                               interpolation=cv2.INTER_AREA)
+    # Normalized in one batch; per-thumbnail NumPy calls would dominate
+    prints = thumbs.astype(np.float32)
+    prints -= prints.mean(axis=(1, 2), keepdims=True)
+    prints /= np.maximum(prints.std(axis=(1, 2), keepdims=True), 1.0)
+    return prints
+
+
+class _Entry:
+    __slots__ = ("box", "fingerprint", "result", "recognized_at", "pending_since",
+                 "last_seen")
+
+    def __init__(self, box: np.ndarray, timestamp: float):
+        self.box = box
+        self.fingerprint = None  # Of the crop last sent for recognition
+        self.result = None  # Latest recognition message
+        self.recognized_at = None  # Timestamp of the frame it was sent from
+        self.pending_since = None  # Timestamp a recognition was requested
+        self.last_seen = timestamp
+
+
+class RegionCache:
+    """Per-region recognition results, shared by the crop creator and the
+    main loop.
+
+    Args:
+        iou_threshold: Box overlap for a region to be the same cached region
+        max_difference: Mean absolute fingerprint difference (in standard
+            deviations of the thumbnail) above which a region counts as changed
+        refresh_seconds: Re-recognize unchanged regions this often
+        max_age: Forget regions not detected for this many seconds
+        pending_timeout: Resend a region whose recognition hasn't arrived
+    """
+
+    def __init__(
+        self,
+        iou_threshold: float = 0.7,
+        max_difference: float = 0.5,
+        refresh_seconds: float = 10.0,
+        max_age: float = 5.0,
+        pending_timeout: float = 1.0,
+    ):
+        self.iou_threshold = iou_threshold
+        self.max_difference = max_difference
+        self.refresh_seconds = refresh_seconds
+        self.max_age = max_age
+        self.pending_timeout = pending_timeout
+
+        self._lock = threading.Lock()
+        self._entries: List[_Entry] = []
+        self._plans = OrderedDict()  # Sequence number -> (timestamp, rows)
+        self.hits = 0
+        self.misses = 0
+
+    def plan(
+        self,
+        sequence_num: int,
+        timestamp: float,
+        detections: Sequence,
+        boxes: np.ndarray,
+        fingerprints: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Decide which regions of a frame need recognition.
+
+        Args:
+            sequence_num: Sequence number of the detections message that
+                will reach resolve
+            timestamp: Frame timestamp in seconds (device clock)
+            detections: Regions of the frame
+            boxes: (N, 4) normalized xyxy box per region
+            fingerprints: region_fingerprints of the frame, if available
+
+        Returns:
+            (N,) bool array, True where a crop must be sent
+        """
+        send = np.ones(len(boxes), dtype=bool)
+        with self._lock:
+            self._entries = [e for e in self._entries
+                             if timestamp - e.last_seen <= self.max_age]
+            matched = np.full(len(boxes), -1, dtype=np.intp)
+            if len(boxes) and self._entries:
+                iou = iou_matrix(np.array([e.box for e in self._entries]), boxes)
+                best = iou.argmax(0)
+                ok = iou[best, np.arange(len(boxes))] >= self.iou_threshold
+                matched[ok] = best[ok]
+
+            rows = []
+            claimed = set()
+            for i, detection in enumerate(detections):
+                k = int(matched[i])
+                if k >= 0 and k not in claimed:
+                    claimed.add(k)
+                    entry = self._entries[k]
+                    entry.box = boxes[i]
+                    entry.last_seen = timestamp
+                else:
+                    entry = _Entry(boxes[i], timestamp)
+                    self._entries.append(entry)
+                fingerprint = fingerprints[i] if fingerprints is not None else None
+                send[i] = self._needs_recognition(entry, fingerprint, timestamp)
+                if send[i]:
+                    entry.fingerprint = fingerprint
+                    entry.pending_since = timestamp
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                rows.append((detection, entry, bool(send[i])))
+
+            self._plans[sequence_num] = (timestamp, rows)
+            while len(self._plans) > MAX_PLANS:
+                self._plans.popitem(last=False)
+        return send
+
+    def _needs_recognition(self, entry: _Entry, fingerprint: Optional[np.ndarray],
+                           timestamp: float) -> bool:
+        if entry.pending_since is not None:
+            # Already on the way; fall through only if it got lost
+            return timestamp - entry.pending_since > self.pending_timeout
+        if entry.result is None:
+            return True
+        if timestamp - entry.recognized_at > self.refresh_seconds:
+            return True
+        if fingerprint is not None and entry.fingerprint is not None:
+            return float(np.abs(fingerprint - entry.fingerprint).mean()) > self.max_difference
+        return False
+
+    def resolve(self, sequence_num: int, detections: Sequence,
+                recognitions: Sequence) -> Tuple[list, list]:
+        """Merge a gathered frame's recognitions with the cached ones.
+
+        Args:
+            sequence_num: Sequence number of the gathered detections message
+            detections: Regions that were sent for recognition
+            recognitions: Their recognitions, aligned with detections
+
+        Returns:
+            (detections, recognitions) for every region of the frame that
+            has a result, in detection order; the inputs unchanged if the
+            frame wasn't planned here
+        """
+        with self._lock:
+            planned = self._plans.pop(sequence_num, None)
+            if planned is None:
+                return list(detections), list(recognitions)
+            timestamp, rows = planned
+            all_detections, all_recognitions = [], []
+            sent = iter(recognitions)
+            for detection, entry, was_sent in rows:
+                if was_sent:
+                    recognition = next(sent, None)
+                    if recognition is not None:
+                        entry.result = recognition
+                        entry.recognized_at = timestamp
+                        entry.pending_since = None
+                if entry.result is not None:
+                    all_detections.append(detection)
+                    all_recognitions.append(entry.result)
+            return all_detections, all_recognitions
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def stats(self) -> dict:
+        """Hit/miss counters for the status file."""
+        with self._lock:
+            return {
+                "regions_cached": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hit_rate, 3),
+            }
@@ -0,0 +1,57 @@
+"""
+Time-Based Rolling Window
+=========================
+Rolling mean over the last N seconds of samples, keyed by device timestamp.
+
+Frame-count windows (deque(maxlen=30)) change meaning with --fps-limit:
+30 frames is 6 s on RVC2 at 5 FPS but 1 s on RVC4 at 30 FPS. A time window
+keeps smoothing identical across platforms. The running sum is updated on
+every add/expire, so reading the mean is O(1) instead of re-summing.
+"""
+
+from collections import deque
+
+
+class TimeWindow:
+    """Running sum and mean of numeric (or bool) samples over a time span.
+
+    Samples older than `duration` seconds relative to the newest timestamp
+    are expired on add(). Timestamps must be non-decreasing.
+    """
+
+    def __init__(self, duration: float):
+        self.duration = duration
+        self._samples = deque()  # (timestamp, value)
+        self._sum = 0.0
+
+    def add(self, timestamp: float, value: float):
+        """Add a sample and expire anything older than the window."""
+        self._samples.append((timestamp, value))
+        self._sum += value
+        self.expire(timestamp)
+
+    def expire(self, now: float):
+        """Drop samples older than `duration` seconds before `now`."""
+        samples = self._samples
+        cutoff = now - self.duration
+        while samples and samples[0][0] < cutoff:
+            _, value = samples.popleft()
+            self._sum -= value
+        if not samples:
+            self._sum = 0.0  # Reset float drift when the window empties
+
+    def clear(self):
+        self._samples.clear()
+        self._sum = 0.0
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    @property
+    def mean(self) -> float:
+        """Mean of samples in the window (0.0 when empty)."""
+        return self._sum / len(self._samples) if self._samples else 0.0
+
+    def __len__(self) -> int:
+        return len(self._samples)
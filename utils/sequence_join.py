@@ -0,0 +1,49 @@
+"""
+Sequence Number Join
+====================
+Bounded host-side buffer that pairs per-face messages from one pipeline
+branch with the frame they belong to in another, by sequence number.
+
+Every crop made from a frame inherits that frame's sequence number, so all
+per-face outputs of one frame share it and arrive in detection order. Items
+are buffered per sequence number until the reference for that frame is
+consumed; older sequences are dropped as soon as a newer reference arrives
+and the buffer never holds more than `max_sequences` frames, so a stalled
+consumer costs bounded memory and never blocks the pipeline.
+"""
+
+from collections import OrderedDict
+from typing import Any, List
+
+
+class SequenceJoin:
+    """Group items by sequence number and hand them out per reference."""
+
+    def __init__(self, max_sequences: int = 16):
+        self.max_sequences = max_sequences
+        self._items = OrderedDict()  # sequence number -> [item, ...]
+
+    def add(self, sequence_num: int, item: Any):
+        """Buffer one item (e.g. one face's head pose) for a frame."""
+        items = self._items.get(sequence_num)
+        if items is None:
+            items = self._items[sequence_num] = []
+            while len(self._items) > self.max_sequences:
+                self._items.popitem(last=False)
+        items.append(item)
+
+    def pop(self, sequence_num: int) -> List[Any]:
+        """Return and remove the items for a frame ([] if none arrived).
+
+        Sequences older than `sequence_num` can no longer be matched and
+        are discarded.
+        """
+        while self._items:
+            oldest = next(iter(self._items))
+            if oldest >= sequence_num:
+                break
+            del self._items[oldest]
+        return self._items.pop(sequence_num, [])
+
+    def __len__(self) -> int:
+        return len(self._items)
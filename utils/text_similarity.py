@@ -0,0 +1,159 @@
+"""
+Text Similarity
+===============
+Fast, cached fuzzy string similarity for OCR change detection and
+consensus, shared by whiteboard_reader_full.py and utils/ocr_consensus.py.
+
+The score is the normalized Indel similarity, 2 * LCS / (len(a) + len(b)),
+which is what difflib.SequenceMatcher.ratio() approximates (its matching
+blocks give a lower bound on the longest common subsequence). Exact LCS is
+computed with a bit-parallel algorithm (Hyyrö 2004) on Python ints, one
+pass over the second string, or by rapidfuzz when it is installed.
+
+Strings are normalized (lowercased, trimmed) once and cached, threshold
+checks try cheap upper bounds (length ratio, then character histograms)
+before the full score, and pair scores are memoized in a bounded LRU.
+"""
+
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+try:
+    from rapidfuzz.distance import Indel
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+CACHE_SIZE = 8192  # Entries per cache (normalized strings, masks, pairs)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize(text: str) -> str:
+    """Comparison form of a line: lowercased, surrounding space trimmed."""
+    return text.lower().strip()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _char_masks(text: str) -> dict:
+    """Bit mask of each character's positions in text."""
+    masks = {}
+    for i, ch in enumerate(text):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    return masks
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _histogram(text: str) -> dict:
+    counts = {}
+    for ch in text:
+        counts[ch] = counts.get(ch, 0) + 1
+    return counts
+
+
+def _lcs_length(a: str, b: str) -> int:
+    """Length of the longest common subsequence (bit-parallel)."""
+    if len(a) < len(b):
+        a, b = b, a  # Fewer iterations over the shorter string
+    masks = _char_masks(a)
+    full = (1 << len(a)) - 1
+    row = full
+    for ch in b:
+        matches = row & masks.get(ch, 0)
+        row = ((row + matches) | (row - matches)) & full
+    return len(a) - bin(row).count("1")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _pair_similarity(a: str, b: str) -> float:
+    """Similarity of two normalized strings, ordered so (a, b) == (b, a)."""
+    total = len(a) + len(b)
+    if not total:
+        return 1.0
+    if RAPIDFUZZ_AVAILABLE:
+        return Indel.normalized_similarity(a, b)
+    return 2.0 * _lcs_length(a, b) / total
+
+
+def similarity(a: str, b: str) -> float:
+    """Similarity of two lines, 0.0 (nothing in common) to 1.0 (equal)."""
+    a, b = normalize(a), normalize(b)
+    if a == b:
+        return 1.0
+    return _pair_similarity(a, b) if a < b else _pair_similarity(b, a)
+
+
+def _upper_bound(a: str, b: str) -> float:
+    """Character-histogram bound for normalized strings (difflib's
+    quick_ratio): a common subsequence can't use a character more often
+    than both strings contain it."""
+    total = len(a) + len(b)
+    if not total:
+        return 1.0
+    counts_a, counts_b = _histogram(a), _histogram(b)
+    if len(counts_a) > len(counts_b):
+        counts_a, counts_b = counts_b, counts_a
+    common = 0
+    for ch, count in counts_a.items():
+        other = counts_b.get(ch, 0)
+        common += count if count < other else other
+    return 2.0 * common / total
+
+
+def upper_bound(a: str, b: str) -> float:
+    """Cheap upper bound on similarity(a, b)."""
+    return _upper_bound(normalize(a), normalize(b))
+
+
+def is_similar(a: str, b: str, threshold: float) -> bool:
+    """similarity(a, b) >= threshold, skipping the full score when the
+    length or character-histogram bound already rules it out."""
+    a, b = normalize(a), normalize(b)
+    if a == b:
+        return True
+    # Length bound: the LCS is at most the shorter string
+    if 2.0 * min(len(a), len(b)) / (len(a) + len(b)) < threshold:
+        return False
+    if _upper_bound(a, b) < threshold:
+        return False
+    return similarity(a, b) >= threshold
+
+
+def best_match(line: str, candidates: Iterable[str],
+               threshold: float = 0.0) -> Tuple[Optional[str], float]:
+    """Most similar candidate to line (the first one on ties), if its score
+    exceeds threshold.
+
+    Candidates are scored in order of their upper bounds, and scoring stops
+    once no remaining bound can reach the best score so far.
+
+    Returns:
+        (candidate, score), or (None, 0.0) if no score exceeds threshold
+    """
+    key = normalize(line)
+    bounded = sorted(
+        (-_upper_bound(key, normalize(c)), i, c) for i, c in enumerate(candidates)
+    )
+    best, best_index, best_score = None, -1, threshold
+    for negative_bound, i, candidate in bounded:
+        if -negative_bound < best_score or -negative_bound <= threshold:
+            break
+        score = similarity(key, candidate)
+        if score > best_score or (best is not None and score == best_score
+                                  and i < best_index):
+            best, best_index, best_score = candidate, i, score
+    if best is None:
+        return None, 0.0
+    return best, best_score
+
+
+def cache_info() -> dict:
+    """Hit/miss counters of the normalization and pair caches."""
+    return {
+        "normalize": normalize.cache_info()._asdict(),
+        "pairs": _pair_similarity.cache_info()._asdict(),
+    }
+
+
+def clear_caches():
+    for cached in (normalize, _char_masks, _histogram, _pair_similarity):
+        cached.cache_clear()
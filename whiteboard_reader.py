@@ -26,7 +26,7 @@ import socket
 import getpass
 from pathlib import Path
 from datetime import datetime
-from collections import deque
+from utils.rolling_window import TimeWindow
 
 # Load environment variables for Discord webhook
 try:
@@ -67,8 +67,9 @@ log_file = None
 last_text_content = []  # List of detected text lines
 last_text_detected = False
 
-# Temporal smoothing for text detection
-text_detection_history = deque(maxlen=5)  # Track last 5 frames
+# Temporal smoothing for text detection (time-based, device clock)
+TEXT_WINDOW_SECONDS = 1.0  # Same span as the old 5 frames at 5 FPS
+text_detection_window = TimeWindow(TEXT_WINDOW_SECONDS)
 
 # Debouncing for Discord notifications
 pending_state = None
@@ -351,10 +352,12 @@ def run_detection():
                         num_regions = len(det_msg.detections)
 
                     text_detected = num_regions > 0
-                    text_detection_history.append(text_detected)
+                    text_detection_window.add(
+                        det_msg.getTimestamp().total_seconds(), text_detected
+                    )
 
-                    # Smoothed detection (majority vote from last 5 frames)
-                    smoothed_detection = sum(text_detection_history) >= len(text_detection_history) / 2
+                    # Smoothed detection (majority vote over the last second)
+                    smoothed_detection = text_detection_window.mean >= 0.5
 
                     current_time = time.time()
 
@@ -17,6 +17,12 @@ Usage:
 import depthai as dai
 from depthai_nodes.node import ParsingNeuralNetwork, GatherData
 from utils.ocr_crop_creator import CropConfigsCreator
+from utils.rolling_window import TimeWindow
+from utils.ocr_consensus import ConfidenceAggregator
+from utils.region_cache import RegionCache
+from utils.board_gate import BoardChangeGate
+from utils.text_similarity import similarity
+from utils.line_matching import match_lines
 import argparse
 import time
 import os
@@ -27,8 +33,6 @@ import socket
 import getpass
 from pathlib import Path
 from datetime import datetime
-from collections import deque
-from difflib import SequenceMatcher
 import random
 
 # Load environment variables for Discord webhook
@@ -62,10 +66,23 @@ parser.add_argument('--device', type=str, default=None,
                     help='Optional DeviceID or IP of the camera')
 parser.add_argument('--confidence', type=float, default=0.25,
                     help='Minimum confidence threshold for text recognition (default: 0.25)')
+parser.add_argument('--consensus-buffer', type=int, default=10,
+                    help='Recent readings the consensus text is built from (default: 10)')
+parser.add_argument('--spatial-consensus', action='store_true',
+                    help='Match consensus lines by board position first, then text '
+                         '(keeps repeated words in different places apart)')
+parser.add_argument('--no-recognition-cache', action='store_true',
+                    help='Recognize every text region on every frame instead of '
+                         'reusing results for unchanged regions')
+parser.add_argument('--no-change-gate', action='store_true',
+                    help='Post-process every OCR result instead of skipping them '
+                         'while the board looks unchanged')
 args = parser.parse_args()
 
 # Camera resolution (larger than model input to keep detail)
 REQ_WIDTH, REQ_HEIGHT = 1152, 640
+GATE_PREVIEW_SIZE = (128, 72)  # Grayscale preview the board change gate hashes
+CROP_QUEUE_DEPTH = 30  # Crop ImageManip config/image queues (sizes the config pool)
 
 # Global state tracking
 log_file = None
@@ -73,8 +90,9 @@ last_text_content = []  # List of detected text lines
 last_text_detected = False
 last_confirmed_text = []  # Last stable/confirmed text (after debouncing)
 
-# Temporal smoothing for text detection
-text_detection_history = deque(maxlen=5)  # Track last 5 frames
+# Temporal smoothing for text detection (time-based, device clock)
+TEXT_WINDOW_SECONDS = 1.0  # Same span as the old 5 frames at 5 FPS
+text_detection_window = TimeWindow(TEXT_WINDOW_SECONDS)
 
 # Debouncing for Discord notifications
 pending_state = None
@@ -173,7 +191,8 @@ def send_discord_notification(message: str, force: bool = False):
 
 
 def update_status_file(text_detected: bool, text_content: list, num_regions: int,
-                       running: bool = True, username: str = None, hostname: str = None):
+                       running: bool = True, username: str = None, hostname: str = None,
+                       recognition_cache: dict = None, change_gate: dict = None):
     """Update status file for Discord bot integration."""
     try:
         status_data = {
@@ -183,6 +202,10 @@ def update_status_file(text_detected: bool, text_content: list, num_regions: int
             "timestamp": datetime.now().isoformat(),
             "running": running
         }
+        if recognition_cache is not None:
+            status_data["recognition_cache"] = recognition_cache
+        if change_gate is not None:
+            status_data["change_gate"] = change_gate
 
         # Add user and hostname if provided
         if username:
@@ -227,9 +250,9 @@ def log_text_history(text_lines: list, num_regions: int, avg_confidence: float =
 def string_similarity(a: str, b: str) -> float:
     """
     Calculate similarity between two strings (0.0 to 1.0).
-    Uses SequenceMatcher for fuzzy matching.
+    Uses the cached edit-distance ratio from utils/text_similarity.py.
     """
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+    return similarity(a, b)
 
 
 def detect_text_changes(current_text: list, previous_text: list):
@@ -263,33 +286,13 @@ def detect_text_changes(current_text: list, previous_text: list):
     union = len(current_set | previous_set)
     jaccard = intersection / union if union > 0 else 0.0
 
-    # Detect specific changes
-    new_lines = []
-    removed_lines = list(previous_set - current_set)
-    edited_pairs = []
-
-    # Check for new or edited lines
-    for curr_line in current_text:
-        if curr_line in previous_text:
-            continue  # Exact match - stable
-
-        # Check if it's similar to any previous line (edit detection)
-        best_match = None
-        best_similarity = 0.0
-        for prev_line in previous_text:
-            sim = string_similarity(curr_line, prev_line)
-            if sim > best_similarity:
-                best_similarity = sim
-                best_match = prev_line
-
-        # Threshold: >0.6 similarity = edit, <0.6 = new
-        if best_similarity > 0.6 and best_match:
-            edited_pairs.append((best_match, curr_line))
-            # Remove from removed_lines if it was there
-            if best_match in removed_lines:
-                removed_lines.remove(best_match)
-        else:
-            new_lines.append(curr_line)
+    # Detect specific changes from one optimal line-to-line mapping, so two
+    # new lines can't both claim the same old line as their edit
+    # Threshold: >0.6 similarity = edit, <0.6 = new
+    _, edited, added, removed = match_lines(current_text, previous_text, threshold=0.6)
+    new_lines = [current_text[i] for i in added]
+    removed_lines = [previous_text[j] for j in removed]
+    edited_pairs = [(previous_text[j], current_text[i]) for j, i in edited]
 
     # Determine change type
     if jaccard < 0.3:
@@ -448,115 +451,7 @@ def format_cleared_message(previous_text: list, for_discord: bool = False) -> st
 # Feature 4: Confidence Aggregation
 # ============================================================
 
-class ConfidenceAggregator:
-    """
-    Maintains a rolling buffer of recent OCR readings and finds consensus text.
-
-    When the same text is read multiple times with variations:
-        "LSREATEMACIK" (0.85)
-        "LCREATE MACIK" (0.87)
-        "CREATE MAGIK"  (0.92)
-
-    Aggregates into: best guess "CREATE MAGIK" (seen 3x, best confidence 0.92)
-    """
-
-    def __init__(self, buffer_size: int = 10, similarity_threshold: float = 0.6):
-        self.buffer = deque(maxlen=buffer_size)
-        self.similarity_threshold = similarity_threshold
-        self._consensus_text = []
-        self._consensus_confidence = 0.0
-
-    def add_reading(self, text_lines: list, confidence_scores: list):
-        """Add a new OCR reading to the buffer."""
-        if not text_lines:
-            return
-        self.buffer.append({
-            'text_lines': text_lines,
-            'confidences': confidence_scores,
-            'timestamp': time.time()
-        })
-        self._update_consensus()
-
-    def _update_consensus(self):
-        """Recalculate consensus text from the buffer."""
-        if not self.buffer:
-            self._consensus_text = []
-            self._consensus_confidence = 0.0
-            return
-
-        # Collect all text lines across the buffer, grouped by similarity
-        clusters = []  # Each cluster: list of (text, confidence) tuples
-
-        for reading in self.buffer:
-            for i, line in enumerate(reading['text_lines']):
-                conf = reading['confidences'][i] if i < len(reading['confidences']) else 0.5
-                placed = False
-
-                # Try to place in an existing cluster
-                for cluster in clusters:
-                    # Compare against the best candidate in the cluster
-                    best_in_cluster = max(cluster, key=lambda x: x[1])
-                    sim = SequenceMatcher(None, line.lower(), best_in_cluster[0].lower()).ratio()
-                    if sim >= self.similarity_threshold:
-                        cluster.append((line, conf))
-                        placed = True
-                        break
-
-                if not placed:
-                    clusters.append([(line, conf)])
-
-        # For each cluster, pick the highest-confidence reading as the consensus
-        consensus = []
-        for cluster in clusters:
-            best_text, best_conf = max(cluster, key=lambda x: x[1])
-            times_seen = len(cluster)
-            consensus.append({
-                'text': best_text,
-                'confidence': best_conf,
-                'times_seen': times_seen,
-                'avg_confidence': sum(c for _, c in cluster) / len(cluster)
-            })
-
-        # Sort by times_seen (most frequent first), then by confidence
-        consensus.sort(key=lambda x: (x['times_seen'], x['confidence']), reverse=True)
-
-        self._consensus_text = [c['text'] for c in consensus]
-        self._consensus_confidence = (
-            sum(c['avg_confidence'] for c in consensus) / len(consensus) if consensus else 0.0
-        )
-        self._consensus_details = consensus
-
-    @property
-    def consensus_text(self) -> list:
-        """Best-guess text lines based on aggregated readings."""
-        return self._consensus_text
-
-    @property
-    def consensus_confidence(self) -> float:
-        """Overall aggregated confidence score."""
-        return self._consensus_confidence
-
-    @property
-    def details(self) -> list:
-        """Detailed consensus info: text, confidence, times_seen, avg_confidence."""
-        return getattr(self, '_consensus_details', [])
-
-    def format_consensus_summary(self) -> str:
-        """Human-readable summary of the current consensus."""
-        if not self.details:
-            return "No readings yet"
-        parts = []
-        for d in self.details[:5]:
-            seen = f"(seen {d['times_seen']}x, conf {d['avg_confidence']:.0%})"
-            parts.append(f"  \"{d['text']}\" {seen}")
-        return "Best reading:\n" + "\n".join(parts)
-
-    def clear(self):
-        """Reset the aggregator."""
-        self.buffer.clear()
-        self._consensus_text = []
-        self._consensus_confidence = 0.0
-        self._consensus_details = []
+# ConfidenceAggregator lives in utils/ocr_consensus.py (incremental clustering)
 
 
 # ============================================================
@@ -751,6 +646,12 @@ def run_detection():
         log_event("Discord notifications: ENABLED")
     if args.display:
         log_event("Live display: ENABLED (press 'q' to quit)")
+    if args.spatial_consensus:
+        log_event("Consensus: matching lines by board position")
+    if args.no_recognition_cache:
+        log_event("Recognition cache: DISABLED")
+    if args.no_change_gate:
+        log_event("Board change gate: DISABLED")
     log_event("Press Ctrl+C to exit\n")
 
     # Initialize status file
@@ -764,7 +665,14 @@ def run_detection():
         send_discord_notification(discord_startup)
 
     # Feature 4: Confidence aggregator for consensus text
-    aggregator = ConfidenceAggregator(buffer_size=10, similarity_threshold=0.6)
+    aggregator = ConfidenceAggregator(
+        buffer_size=args.consensus_buffer, similarity_threshold=0.6,
+        spatial=args.spatial_consensus,
+    )
+    # Recognition results for unchanged regions, shared with CropConfigsCreator
+    region_cache = None if args.no_recognition_cache else RegionCache()
+    # Skips consensus/history/change detection while the preview is unchanged
+    board_gate = None if args.no_change_gate else BoardChangeGate()
 
     try:
         # Connect to device
@@ -841,15 +749,19 @@ def run_detection():
             crop_node.initialConfig.setReusePreviousImage(False)
             crop_node.inputConfig.setReusePreviousMessage(False)
             crop_node.inputImage.setReusePreviousMessage(True)
-            crop_node.inputConfig.setMaxSize(30)
-            crop_node.inputImage.setMaxSize(30)
+            crop_node.inputConfig.setMaxSize(CROP_QUEUE_DEPTH)
+            crop_node.inputImage.setMaxSize(CROP_QUEUE_DEPTH)
             crop_node.setNumFramesPool(30)
 
             # Create host node for crop configuration (using oak-examples implementation)
             crop_config_creator = pipeline.create(CropConfigsCreator).build(
                 det_nn.out,
                 (REQ_WIDTH, REQ_HEIGHT),
-                (rec_model_w, rec_model_h)
+                (rec_model_w, rec_model_h),
+                region_cache=region_cache,
+                # Detection-sized frame, enough for crop fingerprints
+                frame_input=resize_node.out if region_cache else None,
+                config_queue_depth=CROP_QUEUE_DEPTH,
             )
             crop_config_creator.config_output.link(crop_node.inputConfig)
             cam_out.link(crop_node.inputImage)
@@ -870,6 +782,17 @@ def run_detection():
             q_gathered = gather_data_node.out.createOutputQueue(maxSize=4, blocking=False)
             q_preview = cam_out.createOutputQueue(maxSize=4, blocking=False)
 
+            # Downscaled grayscale preview for the board change gate (shrunk
+            # on device, so the host only hashes a few KB per frame)
+            q_gate = None
+            if board_gate is not None:
+                gate_manip = pipeline.create(dai.node.ImageManip)
+                gate_manip.initialConfig.setOutputSize(*GATE_PREVIEW_SIZE)
+                gate_manip.initialConfig.setFrameType(dai.ImgFrame.Type.GRAY8)
+                gate_manip.inputImage.setBlocking(False)
+                cam_out.link(gate_manip.inputImage)
+                q_gate = gate_manip.out.createOutputQueue(maxSize=4, blocking=False)
+
             log_event("Pipeline created.")
 
             # Start pipeline
@@ -885,31 +808,56 @@ def run_detection():
                 cv2.namedWindow("Whiteboard OCR - Full", cv2.WINDOW_NORMAL)
                 cv2.resizeWindow("Whiteboard OCR - Full", 1152, 640)
 
+            # Line count of the last processed result, for the overlays
+            # (gated results leave text_lines from an older iteration)
+            last_line_count = 0
+
             while pipeline.isRunning():
                 # Get synced detection + recognition results
                 gathered_msg = q_gathered.tryGet()
 
                 # Get preview frame
                 preview_frame = q_preview.tryGet()
+                gate_frame = q_gate.tryGet() if q_gate is not None else None
+                if gate_frame is not None:
+                    board_gate.observe(gate_frame.getCvFrame())
 
                 if gathered_msg is not None:
                     # Extract detections and recognitions
                     detections_msg = gathered_msg.reference_data
+                    detections_list = getattr(detections_msg, 'detections', [])
                     recognitions_list = gathered_msg.gathered
+                    if region_cache is not None:
+                        # Add cached results for regions that weren't re-recognized
+                        detections_list, recognitions_list = region_cache.resolve(
+                            detections_msg.getSequenceNum(), detections_list, recognitions_list
+                        )
+                    # Board looks the same as when last processed: nothing new to
+                    # aggregate, log or announce (unless a change is being debounced)
+                    skip_post = board_gate is not None and board_gate.should_skip(
+                        time.time(), settling=pending_state is not None
+                    )
+
+                if gathered_msg is not None and not skip_post:
+                    post_start = time.perf_counter()
 
                     # Extract text from all recognitions
                     text_lines = []
+                    text_boxes = []  # Outer box per text line, for spatial consensus
                     confidence_scores = []
                     num_regions = 0
 
                     if hasattr(detections_msg, 'detections'):
-                        num_regions = len(detections_msg.detections)
+                        num_regions = len(detections_list)
 
                         for i, recognition in enumerate(recognitions_list):
-                            if i < len(detections_msg.detections):
+                            if i < len(detections_list):
                                 text = extract_text_from_recognition(recognition, args.confidence)
                                 if text:
                                     text_lines.append(text)
+                                    text_boxes.append(
+                                        detections_list[i].rotated_rect.getOuterRect()
+                                    )
 
                                     # Collect confidence scores for averaging
                                     if hasattr(recognition, 'scores') and len(recognition.scores) > 0:
@@ -920,40 +868,46 @@ def run_detection():
                     avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
 
                     text_detected = len(text_lines) > 0
-                    text_detection_history.append(text_detected)
+                    last_line_count = len(text_lines)
+                    text_detection_window.add(
+                        detections_msg.getTimestamp().total_seconds(), text_detected
+                    )
 
                     # Feature 4: Feed confidence aggregator
                     if text_lines:
-                        aggregator.add_reading(text_lines, confidence_scores)
+                        aggregator.add_reading(text_lines, confidence_scores, text_boxes)
 
                     # Log to history file (every detection, not just changes)
                     if num_regions > 0:
                         log_text_history(text_lines, num_regions, avg_confidence)
 
-                    # Smoothed detection (majority vote from last 5 frames)
-                    smoothed_detection = sum(text_detection_history) >= len(text_detection_history) / 2
+                    # Smoothed detection (majority vote over the last second)
+                    smoothed_detection = text_detection_window.mean >= 0.5
 
                     current_time = time.time()
 
                     # Update console status (show consensus text from aggregator)
                     consensus = aggregator.consensus_text
+                    cache_str = f" | Cached: {region_cache.hit_rate:.0%}" if region_cache else ""
+                    if board_gate is not None:
+                        cache_str += f" | Skipped: {board_gate.skip_ratio:.0%}"
                     if consensus:
                         preview_text = consensus[0][:50] + ("..." if len(consensus[0]) > 50 else "")
                         conf_str = f"{aggregator.consensus_confidence:.0%}"
-                        print(f"\r  Regions: {num_regions} | Best: \"{preview_text}\" ({conf_str})  ",
+                        print(f"\r  Regions: {num_regions}{cache_str} | Best: \"{preview_text}\" ({conf_str})  ",
                               end="", flush=True)
                     elif text_lines:
                         preview_text = text_lines[0][:50] + ("..." if len(text_lines[0]) > 50 else "")
-                        print(f"\r  Regions: {num_regions} | Text: \"{preview_text}\"  ",
+                        print(f"\r  Regions: {num_regions}{cache_str} | Text: \"{preview_text}\"  ",
                               end="", flush=True)
                     else:
-                        print(f"\r  Regions: {num_regions} | Text: [none]  ",
+                        print(f"\r  Regions: {num_regions}{cache_str} | Text: [none]  ",
                               end="", flush=True)
 
                     # Feature 5: Smart feedback (throttled)
                     if current_time - last_feedback_time >= FEEDBACK_INTERVAL and num_regions > 0:
                         detections_for_feedback = (
-                            detections_msg.detections if hasattr(detections_msg, 'detections') else []
+                            detections_list if hasattr(detections_msg, 'detections') else []
                         )
                         feedback = generate_smart_feedback(
                             detections_for_feedback, recognitions_list,
@@ -1024,19 +978,19 @@ def run_detection():
                         pending_state = None
                         pending_state_time = None
 
+                    if board_gate is not None:
+                        board_gate.mark_processed(time.time(), time.perf_counter() - post_start)
+
                 # Display frame with text overlay if enabled
                 if args.display and preview_frame is not None:
                     frame = preview_frame.getCvFrame()
 
                     # Draw text boxes and recognized text
                     if gathered_msg is not None:
-                        detections_list = gathered_msg.reference_data.detections if hasattr(gathered_msg.reference_data, 'detections') else []
-                        recognitions_list = gathered_msg.gathered
-
                         frame = draw_text_on_frame(frame, detections_list, recognitions_list, args.confidence)
 
                     # Add status text
-                    status_text = f"Text Lines: {len(text_lines) if gathered_msg else 0}"
+                    status_text = f"Text Lines: {last_line_count if gathered_msg else 0}"
                     cv2.putText(frame, status_text, (10, 30),
                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
                     cv2.putText(frame, f"User: {username}@{hostname}", (10, 60),
@@ -1058,7 +1012,9 @@ def run_detection():
                     content = last_text_content
                     regions = len(content)
                     update_status_file(detected, content, regions,
-                                     running=True, username=username, hostname=hostname)
+                                     running=True, username=username, hostname=hostname,
+                                     recognition_cache=region_cache.stats if region_cache else None,
+                                     change_gate=board_gate.stats if board_gate else None)
                     last_status_update_time = current_time
 
                 # Periodic screenshot save
@@ -1067,13 +1023,10 @@ def run_detection():
                         frame = preview_frame.getCvFrame()
 
                         # Draw text on screenshot
-                        detections_list = gathered_msg.reference_data.detections if hasattr(gathered_msg.reference_data, 'detections') else []
-                        recognitions_list = gathered_msg.gathered
-
                         frame = draw_text_on_frame(frame, detections_list, recognitions_list, args.confidence)
 
                         # Add overlay
-                        status_text = f"Lines: {len(text_lines) if gathered_msg else 0} | {username}@{hostname}"
+                        status_text = f"Lines: {last_line_count if gathered_msg else 0} | {username}@{hostname}"
                         cv2.putText(frame, status_text, (10, 30),
                                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
 
@@ -1101,6 +1054,14 @@ def run_detection():
     except KeyboardInterrupt:
         shutdown_msg = "Whiteboard OCR reader (full) stopped"
         log_event(f"\n{shutdown_msg}")
+        if region_cache is not None:
+            stats = region_cache.stats
+            log_event(f"Recognition cache: {stats['hit_rate']:.0%} of regions reused "
+                      f"({stats['hits']} hits, {stats['misses']} recognized)")
+        if board_gate is not None:
+            stats = board_gate.stats
+            log_event(f"Change gate: skipped {stats['skip_ratio']:.0%} of results "
+                      f"(~{stats['cpu_saved_seconds']:.1f} s CPU saved)")
         if args.discord:
             discord_shutdown = f"📴 **{username}** stopped whiteboard_reader_full.py on **{hostname}** - camera is free"
             send_discord_notification(discord_shutdown)